@@ -9,7 +9,7 @@ from pyscf.ao2mo import incore
 from pyscf.ao2mo import outcore
 from pyscf.ao2mo import r_outcore
 
-from pyscf.ao2mo.addons import load, restore
+from pyscf.ao2mo.addons import load, restore, load_symm
 
 def full(eri_or_mol, mo_coeff, *args, **kwargs):
     r'''MO integral transformation. The four indices (ij|kl) are transformed
@@ -77,6 +77,12 @@ def full(eri_or_mol, mo_coeff, *args, **kwargs):
             returned MO integrals has (up to 4-fold) permutation symmetry.
             If it's False, the function will abandon any permutation symmetry,
             and return the "plain" MO integrals
+        orbsym : list of int
+            *Note* this argument is effective when eri_or_mol is Mole object.
+            Irrep IDs (D2h and its subgroups) of the orbitals.  If given, only
+            the symmetry allowed integrals are computed.  When erifile is
+            given, the integrals are saved in symmetry blocks (see
+            :func:`outcore.full_symm` and :func:`addons.load_symm`).
 
     Returns:
         If eri_or_mol is array or erifile is not give,  the function returns 2D
@@ -121,8 +127,21 @@ def full(eri_or_mol, mo_coeff, *args, **kwargs):
     >>> view('full.h5')
     dataset ['eri_mo', 'new'], shape (3, 100, 55)
     '''
+    orbsym = kwargs.pop('orbsym', None)
     if isinstance(eri_or_mol, numpy.ndarray):
         return incore.full(eri_or_mol, mo_coeff, *args, **kwargs)
+    elif orbsym is not None:
+        if len(args) > 0:
+            erifile = args[0]
+            if isinstance(erifile, tempfile._TemporaryFileWrapper):
+                erifile = erifile.name
+            return outcore.full_symm(eri_or_mol, mo_coeff, orbsym, erifile,
+                                     *args[1:], **kwargs)
+        else:
+            erifile = tempfile.NamedTemporaryFile()
+            outcore.full_symm(eri_or_mol, mo_coeff, orbsym, erifile.name,
+                              **kwargs)
+            return load_symm(erifile.name)
     else:
         if 'intor' in kwargs and ('_sph' not in kwargs['intor']):
             mod = r_outcore
@@ -32,11 +32,7 @@ class AO2MOpt(object):
 
         if prescreen != 'CVHFnoscreen':
             # for cint2e_sph, qcondname is 'CVHFsetnr_direct_scf'
-            fsetqcond = getattr(libao2mo, qcondname)
-            fsetqcond(self._this,
-                      c_atm.ctypes.data_as(ctypes.c_void_p), natm,
-                      c_bas.ctypes.data_as(ctypes.c_void_p), nbas,
-                      c_env.ctypes.data_as(ctypes.c_void_p))
+            _vhf.set_qcond(self, mol, qcondname, libao2mo)
 
         def to_del():
             self._cintopt = None
@@ -46,6 +42,21 @@ class AO2MOpt(object):
     def __del__(self):
         self.__to_del()
 
+    def get_q_cond(self):
+        '''Schwarz bounds sqrt(max|(ij|ij)|) of the shell pairs.  Return None
+        if the optimizer does not hold the Schwarz conditions.
+        '''
+        opt = self._this.contents
+        if not opt.q_cond:
+            return None
+        nbas = opt.nbas
+        q_cond = numpy.ctypeslib.as_array(ctypes.cast(opt.q_cond,
+                                          ctypes.POINTER(ctypes.c_double)),
+                                          shape=(nbas,nbas))
+        # C code stores 1/sqrt(max|(ij|ij)|)
+        with numpy.errstate(divide='ignore'):
+            return 1. / q_cond
+
 
 # if out is not None, transform AO to MO in-place
 def nr_e1fill(intor, sh_range, atm, bas, env,
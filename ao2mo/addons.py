@@ -135,6 +135,70 @@ def restore(symmetry, eri, norb, tao=None):
 
     return _call_restore(origsym, targetsym, eri, eri1, norb)
 
+def load_symm(eri, dataname='eri_mo', orbs=None):
+    '''Read the symmetry blocked MO integrals generated by
+    :func:`outcore.full_symm`.  The symmetry forbidden integrals are zero.
+
+    Args:
+        eri : str or h5py File or h5py Group object
+            The file which holds the symmetry blocked integrals
+
+    Kwargs:
+        dataname : str
+            The group name of the integrals in the file
+        orbs : list of 4 index arrays
+            The orbitals (in the original order) of the four indices of
+            (ij|kl).  If not given, the 4-fold symmetric integrals of all
+            orbitals are returned.
+
+    Returns:
+        (ij|kl) as a 2D array.  The shape is (ni*nj,nk*nl) if orbs is given.
+        Otherwise it is (norb*(norb+1)/2,norb*(norb+1)/2).
+
+    Examples:
+
+    >>> nocc, nmo = 5, 28
+    >>> o, v = range(nocc), range(nocc, nmo)
+    >>> ovov = load_symm('n2.h5', orbs=(o,v,o,v)).reshape(nocc,nmo-nocc,nocc,nmo-nocc)
+    >>> cas = range(4, 10)
+    >>> eri_cas = restore(4, load_symm('n2.h5', orbs=(cas,)*4), len(cas))
+    '''
+    with load(eri, dataname) as g:
+        orbsym = numpy.asarray(g.attrs['orbsym']) % 10
+        norb = len(orbsym)
+        idx = numpy.argsort(orbsym, kind='mergesort')
+        rank = numpy.empty(norb, dtype=int)
+        rank[idx] = numpy.arange(norb)
+        sym = orbsym[idx]
+        pairsym = (sym[:,None] ^ sym)[numpy.tril_indices(norb)]
+        # the position of each pair in its symmetry block
+        pos = numpy.empty_like(pairsym)
+        for ir in numpy.unique(pairsym):
+            mask = pairsym == ir
+            pos[mask] = numpy.arange(numpy.count_nonzero(mask))
+
+        def pair_index(i, j):
+            i = rank[numpy.asarray(i)]
+            j = rank[numpy.asarray(j)]
+            ij = numpy.maximum(i, j)
+            return ij*(ij+1)//2 + numpy.minimum(i, j)
+        if orbs is None:
+            pij = pkl = pair_index(*numpy.tril_indices(norb))
+        else:
+            pij = pair_index(numpy.asarray(orbs[0])[:,None],
+                             numpy.asarray(orbs[1])).ravel()
+            pkl = pair_index(numpy.asarray(orbs[2])[:,None],
+                             numpy.asarray(orbs[3])).ravel()
+
+        out = numpy.zeros((pij.size,pkl.size))
+        for ir in numpy.unique(pairsym[pij]):
+            rows = numpy.where(pairsym[pij] == ir)[0]
+            cols = numpy.where(pairsym[pkl] == ir)[0]
+            if cols.size > 0:
+                blk = numpy.asarray(g[str(ir)])
+                out[rows[:,None],cols] = blk[pos[pij[rows]][:,None],pos[pkl[cols]]]
+    return out
+
 def _call_restore(origsym, targetsym, eri, eri1, norb, tao=None):
     if numpy.iscomplexobj(eri):
         raise RuntimeError('TODO')
@@ -19,7 +19,8 @@ IOBUF_ROW_MIN = 160
 
 def full(mol, mo_coeff, erifile, dataname='eri_mo', tmpdir=None,
          intor='cint2e_sph', aosym='s4', comp=1,
-         max_memory=2000, ioblk_size=IOBLK_SIZE, verbose=logger.WARN, compact=True):
+         max_memory=2000, ioblk_size=IOBLK_SIZE, verbose=logger.WARN, compact=True,
+         sparse_tol=None):
     r'''Transfer arbitrary spherical AO integrals to MO integrals for given orbitals
 
     Args:
@@ -71,6 +72,12 @@ def full(mol, mo_coeff, erifile, dataname='eri_mo', tmpdir=None,
             returned MO integrals has (up to 4-fold) permutation symmetry.
             If it's False, the function will abandon any permutation symmetry,
             and return the "plain" MO integrals
+        sparse_tol : float
+            If given, the kl AO shell pairs whose contributions to the MO
+            integrals are bounded by sparse_tol (estimated with the Schwarz
+            inequality and the orbital coefficients, see
+            :func:`screen_kl_shell_pairs`) are skipped.  It is efficient for
+            localized orbitals.  Only cint2e_sph is supported.
 
     Returns:
         None
@@ -100,12 +107,14 @@ def full(mol, mo_coeff, erifile, dataname='eri_mo', tmpdir=None,
     dataset ['eri_mo', 'new'], shape (3, 100, 55)
     '''
     general(mol, (mo_coeff,)*4, erifile, dataname, tmpdir,
-            intor, aosym, comp, max_memory, ioblk_size, verbose, compact)
+            intor, aosym, comp, max_memory, ioblk_size, verbose, compact,
+            sparse_tol)
     return erifile
 
 def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
             intor='cint2e_sph', aosym='s4', comp=1,
-            max_memory=2000, ioblk_size=IOBLK_SIZE, verbose=logger.WARN, compact=True):
+            max_memory=2000, ioblk_size=IOBLK_SIZE, verbose=logger.WARN, compact=True,
+            sparse_tol=None):
     r'''For the given four sets of orbitals, transfer arbitrary spherical AO
     integrals to MO integrals on the fly.
 
@@ -129,7 +138,9 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
             The directory where to temporarily store the intermediate data
             (the half-transformed integrals).  By default, it's controlled by
             shell environment variable ``TMPDIR``.  The disk space requirement
-            is about  comp*mo_coeffs[0].shape[1]*mo_coeffs[1].shape[1]*nao**2
+            is about  comp*mo_coeffs[0].shape[1]*mo_coeffs[1].shape[1]*nao**2.
+            The half-transformed integrals are held in memory and no
+            temporary file is created if they take less than half of max_memory.
         intor : str
             Name of the 2-electron integral.  Ref to :func:`getints_by_shell`
             for the complete list of available 2-electron integral names
@@ -159,6 +170,12 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
             returned MO integrals has (up to 4-fold) permutation symmetry.
             If it's False, the function will abandon any permutation symmetry,
             and return the "plain" MO integrals
+        sparse_tol : float
+            If given, the kl AO shell pairs whose contributions to the MO
+            integrals are bounded by sparse_tol (estimated with the Schwarz
+            inequality and the orbital coefficients, see
+            :func:`screen_kl_shell_pairs`) are skipped.  It is efficient for
+            localized orbitals.  Only cint2e_sph is supported.
 
     Returns:
         None
@@ -256,19 +273,44 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
     log.debug('num. MO ints = %.8g, required disk %.8g MB',
               float(nij_pair)*nkl_pair*comp, nij_pair*nkl_pair*comp*8/1e6)
 
+    ao2mopt = kl_skip = None
+    if sparse_tol is not None:
+        if intor != 'cint2e_sph':
+            raise NotImplementedError('sparse ao2mo for %s' % intor)
+        ao2mopt = _ao2mo.AO2MOpt(mol, intor, 'CVHFnr_schwarz_cond',
+                                 'CVHFsetnr_direct_scf')
+        kl_skip, err = screen_kl_shell_pairs(mol, mo_coeffs, sparse_tol,
+                                             aosym, ao2mopt)
+        log.info('sparse ao2mo: skip %d of %d kl shell pairs, '
+                 'error estimate %.3g', kl_skip.sum(), kl_skip.size, err)
+
 # transform e1
-    swapfile = tempfile.NamedTemporaryFile(dir=tmpdir)
-    fswap = h5py.File(swapfile.name, 'w')
-    half_e1(mol, mo_coeffs, fswap, intor, aosym, comp, max_memory, ioblk_size,
-            log, compact)
+# If the half-transformed integrals fit in memory, keep them in memory and
+# skip the swap file.  Otherwise they are streamed through the HDF5 swap file.
+    mem_swap = comp * nij_pair * nao_pair * 8/1e6
+    swap_incore = mem_swap < max_memory * .5
+    if swap_incore:
+        log.debug('step1: keep half-transformed integrals in memory, %.8g MB',
+                  mem_swap)
+        fswap = numpy.empty((comp,nij_pair,nao_pair))
+        half_e1(mol, mo_coeffs, fswap, intor, aosym, comp,
+                max_memory-mem_swap, ioblk_size, log, compact, ao2mopt, kl_skip)
+    else:
+        swapfile = tempfile.NamedTemporaryFile(dir=tmpdir)
+        fswap = h5py.File(swapfile.name, 'w')
+        half_e1(mol, mo_coeffs, fswap, intor, aosym, comp, max_memory,
+                ioblk_size, log, compact, ao2mopt, kl_skip)
 
     time_1pass = log.timer('AO->MO transformation for %s 1 pass'%intor,
                            *time_0pass)
 
     ioblk_size = max(max_memory*.2, ioblk_size)
     iobuflen = guess_e2bufsize(ioblk_size, nij_pair, max(nao_pair,nkl_pair))[0]
-    reading_frame = [numpy.empty((iobuflen,nao_pair)),
-                     numpy.empty((iobuflen,nao_pair))]
+    # t_io = [time to read, time to write, time to wait for IO threads]
+    t_io = [0, 0, 0]
+    if not swap_incore:
+        reading_frame = [numpy.empty((iobuflen,nao_pair)),
+                         numpy.empty((iobuflen,nao_pair))]
     def prefetch(icomp, row0, row1, buf):
         if icomp+1 < comp:
             icomp += 1
@@ -276,25 +318,35 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
             row0, row1 = row1, min(nij_pair, row1+iobuflen)
             icomp = 0
         if row0 < row1:
+            t0 = time.time()
             _load_from_h5g(fswap['%d'%icomp], row0, row1, buf)
+            t_io[0] += time.time() - t0
     def async_read(icomp, row0, row1, thread_read):
+        if swap_incore:
+            return fswap[icomp,row0:row1], None
         buf_current, buf_prefetch = reading_frame
         reading_frame[:] = [buf_prefetch, buf_current]
         if thread_read is None:
             _load_from_h5g(fswap['%d'%icomp], row0, row1, buf_current)
         else:
+            t0 = time.time()
             thread_read.join()
+            t_io[2] += time.time() - t0
         thread_read = lib.background_thread(prefetch, icomp, row0, row1, buf_prefetch)
         return buf_current[:row1-row0], thread_read
 
     def save(icomp, row0, row1, buf):
+        t0 = time.time()
         if comp == 1:
             h5d_eri[row0:row1] = buf[:row1-row0]
         else:
             h5d_eri[icomp,row0:row1] = buf[:row1-row0]
+        t_io[1] += time.time() - t0
     def async_write(icomp, row0, row1, buf, thread_io):
         if thread_io is not None:
+            t0 = time.time()
             thread_io.join()
+            t_io[2] += time.time() - t0
         thread_io = lib.background_thread(save, icomp, row0, row1, buf)
         return thread_io
 
@@ -302,7 +354,6 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
               nao_pair, nkl_pair, iobuflen*nao_pair*8/1e6,
               iobuflen*nkl_pair*8/1e6)
 
-    klaoblks = len(fswap['0'])
     ijmoblks = int(numpy.ceil(float(nij_pair)/iobuflen)) * comp
     ao_loc = mol.ao_loc_nr('cart' in intor)
     ti0 = time_1pass
@@ -329,11 +380,18 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
             log.debug1('step 2 [%d/%d] CPU time: %9.2f, Wall time: %9.2f',
                        istep, ijmoblks, ti1[0]-ti0[0], ti1[1]-ti0[1])
             ti0 = ti1
+    t0 = time.time()
     write_handler.join()
-    fswap.close()
+    t_io[2] += time.time() - t0
+    if swap_incore:
+        fswap = None
+    else:
+        fswap.close()
     if isinstance(erifile, str):
         feri.close()
 
+    log.debug('step2: read %.2f s, write %.2f s (in background), '
+              'wait for IO %.2f s', *t_io)
     log.timer('AO->MO transformation for %s 2 pass'%intor, *time_1pass)
     log.timer('AO->MO transformation for %s '%intor, *time_0pass)
     return erifile
@@ -343,7 +401,7 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
 def half_e1(mol, mo_coeffs, swapfile,
             intor='cint2e_sph', aosym='s4', comp=1,
             max_memory=2000, ioblk_size=IOBLK_SIZE, verbose=logger.WARN, compact=True,
-            ao2mopt=None):
+            ao2mopt=None, kl_skip=None):
     r'''Half transform arbitrary spherical AO integrals to MO integrals
     for the given two sets of orbitals
 
@@ -352,9 +410,11 @@ def half_e1(mol, mo_coeffs, swapfile,
             AO integrals will be generated in terms of mol._atm, mol._bas, mol._env
         mo_coeff : ndarray
             Transform (ij|kl) with the same set of orbitals.
-        swapfile : str or h5py File or h5py Group object
+        swapfile : str or h5py File or h5py Group object or ndarray
             To store the transformed integrals, in HDF5 format.  The transformed
-            integrals are saved in blocks.
+            integrals are saved in blocks.  If swapfile is a numpy array of
+            shape (comp,nij_pair,nao_pair), the transformed integrals are
+            held in that array.
 
     Kwargs
         intor : str
@@ -390,6 +450,10 @@ def half_e1(mol, mo_coeffs, swapfile,
             and return the "plain" MO integrals
         ao2mopt : :class:`AO2MOpt` object
             Precomputed data to improve perfomance
+        kl_skip : 1D bool array
+            Mask of the kl AO shell pairs (in the order of
+            :func:`guess_shell_ranges`) that can be skipped.  The
+            corresponding half-transformed integrals are set to zero.
 
     Returns:
         None
@@ -430,23 +494,37 @@ def half_e1(mol, mo_coeffs, swapfile,
         fswap = h5py.File(swapfile, 'w')
     else:
         fswap = swapfile
-    for icomp in range(comp):
-        g = fswap.create_group(str(icomp)) # for h5py old version
-
-    log.debug('step1: tmpfile %s  %.8g MB', fswap.filename, nij_pair*nao_pair*8/1e6)
+    if isinstance(fswap, numpy.ndarray):
+        assert(fswap.shape[:2] == (comp,nij_pair))
+    else:
+        for icomp in range(comp):
+            g = fswap.create_group(str(icomp)) # for h5py old version
+        log.debug('step1: tmpfile %s  %.8g MB', fswap.filename, nij_pair*nao_pair*8/1e6)
     log.debug('step1: (ij,kl) = (%d,%d), mem cache %.8g MB, iobuf %.8g MB',
               nij_pair, nao_pair, mem_words*8/1e6, iobuf_words*8/1e6)
     nstep = len(shranges)
     e1buflen = max([x[2] for x in shranges])
 
     e2buflen, chunks = guess_e2bufsize(ioblk_size, nij_pair, e1buflen)
+    kloff = numpy.append(0, numpy.cumsum([x[2] for x in shranges]))
+    # t_io = [time to write, time to wait for the writing thread]
+    t_io = [0, 0]
     def save(istep, iobuf):
-        for icomp in range(comp):
-            _transpose_to_h5g(fswap, '%d/%d'%(icomp,istep), iobuf[icomp],
-                              e2buflen, None)
+        t0 = time.time()
+        if isinstance(fswap, numpy.ndarray):
+            p0, p1 = kloff[istep], kloff[istep+1]
+            for icomp in range(comp):
+                fswap[icomp,:,p0:p1] = iobuf[icomp].T
+        else:
+            for icomp in range(comp):
+                _transpose_to_h5g(fswap, '%d/%d'%(icomp,istep), iobuf[icomp],
+                                  e2buflen, None)
+        t_io[0] += time.time() - t0
     def async_write(istep, iobuf, thread_io):
         if thread_io is not None:
+            t0 = time.time()
             thread_io.join()
+            t_io[1] += time.time() - t0
         thread_io = lib.background_thread(save, istep, iobuf)
         return thread_io
 
@@ -466,6 +544,10 @@ def half_e1(mol, mo_coeffs, swapfile,
         for imic, aoshs in enumerate(sh_range[3]):
             log.debug2('      fill iobuf micro [%d/%d], AO [%d:%d], len(aobuf) = %d', \
                        imic+1, nmic, *aoshs)
+            if kl_skip is not None and kl_skip[aoshs[0]:aoshs[1]].all():
+                iobuf[:,p0:p0+aoshs[2]] = 0
+                p0 += aoshs[2]
+                continue
             buf = numpy.ndarray((comp*aoshs[2],nao_pair), buffer=bufs1) # (@)
             _ao2mo.nr_e1fill(intor, aoshs, mol._atm, mol._bas, mol._env,
                              aosym, comp, ao2mopt, out=buf)
@@ -476,12 +558,155 @@ def half_e1(mol, mo_coeffs, swapfile,
 
         write_handler = async_write(istep, iobuf, write_handler)
         bufs2, buf_write = buf_write, bufs2  # avoid flushing writing buffer
+    t0 = time.time()
     write_handler.join()
+    t_io[1] += time.time() - t0
     bufs1 = bufs2 = None
+    log.debug('step1: write %.2f s (in background), wait for IO %.2f s', *t_io)
     if isinstance(swapfile, str):
         fswap.close()
     return swapfile
 
+def full_symm(mol, mo_coeff, orbsym, erifile, dataname='eri_mo', tmpdir=None,
+              max_memory=2000, ioblk_size=IOBLK_SIZE, verbose=logger.WARN):
+    r'''MO integral transformation for orbitals labelled by the irreps of D2h
+    (or its subgroups).  Only the symmetry allowed integrals (ij|kl), for which
+    orbsym[i]^orbsym[j] == orbsym[k]^orbsym[l], are computed and saved.
+
+    The integrals are saved in the HDF5 group erifile[dataname], one dataset
+    for each irrep of the orbital pairs.  Dataset str(ir) is the 4-fold
+    symmetric block (ij|kl) of the pairs i>=j, k>=l whose product irrep is ir,
+    with the orbitals stably sorted by irreps.  The orbsym is saved in the
+    attribute "orbsym" of the group.  Use :func:`addons.load_symm` to read
+    the integrals.
+
+    Args:
+        mol : :class:`Mole` object
+            AO integrals will be generated in terms of mol._atm, mol._bas, mol._env
+        mo_coeff : ndarray
+            Transform (ij|kl) with the same set of orbitals.
+        orbsym : list of int
+            Irrep IDs of the orbitals, see :func:`symm.label_orb_symm`
+        erifile : str or h5py File or h5py Group object
+            To store the transformed integrals, in HDF5 format.
+
+    Kwargs
+        dataname, tmpdir, max_memory, ioblk_size, verbose :
+            see :func:`general`
+
+    Returns:
+        erifile
+
+    Examples:
+
+    >>> from pyscf import gto, scf, symm, ao2mo
+    >>> mol = gto.M(atom='N 0 0 0; N 0 0 1.1', basis='ccpvdz', symmetry=1)
+    >>> mf = scf.RHF(mol).run()
+    >>> orbsym = symm.label_orb_symm(mol, mol.irrep_id, mol.symm_orb, mf.mo_coeff)
+    >>> ao2mo.outcore.full_symm(mol, mf.mo_coeff, orbsym, 'n2.h5')
+    >>> eri = ao2mo.load_symm('n2.h5')
+    '''
+    time_0pass = (time.clock(), time.time())
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(mol.stdout, verbose)
+
+    orbsym = numpy.asarray(orbsym)
+    idx = numpy.argsort(orbsym % 10, kind='mergesort')
+    mo = numpy.asarray(mo_coeff[:,idx], order='F')
+    sym = (orbsym % 10)[idx]
+    nao, norb = mo.shape
+    nao_pair = nao * (nao+1) // 2
+    npair = norb * (norb+1) // 2
+    pairsym = (sym[:,None] ^ sym)[numpy.tril_indices(norb)]
+    irreps = numpy.unique(sym)
+    pair_irreps = numpy.unique(pairsym)
+    # orbital segment of each irrep in the sorted orbitals
+    irrep_loc = dict([(ir, (numpy.searchsorted(sym, ir),
+                            numpy.searchsorted(sym, ir, side='right')))
+                      for ir in irreps])
+
+    if isinstance(erifile, str):
+        if h5py.is_hdf5(erifile):
+            feri = h5py.File(erifile)
+            if dataname in feri:
+                del(feri[dataname])
+        else:
+            feri = h5py.File(erifile, 'w')
+    else:
+        assert(isinstance(erifile, h5py.Group))
+        feri = erifile
+    g = feri.create_group(dataname)
+    g.attrs['orbsym'] = orbsym
+    h5d_eri = {}
+    for ir in pair_irreps:
+        n = numpy.count_nonzero(pairsym == ir)
+        h5d_eri[ir] = g.create_dataset(str(ir), (n,n), 'f8')
+    log.debug('MO integrals are saved in %s/%s, %d symmetry blocks, '
+              'required disk %.8g MB', erifile, dataname, len(pair_irreps),
+              sum([x.size for x in h5d_eri.values()])*8/1e6)
+
+    mem_swap = npair * nao_pair * 8/1e6
+    if mem_swap < max_memory * .5:
+        fswap = numpy.empty((1,npair,nao_pair))
+        half_e1(mol, (mo,mo), fswap, 'cint2e_sph', 's4', 1,
+                max_memory-mem_swap, ioblk_size, log)
+    else:
+        swapfile = tempfile.NamedTemporaryFile(dir=tmpdir)
+        fswap = h5py.File(swapfile.name, 'w')
+        half_e1(mol, (mo,mo), fswap, 'cint2e_sph', 's4', 1,
+                max_memory, ioblk_size, log)
+    time_1pass = log.timer('AO->MO transformation 1 pass', *time_0pass)
+
+    # kl of pair irrep ir are the orbital blocks (a, a^ir) with a >= a^ir.
+    # Concatenating these blocks in the order of a gives the kl pairs in the
+    # order of the packed lower triangular pair index.
+    klblocks = {}
+    for ir in pair_irreps:
+        klblocks[ir] = []
+        for a in irreps:
+            b = a ^ ir
+            if b <= a and b in irrep_loc:
+                k0, k1 = irrep_loc[a]
+                l0, l1 = irrep_loc[b]
+                klblocks[ir].append(((k0,k1,l0,l1), ('s2' if a == b else 's1')))
+
+    ioblk_size = max(max_memory*.2, ioblk_size)
+    iobuflen = guess_e2bufsize(ioblk_size, npair, max(nao_pair,npair))[0]
+    buf = numpy.empty((iobuflen,nao_pair))
+    ao_loc = mol.ao_loc_nr()
+    offset = dict([(ir, 0) for ir in pair_irreps])
+    ti0 = time_1pass
+    for row0, row1 in prange(0, npair, iobuflen):
+        if isinstance(fswap, numpy.ndarray):
+            rows = fswap[0,row0:row1]
+        else:
+            rows = _load_from_h5g(fswap['0'], row0, row1, buf)[:row1-row0]
+        for ir in pair_irreps:
+            sel = numpy.where(pairsym[row0:row1] == ir)[0]
+            if sel.size == 0:
+                continue
+            bufsel = rows[sel]
+            out = []
+            for orbs_slice, mosym in klblocks[ir]:
+                out.append(_ao2mo.nr_e2(bufsel, mo, orbs_slice, 's4', mosym,
+                                        ao_loc=ao_loc))
+            p0 = offset[ir]
+            h5d_eri[ir][p0:p0+sel.size] = numpy.hstack(out)
+            offset[ir] = p0 + sel.size
+        ti0 = log.timer_debug1('step 2 [%d:%d]'%(row0,row1), *ti0)
+
+    if isinstance(fswap, numpy.ndarray):
+        fswap = None
+    else:
+        fswap.close()
+    if isinstance(erifile, str):
+        feri.close()
+    log.timer('AO->MO transformation 2 pass', *time_1pass)
+    log.timer('AO->MO transformation', *time_0pass)
+    return erifile
+
 def _load_from_h5g(h5group, row0, row1, out):
     nrow = row1 - row0
     col0 = 0
@@ -747,6 +972,48 @@ def guess_shell_ranges(mol, aosym, max_iobuf, max_aobuf=None, ao_loc=None,
         ijsh_range = [div_each_iobuf(*x) for x in ijsh_range]
     return ijsh_range
 
+def screen_kl_shell_pairs(mol, mo_coeffs, tol, aosym='s4', ao2mopt=None):
+    '''Find the kl AO shell pairs which contribute less than tol to the MO
+    integrals (ij|kl).  The contribution of shell pair KL is bounded by
+
+    max_ij sum_MN Q_MN N_Mi N_Nj * Q_KL max_kl N_Kk N_Ll
+
+    where Q is the Schwarz bound of the shell pair and N_Mi is the 1-norm of
+    the coefficients of orbital i on shell M.
+
+    Returns:
+        kl_skip : 1D bool array
+            For the kl shell pairs in the order of :func:`guess_shell_ranges`
+        err : float
+            Upper bound of the error of each MO integral if the shell pairs in
+            kl_skip are skipped
+    '''
+    aosym = _stand_sym_code(aosym)
+    if ao2mopt is None:
+        ao2mopt = _ao2mo.AO2MOpt(mol, 'cint2e_sph', 'CVHFnr_schwarz_cond',
+                                 'CVHFsetnr_direct_scf')
+    q_cond = ao2mopt.get_q_cond()
+    q_cond[numpy.isinf(q_cond)] = 0
+    ao_loc = mol.ao_loc_nr()
+    def shell_norm(c):
+        c = abs(numpy.asarray(c))
+        return numpy.add.reduceat(c, ao_loc[:-1], axis=0)  # (nbas,nmo)
+    ni, nj, nk, nl = [shell_norm(c) for c in mo_coeffs]
+    bound_ij = lib.dot(ni.T, lib.dot(q_cond, nj)).max()
+    nk = nk.max(axis=1)
+    nl = nl.max(axis=1)
+    if aosym in ('s4', 's2kl'):
+        # packed kl pair includes both (K,L) and (L,K)
+        dkl = numpy.einsum('k,l->kl', nk, nl)
+        dkl = dkl + dkl.T
+        dkl[numpy.diag_indices(mol.nbas)] *= .5
+        dkl = (q_cond * dkl)[numpy.tril_indices(mol.nbas)]
+    else:
+        dkl = (q_cond * numpy.einsum('k,l->kl', nk, nl)).ravel()
+    dkl *= bound_ij
+    kl_skip = dkl < tol
+    return kl_skip, dkl[kl_skip].sum()
+
 def _stand_sym_code(sym):
     if isinstance(sym, int):
         return 's%d' % sym
@@ -120,6 +120,52 @@ class KnowValues(unittest.TestCase):
         eri1 = eri1.reshape(nao,nao,nao,nao)
         self.assertTrue(numpy.allclose(eri1, eriref))
 
+    def test_half_e1_swapfile(self):
+        ftmp = tempfile.NamedTemporaryFile()
+        erifile = ftmp.name
+        # small max_memory forces the half-transformed integrals to disk
+        ao2mo.outcore.general(mol, (mo,mo,mo,mo[:,:5]), erifile,
+                              dataname='disk', max_memory=1, ioblk_size=1)
+        ao2mo.outcore.general(mol, (mo,mo,mo,mo[:,:5]), erifile,
+                              dataname='mem', max_memory=100)
+        feri = h5py.File(erifile)
+        self.assertTrue(numpy.allclose(feri['disk'], feri['mem']))
+        feri.close()
+
+    def test_sparse_tol(self):
+        ftmp = tempfile.NamedTemporaryFile()
+        erifile = ftmp.name
+        mo1 = mo.copy()
+        mo1[14:] = 0  # orbitals on O atom only
+        kl_skip, err = ao2mo.outcore.screen_kl_shell_pairs(mol, (mo1,)*4, 1e-9)
+        self.assertTrue(kl_skip.any())
+        ao2mo.outcore.full(mol, mo1, erifile, dataname='sparse', sparse_tol=1e-9)
+        ao2mo.outcore.full(mol, mo1, erifile, dataname='dense')
+        feri = h5py.File(erifile)
+        self.assertTrue(abs(feri['sparse'].value-feri['dense'].value).max() < 1e-9)
+        feri.close()
+
+    def test_full_symm(self):
+        ftmp = tempfile.NamedTemporaryFile()
+        erifile = ftmp.name
+        mol1 = mol.copy()
+        mol1.symmetry = 1
+        mol1.build(0, 0)
+        c = numpy.hstack(mol1.symm_orb)
+        orbsym = numpy.hstack([[ir]*x.shape[1] for ir, x in
+                               zip(mol1.irrep_id, mol1.symm_orb)])
+        idx = numpy.random.permutation(c.shape[1])
+        c, orbsym = c[:,idx], orbsym[idx]
+        ao2mo.full(mol1, c, erifile, orbsym=orbsym, max_memory=1, ioblk_size=1)
+        eri0 = ao2mo.outcore.full_iofree(mol1, c)
+        self.assertTrue(numpy.allclose(ao2mo.load_symm(erifile), eri0))
+        nmo = c.shape[1]
+        o, v = numpy.arange(5), numpy.arange(5, nmo)
+        eri1 = ao2mo.restore(1, eri0, nmo)
+        self.assertTrue(numpy.allclose(ao2mo.load_symm(erifile, orbs=(o,v,o,v)),
+                                       eri1[:5,5:,:5,5:].reshape(5*(nmo-5),-1)))
+        self.assertTrue(numpy.allclose(ao2mo.full(mol1, c, orbsym=orbsym), eri0))
+
     def test_group_segs(self):
         numpy.random.seed(1)
         segs = numpy.asarray(numpy.random.random(40)*50, dtype=int)
@@ -12,3 +12,7 @@ def RCCSD(mf, frozen=[], mo_energy=None, mo_coeff=None, mo_occ=None):
 def UCCSD(mf, frozen=[], mo_energy=None, mo_coeff=None, mo_occ=None):
     from pyscf.cc import uccsd
     return uccsd.UCCSD(mf, frozen, mo_energy, mo_coeff, mo_occ)
+
+def DFCCSD(mf, frozen=[], mo_energy=None, mo_coeff=None, mo_occ=None):
+    from pyscf.cc import dfccsd
+    return dfccsd.CCSD(mf, frozen, mo_energy, mo_coeff, mo_occ)
@@ -19,7 +19,12 @@ BLKMIN = 4
 
 # default max_memory = 2000 MB
 def kernel(cc, eris, t1=None, t2=None, max_cycle=50, tol=1e-8, tolnormt=1e-6,
-           max_memory=2000, verbose=logger.INFO):
+           max_memory=2000, verbose=logger.INFO, adiis=None, start_cycle=0):
+    '''CCSD iterations.  If cc.chkfile is set, the amplitudes and the DIIS
+    subspace are saved every cc.chk_cycle iterations in the background.
+    adiis and start_cycle are used to resume the iterations from a checkpoint
+    (see CCSD.restart).
+    '''
     if isinstance(verbose, logger.Logger):
         log = verbose
     else:
@@ -36,27 +41,50 @@ def kernel(cc, eris, t1=None, t2=None, max_cycle=50, tol=1e-8, tolnormt=1e-6,
     nocc, nvir = t1.shape
     eold = 0
     eccsd = 0
-    if cc.diis:
+    if start_cycle > 0:
+        eccsd = energy(cc, t1, t2, eris)
+    if not cc.diis:
+        adiis = lambda t1,t2,*args: (t1,t2)
+    elif adiis is None:
         adiis = lib.diis.DIIS(cc, cc.diis_file)
         adiis.space = cc.diis_space
-    else:
-        adiis = lambda t1,t2,*args: (t1,t2)
 
     conv = False
-    for istep in range(max_cycle):
-        t1new, t2new = cc.update_amps(t1, t2, eris, max_memory)
-        normt = numpy.linalg.norm(t1new-t1) + numpy.linalg.norm(t2new-t2)
-        t1, t2 = t1new, t2new
-        t1new = t2new = None
-        if cc.diis:
-            t1, t2 = cc.diis(t1, t2, istep, normt, eccsd-eold, adiis)
-        eold, eccsd = eccsd, energy(cc, t1, t2, eris)
-        log.info('istep = %d  E(CCSD) = %.15g  dE = %.9g  norm(t1,t2) = %.6g',
-                 istep, eccsd, eccsd - eold, normt)
-        cput1 = log.timer('CCSD iter', *cput1)
-        if abs(eccsd-eold) < tol and normt < tolnormt:
-            conv = True
-            break
+    chk = None
+    istep = start_cycle - 1
+    try:
+        for istep in range(start_cycle, max_cycle):
+            t1new, t2new = cc.update_amps(t1, t2, eris, max_memory)
+            normt = numpy.linalg.norm(t1new-t1) + numpy.linalg.norm(t2new-t2)
+            t1, t2 = t1new, t2new
+            t1new = t2new = None
+            if chk is not None:
+# The DIIS subspace being saved cannot be modified until the writing finishes.
+# An error raised by dump_chk in the background is re-raised by get()
+                chk, thread = None, chk
+                thread.get()
+            if cc.diis:
+                t1, t2 = cc.diis(t1, t2, istep, normt, eccsd-eold, adiis)
+            eold, eccsd = eccsd, energy(cc, t1, t2, eris)
+            log.info('istep = %d  E(CCSD) = %.15g  dE = %.9g  norm(t1,t2) = %.6g',
+                     istep, eccsd, eccsd - eold, normt)
+            cput1 = log.timer('CCSD iter', *cput1)
+            if abs(eccsd-eold) < tol and normt < tolnormt:
+                conv = True
+                break
+            if cc.chkfile and (istep+1) % cc.chk_cycle == 0:
+# t1 and t2 are not modified in place by the next iteration.  They can be
+# written while the next update_amps is running.
+                chk = lib.background_thread(cc.dump_chk, t1, t2, istep, eccsd,
+                                            adiis)
+    finally:
+# Do not leave the background writing running when the iterations are
+# interrupted
+        if chk is not None:
+            chk, thread = None, chk
+            thread.get()
+    if cc.chkfile:
+        cc.dump_chk(t1, t2, istep, eccsd, adiis)
     log.timer('CCSD', *cput0)
     return conv, eccsd, t1, t2
 
@@ -93,14 +121,17 @@ def update_amps(cc, t1, t2, eris, max_memory=2000):
     time1 = log.timer_debug1('woooo', *time0)
 
     unit = _memory_usage_inloop(nocc, nvir)*1e6/8
+    # the current and the prefetched blocks of ovvv, ovoo, ooov, ovov, oovv
+    unit += (nvir**2*(nvir+1)//2 + nocc**2*nvir*2 + nocc*nvir**2*2) * 2
     max_memory = max_memory - lib.current_memory()[0]
     blksize = max(BLKMIN, int(max_memory*.95e6/8/unit))
     log.debug1('block size = %d, nocc = %d is divided into %d blocks',
                blksize, nocc, int((nocc+blksize-1)//blksize))
 
-    for p0, p1 in prange(0, nocc, blksize):
-# ==== read eris.ovvv ====
-        eris_ovvv = _cp(eris.ovvv[p0:p1])
+    fetch = _prefetch_eris(eris, ('ovvv', 'ovoo', 'ooov', 'ovov', 'oovv'),
+                           prange(0, nocc, blksize))
+    for p0, p1, eris_ovvv, eris_ovoo, eris_ooov, eris_ovov, eris_oovv in fetch:
+# ==== eris.ovvv ====
         eris_ovvv = _ccsd.unpack_tril(eris_ovvv.reshape((p1-p0)*nvir,-1))
         eris_ovvv = eris_ovvv.reshape(p1-p0,nvir,nvir,nvir)
 
@@ -127,15 +158,14 @@ def update_amps(cc, t1, t2, eris, max_memory=2000):
     #: wOVov -= numpy.einsum('jbik,ka->jiba', eris.ovoo, t1)
     #: t2new += woVoV.transpose()
         #: wOVov = -numpy.einsum('jbik,ka->ijba', eris.ovoo[p0:p1], t1)
-        tmp = _cp(eris.ovoo[p0:p1].transpose(2,0,1,3))
+        tmp = _cp(eris_ovoo.transpose(2,0,1,3))
         wOVov = lib.dot(tmp.reshape(-1,nocc), t1, -1)
-        tmp = None
+        tmp = eris_ovoo = None
         wOVov = wOVov.reshape(nocc,p1-p0,nvir,nvir)
         #: wOVov += numpy.einsum('iabc,jc->jiab', eris_ovvv, t1)
         lib.dot(t1, eris_ovvv.reshape(-1,nvir).T, 1, wOVov.reshape(nocc,-1), 1)
         t2new[p0:p1] += wOVov.transpose(1,0,2,3)
 
-        eris_ooov = _cp(eris.ooov[p0:p1])
         #: woVoV = numpy.einsum('ka,ijkb->ijba', t1, eris.ooov[p0:p1])
         #: woVoV -= numpy.einsum('jc,icab->ijab', t1, eris_ovvv)
         woVoV = lib.dot(_cp(eris_ooov.transpose(0,1,3,2).reshape(-1,nocc)), t1)
@@ -156,8 +186,7 @@ def update_amps(cc, t1, t2, eris, max_memory=2000):
         time2 = log.timer_debug1('ovvv [%d:%d]'%(p0, p1), *time1)
         #==== mem usage blksize*(nvir**3+nocc*nvir**2*4)
 
-# ==== read eris.ovov ====
-        eris_ovov = _cp(eris.ovov[p0:p1])
+# ==== eris.ovov ====
         #==== mem usage blksize*(nocc*nvir**2*4)
 
         for i in range(p1-p0):
@@ -226,8 +255,7 @@ def update_amps(cc, t1, t2, eris, max_memory=2000):
                     eris_ovov[i].reshape(nvir,-1).T, -1, fvv, 1)
         tau = theta = None
 
-# ==== read eris.oovv ====
-        eris_oovv = _cp(eris.oovv[p0:p1])
+# ==== eris.oovv ====
         #==== mem usage blksize*(nocc*nvir**2*3)
 
         #:tmp = numpy.einsum('ic,jkbc->jibk', t1, eris_oovv)
@@ -407,6 +435,8 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
         self.diis_start_cycle = 0
 # FIXME: Should we avoid DIIS starting early?
         self.diis_start_energy_diff = 1e9
+        self.chkfile = None
+        self.chk_cycle = 5
 
         self.frozen = frozen
 
@@ -459,6 +489,8 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
         #log.info('diis_file = %s', self.diis_file)
         log.info('diis_start_cycle = %d', self.diis_start_cycle)
         log.info('diis_start_energy_diff = %g', self.diis_start_energy_diff)
+        if self.chkfile:
+            log.info('chkfile = %s, chk_cycle = %d', self.chkfile, self.chk_cycle)
         if self.mo_coeff is None:
             log.warn('mo_coeff, mo_energy are not given.\n'
                      'You may need mf.kernel() to generate them.')
@@ -487,13 +519,15 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
 
     def kernel(self, t1=None, t2=None, mo_coeff=None, eris=None):
         return self.ccsd(t1, t2, mo_coeff, eris)
-    def ccsd(self, t1=None, t2=None, mo_coeff=None, eris=None):
+    def ccsd(self, t1=None, t2=None, mo_coeff=None, eris=None,
+             adiis=None, start_cycle=0):
         if eris is None: eris = self.ao2mo(mo_coeff)
         self._conv, self.ecc, self.t1, self.t2 = \
                 kernel(self, eris, t1, t2, max_cycle=self.max_cycle,
                        tol=self.conv_tol,
                        tolnormt=self.conv_tol_normt,
-                       max_memory=self.max_memory, verbose=self.verbose)
+                       max_memory=self.max_memory, verbose=self.verbose,
+                       adiis=adiis, start_cycle=start_cycle)
         self.e_corr = self.ecc
         if self._conv:
             logger.info(self, 'CCSD converged')
@@ -506,6 +540,34 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
                         self.ecc+self._scf.e_tot, self.ecc)
         return self.ecc, self.t1, self.t2
 
+    def restart(self, chkfile=None, mo_coeff=None, eris=None):
+        '''Resume the CCSD iterations from the amplitudes and the DIIS
+        subspace saved in chkfile.'''
+        from pyscf.cc import chkfile as cc_chkfile
+        if chkfile is None: chkfile = self.chkfile
+        if self.diis:
+            adiis = lib.diis.DIIS(self, self.diis_file)
+            adiis.space = self.diis_space
+        else:
+            adiis = None
+        istep, e_corr, t1, t2 = cc_chkfile.load_ccsd(chkfile, adiis=adiis)
+        logger.info(self, 'Restart CCSD from %s, cycle %d, E_corr = %.15g',
+                    chkfile, istep, e_corr)
+        return self.ccsd(t1, t2, mo_coeff, eris, adiis, istep+1)
+
+    def dump_chk(self, t1=None, t2=None, istep=None, e_corr=None, adiis=None):
+        from pyscf.cc import chkfile as cc_chkfile
+        cc_chkfile.dump_ccsd(self, self.chkfile, 'ccsd', t1, t2, istep,
+                             e_corr, adiis)
+        return self
+
+    def ccsd_t(self, t1=None, t2=None, eris=None):
+        from pyscf.cc import ccsd_t
+        if t1 is None: t1 = self.t1
+        if t2 is None: t2 = self.t2
+        if eris is None: eris = self.ao2mo()
+        return ccsd_t.kernel(self, eris, t1, t2, self.max_memory, self.verbose)
+
     def solve_lambda(self, t1=None, t2=None, l1=None, l2=None, mo_coeff=None,
                      eris=None):
         from pyscf.cc import ccsd_lambda
@@ -824,6 +886,31 @@ def prange(start, end, step):
 def _cp(a):
     return numpy.array(a, copy=False, order='C')
 
+def _prefetch_eris(eris, keys, blocks):
+    '''Iterate over the blocks of integrals.  For each (p0,p1) in blocks,
+    yield p0, p1 and the arrays eris.key[p0:p1] for key in keys.  The
+    integrals of the next block are read in a background thread while the
+    caller works on the current block, so the I/O of the integrals stored
+    on disk overlaps with the computation.  The memory of two blocks of
+    integrals is needed.
+    '''
+    def load(p0, p1):
+        return [(p0, p1) + tuple([_cp(getattr(eris, key)[p0:p1])
+                                  for key in keys])]
+    blocks = list(blocks)
+    if len(blocks) == 0:
+        return
+    buf = load(*blocks[0])
+    for k in range(len(blocks)):
+        if k+1 < len(blocks):
+            handler = lib.background_thread(load, *blocks[k+1])
+        else:
+            handler = None
+# buf.pop() to release the references of the current block in this frame
+        yield buf.pop()
+        if handler is not None:
+            buf = handler.get()
+
 
 if __name__ == '__main__':
     from pyscf import gto
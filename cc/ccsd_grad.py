@@ -94,28 +94,29 @@ def IX_intermediates(mycc, t1, t2, l1, l2, eris=None, d1=None, d2=None,
 
     max_memory1 = max_memory - lib.current_memory()[0]
     unit = max(nvir**3*2.5, nvir**3*2+nocc*nvir**2)
+    # the current and the prefetched blocks of integrals
+    unit += (nvir**2*(nvir+1)//2 + nocc*nvir**2*2 + nocc**2*nvir + nocc**3) * 2
     blksize = max(ccsd.BLKMIN, int(max_memory1*1e6/8/unit))
     iobuflen = int(256e6/8/(blksize*nvir))
     log.debug1('IX_intermediates pass 1: block size = %d, nocc = %d in %d blocks',
                blksize, nocc, int((nocc+blksize-1)/blksize))
-    for istep, (p0, p1) in enumerate(prange(0, nocc, blksize)):
+    fetch = ccsd._prefetch_eris(eris, ('oooo', 'ooov', 'oovv', 'ovov', 'ovvv'),
+                                prange(0, nocc, blksize))
+    for istep, (p0, p1, eris_oooo, eris_ooov, eris_oovv, eris_ovov,
+                eris_ovx) in enumerate(fetch):
         d_ooov = _cp(dooov[p0:p1])
-        eris_oooo = _cp(eris.oooo[p0:p1])
-        eris_ooov = _cp(eris.ooov[p0:p1])
         #:Ivv += numpy.einsum('ijkb,ijka->ab', d_ooov, eris_ooov)
         #:Ivo += numpy.einsum('jlka,jlki->ai', d_ooov, eris_oooo)
         Ivv += lib.dot(eris_ooov.reshape(-1,nvir).T, d_ooov.reshape(-1,nvir))
         Ivo += lib.dot(d_ooov.reshape(-1,nvir).T, eris_oooo.reshape(-1,nocc))
         #:Ioo += numpy.einsum('klja,klia->ij', d_ooov, eris_ooov)
         #:Xvo += numpy.einsum('kjib,kjba->ai', d_ooov, eris.oovv)
-        eris_oovv = _cp(eris.oovv[p0:p1])
         tmp = _cp(d_ooov.transpose(0,1,3,2).reshape(-1,nocc))
         Ioo += lib.dot(_cp(eris_ooov.transpose(0,1,3,2).reshape(-1,nocc)).T, tmp)
         Xvo += lib.dot(eris_oovv.reshape(-1,nvir).T, tmp)
         eris_oooo = tmp = None
 
         d_ooov = d_ooov + dooov[:,p0:p1].transpose(1,0,2,3)
-        eris_ovov = _cp(eris.ovov[p0:p1])
         #:Ioo += numpy.einsum('ljka,lika->ij', d_ooov, eris_ooov)
         #:Xvo += numpy.einsum('jikb,jakb->ai', d_ooov, eris_ovov)
         for i in range(p1-p0):
@@ -149,7 +150,6 @@ def IX_intermediates(mycc, t1, t2, l1, l2, eris=None, d1=None, d2=None,
         c_ovvv = _ccsd.precontract(d_ovvv.reshape(-1,nvir,nvir))
         ao2mo.outcore._transpose_to_h5g(fswap, 'c_vvov/%d'%istep, c_ovvv, iobuflen)
         c_ovvv = c_ovvv.reshape(-1,nvir,nvir_pair)
-        eris_ovx = _cp(eris.ovvv[p0:p1])
         ao2mo.outcore._transpose_to_h5g(fswap, 'e_vvov/%d'%istep,
                                         eris_ovx.reshape(-1,nvir_pair), iobuflen)
         #:Xvo += numpy.einsum('jibc,jabc->ai', d_oovv, eris_ovvv)
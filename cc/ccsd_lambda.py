@@ -98,11 +98,15 @@ def make_intermediates(mycc, t1, t2, eris, max_memory=2000):
     unit = max(nocc*nvir**2*4 + nvir**3*2,
                nvir**3*3 + nocc*nvir**2,
                nocc*nvir**2*6 + nocc**2*nvir + nocc**3 + nocc**2*nvir)
+    # the current and the prefetched blocks of integrals
+    unit += (nvir**2*(nvir+1)//2 + nocc*nvir**2*2 + nocc**2*nvir*2 + nocc**3) * 2
     blksize = max(ccsd.BLKMIN, int(max_memory*.95e6/8/unit))
     log.debug1('ccsd lambda make_intermediates: block size = %d, nocc = %d in %d blocks',
                blksize, nocc, int((nocc+blksize-1)//blksize))
-    for istep, (p0, p1) in enumerate(prange(0, nocc, blksize)):
-        eris_ovvv = _cp(eris.ovvv[p0:p1])
+    fetch = ccsd._prefetch_eris(eris, ('ovvv', 'ovov', 'ooov', 'ovoo', 'oovv', 'oooo'),
+                                prange(0, nocc, blksize))
+    for istep, (p0, p1, eris_ovvv, eris_ovov, eris_ooov, eris_ovoo,
+                eris_oovv, eris_oooo) in enumerate(fetch):
         eris_ovvv = _ccsd.unpack_tril(eris_ovvv.reshape((p1-p0)*nvir,-1))
         eris_ovvv = eris_ovvv.reshape(p1-p0,nvir,nvir,nvir)
         w1 += numpy.einsum('jcba,jc->ba', eris_ovvv, t1[p0:p1]*2)
@@ -126,19 +130,18 @@ def make_intermediates(mycc, t1, t2, eris, max_memory=2000):
             g2ovvv[i] -= eris_ovvv[i].transpose(1,0,2)
         wooov = numpy.empty((p1-p0,nocc,nocc,nvir))
         woooo = numpy.empty((p1-p0,nocc,nocc,nocc))
-        eris_ovov = _cp(_cp(eris.ovov[p0:p1]).transpose(0,2,1,3))
+        eris_oOvV = _cp(eris_ovov.transpose(0,2,1,3))
         for j0, j1 in prange(0, nocc, blksize):
             tau = _ccsd.make_tau(t2[j0:j1], t1[j0:j1], t1)
             #:wooov[:,j0:j1] = numpy.einsum('icbd,jkbd->ijkc', g2ovvv, tau)
             #:woooo[:,:,j0:j1] = numpy.einsum('icjd,klcd->ijkl', eris_ovov, tau)
             tmp = lib.dot(g2ovvv.reshape(-1,nvir**2), tau.reshape(-1,nvir**2).T)
             wooov[:,j0:j1] = tmp.reshape(-1,nvir,j1-j0,nocc).transpose(0,2,3,1)
-            woooo[:,:,j0:j1] = lib.dot(eris_ovov.reshape(-1,nvir**2),
+            woooo[:,:,j0:j1] = lib.dot(eris_oOvV.reshape(-1,nvir**2),
                                        tau.reshape(-1,nvir**2).T).reshape(-1,nocc,j1-j0,nocc)
-        eris_ovov = eris_ovvv = g2ovvv = tau = tmp = None
+        eris_oOvV = eris_ovvv = g2ovvv = tau = tmp = None
 #==== mem usage nocc*nvir**2*2 + nocc**2*nvir + nocc**3 + nvir**3*2 + nocc*nvir**2*2
 
-        eris_ooov = _cp(eris.ooov[p0:p1])
         w2[p0:p1] += numpy.einsum('ijkb,kb->ij', eris_ooov, t1) * 2
         w2 -= numpy.einsum('kjib,kb->ij', eris_ooov, t1[p0:p1])
         #:w3 -= numpy.einsum('kjlc,klbc->bj', eris_ooov, theta)
@@ -157,7 +160,6 @@ def make_intermediates(mycc, t1, t2, eris, max_memory=2000):
             wooov[i] += eris_ooov[i].transpose(1,0,2)*2
             wooov[i] -= eris_ooov[i]
 
-        eris_ovoo = _cp(eris.ovoo[p0:p1])
         #:woooo += numpy.einsum('icjl,kc->ijkl', eris_ovoo, t1)
         #:wOVov += numpy.einsum('jbkl,lc->jbkc', eris_ovoo, -t1)
         for i in range(p1-p0):
@@ -190,7 +192,6 @@ def make_intermediates(mycc, t1, t2, eris, max_memory=2000):
         eris_ooov = eris_ovoo = g2ooov = vikjc = theta = thetabuf = None
 #==== mem usage nocc*nvir**2*3 + nocc**2*nvir + nocc**3 + nocc*nvir**2 + nocc**2*nvir*3
 
-        eris_ovov = _cp(eris.ovov[p0:p1])
         g2ovov = eris_ovov*2
         g2ovov -= eris_ovov.transpose(0,3,2,1)
         tmpw4 = numpy.einsum('kcld,ld->kc', g2ovov, t1)
@@ -239,7 +240,8 @@ def make_intermediates(mycc, t1, t2, eris, max_memory=2000):
                     vOvOv[j].reshape(nvir,-1))
         ovovtmp = eris_ovov = None
         vOvOv = lib.transpose(vOvOv.reshape(nov,-1)).reshape(p1-p0,nvir,nocc,nvir)
-        vOvOv -= _cp(eris.oovv[p0:p1]).transpose(0,3,1,2)
+        vOvOv -= eris_oovv.transpose(0,3,1,2)
+        eris_oovv = None
         wOVov += vOVov
         wOvOv += vOvOv
         saved.wOVov[p0:p1] = wOVov
@@ -265,7 +267,8 @@ def make_intermediates(mycc, t1, t2, eris, max_memory=2000):
         ov2 = None
 #==== mem usage nocc*nvir**2*5 + nocc**2*nvir + nocc**3
 
-        woooo += _cp(eris.oooo[p0:p1]).transpose(0,2,1,3)
+        woooo += eris_oooo.transpose(0,2,1,3)
+        eris_oooo = None
         saved.woooo[p0:p1] = woooo
         saved.wooov[p0:p1] = wooov
         woooo = wooov = None
@@ -421,11 +424,14 @@ def update_amps(mycc, t1, t2, l1, l2, eris=None, saved=None, max_memory=2000):
 
     max_memory = max_memory - lib.current_memory()[0]
     unit = max(nvir**3*2+nocc*nvir**2, nocc*nvir**2*5)
+    # the current and the prefetched blocks of ovvv, ovov, oovv
+    unit += (nvir**2*(nvir+1)//2 + nocc*nvir**2*2) * 2
     blksize = min(nocc, max(ccsd.BLKMIN, int(max_memory*.95e6/8/unit)))
     log.debug1('block size = %d, nocc = %d is divided into %d blocks',
                blksize, nocc, int((nocc+blksize-1)/blksize))
-    for p0, p1 in prange(0, nocc, blksize):
-        eris_ovvv = _cp(eris.ovvv[p0:p1])
+    fetch = ccsd._prefetch_eris(eris, ('ovvv', 'ovov', 'oovv'),
+                                prange(0, nocc, blksize))
+    for p0, p1, eris_ovvv, eris_ovov, eris_oovv in fetch:
         eris_ovvv = _ccsd.unpack_tril(eris_ovvv.reshape((p1-p0)*nvir,-1))
         eris_ovvv = eris_ovvv.reshape(p1-p0,nvir,nvir,nvir)
 
@@ -450,7 +456,6 @@ def update_amps(mycc, t1, t2, l1, l2, eris=None, saved=None, max_memory=2000):
         eris_ovvv = m4buf = m4 = None
 #==== mem usage nvir**3*2 + nocc*nvir**2
 
-        eris_ovov = _cp(eris.ovov[p0:p1])
         l1new[p0:p1] += numpy.einsum('jb,iajb->ia', l1, eris_ovov) * 2
         for i in range(p1-p0):
             l2new[p0+i] += eris_ovov[i].transpose(1,0,2) * .5
@@ -479,7 +484,6 @@ def update_amps(mycc, t1, t2, l1, l2, eris=None, saved=None, max_memory=2000):
         eris_ovov = m4buf = m4 = None
 #==== mem usage nocc*nvir**2 * 3
 
-        eris_oovv = _cp(eris.oovv[p0:p1])
         l1new[p0:p1] -= numpy.einsum('jb,ijba->ia', l1, eris_oovv)
         eris_oovv = None
 
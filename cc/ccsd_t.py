@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+CCSD(T) for RHF reference
+
+The triples correction is evaluated for the occupied triplets i >= j >= k.
+The occupied orbitals are split into blocks.  For each triplet of blocks,
+the unpacked (ia|bc) of the three blocks are held in memory while the next
+blocks are read from eris.ovvv in the background.  See ccsd_t_slow for the
+reference implementation.
+'''
+
+import time
+import numpy
+from pyscf import lib
+from pyscf.lib import logger
+
+# JCP, 94, 442.  Error in Eq (1), should be [ia] >= [jb] >= [kc]
+def kernel(mycc, eris, t1=None, t2=None, max_memory=2000, verbose=logger.INFO):
+    cpu1 = cpu0 = (time.clock(), time.time())
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(mycc.stdout, verbose)
+
+    if t1 is None: t1 = mycc.t1
+    if t2 is None: t2 = mycc.t2
+
+    nocc, nvir = t1.shape
+    mo_e = eris.fock.diagonal()
+    e_occ = mo_e[:nocc]
+    eabc = lib.direct_sum('a+b+c->abc', mo_e[nocc:], mo_e[nocc:], mo_e[nocc:])
+
+    # ovoo[i,j] = (ia|jm), ovov[i,j] = (ia|jb), t2T[k] = t2[:,k]
+    eris_ovoo = numpy.asarray(eris.ovoo).transpose(0,2,1,3).copy()
+    eris_ovov = numpy.asarray(eris.ovov).transpose(0,2,1,3).copy()
+    t2T = t2.transpose(1,0,2,3).copy()
+
+    nvir3 = nvir**3
+    mem_now = lib.current_memory()[0]
+    # 4 blocks of unpacked ovvv (3 in use + 1 being prefetched) and
+    # ~12 nvir^3 arrays of intermediates
+    max_memory = max(0, max_memory - mem_now - 12*nvir3*8e-6)
+    blksize = min(nocc, max(1, int(max_memory/(4*nvir3*8e-6))))
+    log.debug1('max_memory %d MB (%d MB in use), blksize %d',
+               max_memory, mem_now, blksize)
+
+    def load_ovvv(p0, p1):
+        ovvv = numpy.asarray(eris.ovvv[p0:p1]).reshape((p1-p0)*nvir,-1)
+        return lib.unpack_tril(ovvv).reshape(p1-p0,nvir,nvir,nvir)
+    def load_blocks(blks):
+        return dict([(ib, load_ovvv(*blocks[ib])) for ib in blks])
+
+    blocks = list(lib.prange(0, nocc, blksize))
+    tasks = [(ib, jb, kb) for ib in range(len(blocks))
+             for jb in range(ib+1) for kb in range(jb+1)]
+    cache = {}
+    prefetch = None
+    et = 0
+    for it, task in enumerate(tasks):
+        if prefetch is not None:
+            cache.update(prefetch.get())
+        for ib in list(cache.keys()):
+            if ib not in task:
+                del(cache[ib])
+        cache.update(load_blocks([ib for ib in set(task) if ib not in cache]))
+        if it+1 < len(tasks):
+            nxt = [ib for ib in set(tasks[it+1]) if ib not in cache]
+            prefetch = lib.background_thread(load_blocks, nxt)
+        else:
+            prefetch = None
+
+        ovvv = {}
+        for ib in task:
+            p0, p1 = blocks[ib]
+            for i in range(p0, p1):
+                ovvv[i] = cache[ib][i-p0]
+
+        ib, jb, kb = task
+        for i in range(*blocks[ib]):
+            for j in range(blocks[jb][0], min(i+1, blocks[jb][1])):
+                for k in range(blocks[kb][0], min(j+1, blocks[kb][1])):
+                    et += _contract_ijk(i, j, k, ovvv, eris_ovoo, eris_ovov,
+                                        t1, t2, t2T, e_occ, eabc)
+        if kb == 0 and jb == 0:
+            cpu1 = log.timer_debug1('(T) occupied block %d:%d' % blocks[ib],
+                                    *cpu1)
+
+    et *= 2
+    log.timer('CCSD(T)', *cpu0)
+    log.note('CCSD(T) correction = %.15g', et)
+    return et
+
+def _contract_ijk(i, j, k, ovvv, eris_ovoo, eris_ovov, t1, t2, t2T,
+                  e_occ, eabc):
+    '''(T) energy of the triplet i >= j >= k, summed over all virtuals'''
+    nocc, nvir = t1.shape
+    def get_w(i, j, k):
+        #: w[a,b,c] = (ia|bf) t2[k,j,c,f] - (ia|jm) t2[m,k,b,c]
+        w = lib.dot(ovvv[i].reshape(-1,nvir), t2[k,j].T)
+        w = lib.dot(eris_ovoo[i,j], t2T[k].reshape(nocc,-1), -1,
+                    w.reshape(nvir,-1), 1)
+        return w.reshape(nvir,nvir,nvir)
+    def get_v(i, j, k):
+        #: v[a,b,c] = (ia|jb) t1[k,c]
+        return numpy.einsum('ab,c->abc', eris_ovov[i,j], t1[k])
+    def p6(f):
+        return (f(i,j,k) + f(i,k,j).transpose(0,2,1) +
+                f(j,i,k).transpose(1,0,2) + f(j,k,i).transpose(2,0,1) +
+                f(k,i,j).transpose(1,2,0) + f(k,j,i).transpose(2,1,0))
+
+    w = p6(get_w)
+    v = p6(get_v)
+    v *= .5
+    v += w
+    v /= e_occ[i] + e_occ[j] + e_occ[k] - eabc
+    r = 4 * w + w.transpose(1,2,0) + w.transpose(2,0,1)
+    r -= 2 * w.transpose(2,1,0)
+    r -= 2 * w.transpose(0,2,1)
+    r -= 2 * w.transpose(1,0,2)
+    # sum over the permutations of (i,j,k); 1/6 for the permutations of
+    # the virtuals abc
+    if i == j == k:
+        fac = 1./6
+    elif i == j or j == k:
+        fac = 3./6
+    else:
+        fac = 1.
+    return numpy.dot(v.ravel(), r.ravel()) * fac
+
+
+if __name__ == '__main__':
+    from pyscf import gto
+    from pyscf import scf
+    from pyscf import cc
+    from pyscf.cc import ccsd_t_slow
+
+    mol = gto.Mole()
+    mol.atom = [
+        [8 , (0. , 0.     , 0.)],
+        [1 , (0. , -.957 , .587)],
+        [1 , (0.2,  .757 , .487)]]
+
+    mol.basis = 'ccpvdz'
+    mol.build()
+    rhf = scf.RHF(mol)
+    rhf.conv_tol = 1e-14
+    rhf.scf()
+    mcc = cc.CCSD(rhf)
+    mcc.conv_tol = 1e-14
+    mcc.ccsd()
+    eris = mcc.ao2mo()
+    e3a = kernel(mcc, eris)
+    print(e3a - ccsd_t_slow.kernel(mcc, eris))
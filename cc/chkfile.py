@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+Checkpoint of the CCSD iterations
+
+The amplitudes and the DIIS subspace are saved in two alternating slots
+key/0 and key/1.  The attribute "last" of the group key points to the last
+complete slot, so that a job killed during the writing still has the
+previous checkpoint to restart from.
+'''
+
+import numpy
+import h5py
+from pyscf.lib import diis
+from pyscf.lib.chkfile import load
+from pyscf.lib.chkfile import dump, save
+
+# ~ 160 MB for each block of t2 being written
+BLOCK_SIZE = int(20e6)
+
+def dump_ccsd(mycc, chkfile=None, key='ccsd', t1=None, t2=None, istep=None,
+              e_corr=None, adiis=None):
+    '''Save the CCSD amplitudes and the DIIS subspace in chkfile.
+    '''
+    if chkfile is None: chkfile = mycc.chkfile
+    if t1 is None: t1 = mycc.t1
+    if t2 is None: t2 = mycc.t2
+    if e_corr is None: e_corr = mycc.e_corr
+
+    if h5py.is_hdf5(chkfile):
+        fh5 = h5py.File(chkfile, 'r+')
+    else:
+        fh5 = h5py.File(chkfile, 'w')
+    if key in fh5 and 'last' in fh5[key].attrs:
+        slot = 1 - int(fh5[key].attrs['last'])
+    else:
+        slot = 0
+    grp = fh5.require_group('%s/%d' % (key, slot))
+
+    nocc, nvir = t1.shape
+    _require_dataset(grp, 't1', t1.shape, t1.dtype)[:] = t1
+    dat = _require_dataset(grp, 't2', t2.shape, t2.dtype,
+                           chunks=(1,nocc,nvir,nvir))
+    blksize = max(1, int(BLOCK_SIZE/(nocc*nvir**2)))
+    for p0, p1 in diis.prange(0, nocc, blksize):
+        dat[p0:p1] = t2[p0:p1]
+    grp.attrs['e_corr'] = e_corr
+    if istep is not None:
+        grp.attrs['istep'] = istep
+    if 'diis' in grp:
+        del(grp['diis'])
+    if isinstance(adiis, diis.DIIS):
+        adiis.dump(grp.create_group('diis'))
+    fh5.flush()
+# Switch the slot only after all data of the slot were written
+    fh5[key].attrs['last'] = slot
+    fh5.close()
+
+def load_ccsd(chkfile, key='ccsd', adiis=None):
+    '''Load the CCSD amplitudes from the last complete slot of chkfile.  If
+    adiis is given, the saved DIIS subspace is restored into adiis.
+
+    Returns:
+        istep, e_corr, t1, t2
+    '''
+    with h5py.File(chkfile, 'r') as fh5:
+        grp = fh5['%s/%d' % (key, fh5[key].attrs['last'])]
+        t1 = numpy.asarray(grp['t1'])
+        t2 = numpy.asarray(grp['t2'])
+        e_corr = grp.attrs['e_corr']
+        istep = grp.attrs.get('istep', -1)
+        if adiis is not None and 'diis' in grp:
+            adiis.restore(grp['diis'])
+    return istep, e_corr, t1, t2
+
+def _require_dataset(grp, key, shape, dtype, chunks=None):
+    if key in grp and grp[key].shape != shape:
+        del(grp[key])
+    if key in grp:
+        return grp[key]
+    else:
+        return grp.create_dataset(key, shape, dtype, chunks=chunks)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+Density fitted CCSD
+
+The vvvv integrals are not stored.  The particle-particle ladder term is
+computed on the fly from the 3-index tensors (L|ab), and the ovvv integrals
+are kept in the factorized form (L|ia)(L|bc).
+'''
+
+import time
+import tempfile
+from functools import reduce
+import numpy
+import h5py
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf import df
+from pyscf.ao2mo import _ao2mo
+from pyscf.cc import ccsd
+
+
+class CCSD(ccsd.CCSD):
+    def __init__(self, mf, frozen=[], mo_energy=None, mo_coeff=None, mo_occ=None):
+        ccsd.CCSD.__init__(self, mf, frozen, mo_energy, mo_coeff, mo_occ)
+        if getattr(mf, 'with_df', None) is not None:
+            self.with_df = mf.with_df
+        else:
+            self.with_df = df.DF(mf.mol)
+            self.with_df.max_memory = self.max_memory
+            self.with_df.stdout = self.stdout
+            self.with_df.verbose = self.verbose
+        self._keys = self._keys.union(['with_df'])
+
+    def dump_flags(self):
+        ccsd.CCSD.dump_flags(self)
+        logger.info(self, 'DF-CCSD with auxbasis %s', self.with_df.auxbasis)
+        return self
+
+    def ao2mo(self, mo_coeff=None):
+        return _ERIS(self, mo_coeff)
+
+    def add_wvvVV_(self, t1, t2, eris, t2new_tril, max_memory=2000):
+        '''t2new_tril[ij,a,b] += sum_cd tau[ij,c,d] (ac|bd) for i >= j.
+        (ac|bd) are generated from eris.Lvv for a block of a at a time.
+        '''
+        time0 = time.clock(), time.time()
+        nocc, nvir = t1.shape
+        nvir_pair = nvir * (nvir+1) // 2
+        #: tau = t2 + numpy.einsum('ia,jb->ijab', t1, t1)
+        tau = numpy.empty((nocc*(nocc+1)//2,nvir,nvir))
+        p0 = 0
+        for i in range(nocc):
+            tau[p0:p0+i+1] = numpy.einsum('a,jb->jab', t1[i], t1[:i+1])
+            tau[p0:p0+i+1] += t2[i,:i+1]
+            p0 += i + 1
+        tau = tau.reshape(-1,nvir*nvir)
+        time0 = logger.timer_debug1(self, 'vvvv-tau', *time0)
+
+        naux = eris.Lvv.shape[0]
+        max_memory = max(0, max_memory - lib.current_memory()[0])
+        auxblk = min(naux, max(ccsd.BLKMIN, int(max_memory*.3e6/8/nvir_pair)))
+        # (ac|bd) in packed bd, unpacked, and transposed to (ab|cd)
+        blksize = min(nvir, max(1, int(max_memory*.6e6/8/(nvir**3*3))))
+        # idx[a,c] is the index of (ac) in the packed lower triangle
+        idx = numpy.empty((nvir,nvir), dtype=int)
+        ai, ci = numpy.tril_indices(nvir)
+        idx[ai,ci] = idx[ci,ai] = numpy.arange(nvir_pair)
+        for a0, a1 in lib.prange(0, nvir, blksize):
+            vvvv = numpy.zeros(((a1-a0)*nvir,nvir_pair))
+            for p0, p1 in lib.prange(0, naux, auxblk):
+                Lvv = numpy.asarray(eris.Lvv[p0:p1])
+                Lva = Lvv[:,idx[a0:a1]].reshape(p1-p0,-1)
+                lib.dot(Lva.T, Lvv, 1, vvvv, 1)
+                Lvv = Lva = None
+            vvvv = lib.unpack_tril(vvvv).reshape(a1-a0,nvir,nvir,nvir)
+            vvvv = vvvv.transpose(0,2,1,3).reshape((a1-a0)*nvir,-1)
+            t2new_tril[:,a0:a1] += lib.dot(tau, vvvv.T).reshape(-1,a1-a0,nvir)
+            vvvv = None
+            time0 = logger.timer_debug1(self, 'vvvv [%d:%d]'%(a0,a1), *time0)
+        return t2new_tril
+
+
+class _ERIS:
+    def __init__(self, cc, mo_coeff=None):
+        cput0 = (time.clock(), time.time())
+        moidx = numpy.ones(cc.mo_energy.size, dtype=numpy.bool)
+        if isinstance(cc.frozen, (int, numpy.integer)):
+            moidx[:cc.frozen] = False
+        elif len(cc.frozen) > 0:
+            moidx[numpy.asarray(cc.frozen)] = False
+        if mo_coeff is None:
+            self.mo_coeff = mo_coeff = cc.mo_coeff[:,moidx]
+            self.fock = numpy.diag(cc.mo_energy[moidx])
+        else:  # If mo_coeff is not canonical orbital
+            self.mo_coeff = mo_coeff = mo_coeff[:,moidx]
+            dm = cc._scf.make_rdm1(cc.mo_coeff, cc.mo_occ)
+            fockao = cc._scf.get_hcore() + cc._scf.get_veff(cc.mol, dm)
+            self.fock = reduce(numpy.dot, (mo_coeff.T, fockao, mo_coeff))
+
+        log = logger.Logger(cc.stdout, cc.verbose)
+        nocc = cc.nocc()
+        nmo = cc.nmo()
+        nvir = nmo - nocc
+        nvir_pair = nvir * (nvir+1) // 2
+        with_df = cc.with_df
+        naux = with_df.get_naoaux()
+        mem_now = lib.current_memory()[0]
+
+        Loo = numpy.empty((naux,nocc,nocc))
+        Lov = numpy.empty((naux,nocc,nvir))
+        if naux*nvir_pair*8/1e6 + mem_now < cc.max_memory*.8:
+            self.Lvv = numpy.empty((naux,nvir_pair))
+        else:
+            self._tmpfile = tempfile.NamedTemporaryFile()
+            self.feri = h5py.File(self._tmpfile.name, 'w')
+            self.Lvv = self.feri.create_dataset('Lvv', (naux,nvir_pair), 'f8')
+
+        mo = numpy.asarray(mo_coeff, order='F')
+        with df.addons.load(with_df._cderi) as feri:
+            for p0, p1 in lib.prange(0, naux, with_df.blockdim):
+                eri1 = numpy.asarray(feri[p0:p1], dtype=numpy.double, order='C')
+                Lpq = _ao2mo.nr_e2(eri1, mo, (0,nocc,0,nmo), 's2', 's1')
+                Lpq = Lpq.reshape(p1-p0,nocc,nmo)
+                Loo[p0:p1] = Lpq[:,:,:nocc]
+                Lov[p0:p1] = Lpq[:,:,nocc:]
+                self.Lvv[p0:p1] = _ao2mo.nr_e2(eri1, mo, (nocc,nmo,nocc,nmo),
+                                               's2', 's2')
+                Lpq = eri1 = None
+        cput1 = log.timer_debug1('(L|pq) transformation', *cput0)
+
+        Loo = Loo.reshape(naux,-1)
+        Lov = Lov.reshape(naux,-1)
+        self.oooo = lib.dot(Loo.T, Loo).reshape(nocc,nocc,nocc,nocc)
+        self.ooov = lib.dot(Loo.T, Lov).reshape(nocc,nocc,nocc,nvir)
+        self.ovoo = lib.dot(Lov.T, Loo).reshape(nocc,nvir,nocc,nocc)
+        self.ovov = lib.dot(Lov.T, Lov).reshape(nocc,nvir,nocc,nvir)
+        self.oovv = numpy.zeros((nocc*nocc,nvir*nvir))
+        auxblk = max(ccsd.BLKMIN, int(max(0, cc.max_memory-mem_now)*.3e6/8/nvir**2))
+        for p0, p1 in lib.prange(0, naux, auxblk):
+            Lvv = lib.unpack_tril(numpy.asarray(self.Lvv[p0:p1]))
+            lib.dot(Loo[p0:p1].T, Lvv.reshape(p1-p0,-1), 1, self.oovv, 1)
+            Lvv = None
+        self.oovv = self.oovv.reshape(nocc,nocc,nvir,nvir)
+        self.Lov = Lov.reshape(naux,nocc,nvir)
+        self.ovvv = _ovvv(self.Lov, self.Lvv)
+        self.vvvv = None
+        log.timer('DF-CCSD integral transformation', *cput0)
+
+    def __del__(self):
+        if hasattr(self, 'feri'):
+            self.feri.close()
+
+class _ovvv(object):
+    '''(ia|bc) in the layout of ccsd._ERIS.ovvv (packed bc), generated from
+    the 3-index tensors when a slice of occupied orbitals is requested.
+    '''
+    def __init__(self, Lov, Lvv):
+        self.Lov = Lov
+        self.Lvv = Lvv
+        naux, nocc, nvir = Lov.shape
+        self.shape = (nocc, nvir, nvir*(nvir+1)//2)
+
+    def __getitem__(self, key):
+        Lov = self.Lov[:,key]
+        naux = Lov.shape[0]
+        nvir_pair = self.shape[2]
+        shape = Lov.shape[1:] + (nvir_pair,)
+        Lov = Lov.reshape(naux,-1)
+        out = numpy.zeros((Lov.shape[1],nvir_pair))
+        auxblk = max(ccsd.BLKMIN, int(2e8/8/nvir_pair))
+        for p0, p1 in lib.prange(0, naux, auxblk):
+            lib.dot(Lov[p0:p1].T, numpy.asarray(self.Lvv[p0:p1]), 1, out, 1)
+        return out.reshape(shape)
+
+
+if __name__ == '__main__':
+    from pyscf import gto
+    from pyscf import scf
+
+    mol = gto.Mole()
+    mol.atom = [
+        [8 , (0. , 0.     , 0.)],
+        [1 , (0. , -0.757 , 0.587)],
+        [1 , (0. , 0.757  , 0.587)]]
+    mol.basis = 'cc-pvdz'
+    mol.build()
+    mf = scf.density_fit(scf.RHF(mol))
+    mf.kernel()
+    mcc = CCSD(mf)
+    print(mcc.kernel()[0])
@@ -47,6 +47,32 @@ class KnowValues(unittest.TestCase):
         self.assertAlmostEqual(mcc.ecc, -0.2133432312951, 8)
         self.assertAlmostEqual(abs(mcc.t2).sum(), 5.63970279799556984, 6)
 
+    def test_ccsd_restart(self):
+        import tempfile
+        ftmp = tempfile.NamedTemporaryFile()
+        mcc = cc.ccsd.CC(mf)
+        mcc.conv_tol = 1e-9
+        mcc.chkfile = ftmp.name
+        mcc.chk_cycle = 2
+        mcc.max_cycle = 5
+        mcc.kernel()
+        self.assertFalse(mcc._conv)
+        mcc = cc.ccsd.CC(mf)
+        mcc.conv_tol = 1e-9
+        mcc.restart(ftmp.name)
+        self.assertTrue(mcc._conv)
+        self.assertAlmostEqual(mcc.ecc, -0.2133432312951, 8)
+
+    def test_ccsd_chk_error(self):
+        def dump_chk(*args):
+            raise IOError('dump_chk')
+        mcc = cc.ccsd.CC(mf)
+        mcc.chkfile = 'unused'
+        mcc.chk_cycle = 1
+        mcc.max_cycle = 3
+        mcc.dump_chk = dump_chk
+        self.assertRaises(IOError, mcc.kernel)
+
     def test_ccsd_frozen(self):
         mcc = cc.ccsd.CC(mf, frozen=range(1))
         mcc.conv_tol = 1e-10
@@ -89,6 +115,38 @@ class KnowValues(unittest.TestCase):
 #        self.assertAlmostEqual(mf.energy_tot(dm1)+mycc.kernel(mo_coeff=mo1)[0],
 #                               ehf-0.21334323320620596, 8)
 
+    def test_ccsd_t(self):
+        from pyscf.cc import ccsd_t_slow
+        mcc = cc.ccsd.CC(mf)
+        mcc.conv_tol = 1e-9
+        mcc.kernel()
+        eris = mcc.ao2mo()
+        e3ref = ccsd_t_slow.kernel(mcc, eris)
+        self.assertAlmostEqual(mcc.ccsd_t(eris=eris), e3ref, 9)
+        mcc.max_memory = 1
+        self.assertAlmostEqual(mcc.ccsd_t(eris=eris), e3ref, 9)
+
+    def test_dfccsd(self):
+        from pyscf import lib
+        from pyscf import df
+        mf1 = scf.density_fit(scf.RHF(mol))
+        mf1.conv_tol_grad = 1e-8
+        mf1.kernel()
+        with df.addons.load(mf1.with_df._cderi) as feri:
+            cderi = numpy.asarray(feri)
+        mf2 = scf.RHF(mol)
+        mf2.__dict__.update(mf1.__dict__)
+        mf2._eri = lib.dot(cderi.T, cderi)
+        mcc = cc.ccsd.CC(mf2)
+        mcc.conv_tol = 1e-9
+        eref = mcc.kernel()[0]
+
+        mcc = cc.DFCCSD(mf1)
+        mcc.conv_tol = 1e-9
+        self.assertAlmostEqual(mcc.kernel()[0], eref, 7)
+        mcc.max_memory = 1
+        self.assertAlmostEqual(mcc.kernel()[0], eref, 7)
+
     def test_ccsd_lambda(self):
         mcc = cc.ccsd.CC(mf)
         mcc.conv_tol = 1e-9
@@ -7,7 +7,9 @@
 J-metric density fitting
 '''
 
+import os
 import time
+import hashlib
 import tempfile
 import numpy
 import scipy.linalg
@@ -34,6 +36,15 @@ class DF(lib.StreamObject):
         self._call_count = 0
         self.blockdim = 240
 
+# A directory to keep the Cholesky decomposed integrals.  If it is specified,
+# the integrals are saved in the directory and reused by other DF objects (in
+# the same or other processes) of the same molecule and auxiliary basis.
+        self.cderi_store = None
+# Data type (numpy.double or numpy.float32) and the HDF5 compression filter
+# (None, 'gzip' or 'lzf') of the integrals saved in cderi_store.
+        self.cderi_dtype = numpy.double
+        self.cderi_compression = None
+
     def build(self):
         t0 = (time.clock(), time.time())
         log = logger.Logger(self.stdout, self.verbose)
@@ -43,6 +54,11 @@ class DF(lib.StreamObject):
         naux = auxmol.nao_nr()
         nao_pair = nao*(nao+1)//2
 
+        if self.cderi_store:
+            self._cderi = load_cderi_store(self, auxmol, log)
+            log.timer_debug1('Load density fitting integrals', *t0)
+            return self
+
         max_memory = (self.max_memory - lib.current_memory()[0]) * .8
         if nao_pair*nao*3*8/1e6 < max_memory:
             self._cderi = incore.cholesky_eri(mol, auxmol=auxmol, verbose=log)
@@ -61,14 +77,46 @@ class DF(lib.StreamObject):
 
         return self
 
-    def loop(self):
+    def loop(self, blksize=None):
+        '''Iterate over the blocks of the Cholesky decomposed 3-index tensor.
+        The size of each block is at most blksize (default is self.blockdim).
+
+        If the tensor is stored on disk, the next block is read in a
+        background thread when the current block is yielded.  The returned
+        block is a buffer which will be overwritten by the next-next block.
+        '''
         if self._cderi is None:
             self.build()
+        if blksize is None:
+            blksize = self.blockdim
         with addons.load(self._cderi) as feri:
-            naoaux = feri.shape[0]
-            for b0, b1 in self.prange(0, naoaux, self.blockdim):
-                eri1 = numpy.asarray(feri[b0:b1], order='C')
-                yield eri1
+            naoaux, nao_pair = feri.shape
+            if isinstance(feri, numpy.ndarray):
+                for b0, b1 in self.prange(0, naoaux, blksize):
+                    yield numpy.asarray(feri[b0:b1], dtype=numpy.double,
+                                        order='C')
+            else:
+                blocks = list(self.prange(0, naoaux, blksize))
+                buf = numpy.empty((2,min(blksize,naoaux),nao_pair))
+                def load(icount):
+                    b0, b1 = blocks[icount]
+                    buf[icount%2,:b1-b0] = feri[b0:b1]
+                load(0)
+                thread_read = None
+                try:
+                    for icount, (b0, b1) in enumerate(blocks):
+                        if thread_read is not None:
+                            # join() re-raises the error of load
+                            thread, thread_read = thread_read, None
+                            thread.join()
+                        if icount+1 < len(blocks):
+                            thread_read = lib.background_thread(load, icount+1)
+                        else:
+                            thread_read = None
+                        yield buf[icount%2,:b1-b0]
+                finally:
+                    if thread_read is not None:
+                        thread_read.join()
 
     def prange(self, start, end, step):
         self._call_count += 1
@@ -87,9 +135,11 @@ class DF(lib.StreamObject):
         with addons.load(self._cderi) as feri:
             return feri.shape[0]
 
-    def get_jk(self, dm, hermi=1, vhfopt=None, with_j=True, with_k=True):
+    def get_jk(self, dm, hermi=1, vhfopt=None, with_j=True, with_k=True,
+               mo_coeff=None, mo_occ=None):
         from pyscf.df import df_jk
-        return df_jk.get_jk(self, dm, hermi, vhfopt, with_j, with_k)
+        return df_jk.get_jk(self, dm, hermi, vhfopt, with_j, with_k,
+                            mo_coeff, mo_occ)
 
     def ao2mo(self, mo_coeffs):
         from pyscf.ao2mo import _ao2mo
@@ -120,6 +170,95 @@ class DF(lib.StreamObject):
         pass
 
 
+def cderi_key(mol, auxmol):
+    '''Hash key of the Cholesky decomposed integrals of the given molecule
+    and auxiliary basis.  It is determined by the geometry and the basis sets
+    which are all stored in the _atm, _bas, _env arrays.
+    '''
+    key = hashlib.sha1()
+    for m in (mol, auxmol):
+        key.update(numpy.asarray(m._atm, dtype=numpy.int32).tobytes())
+        key.update(numpy.asarray(m._bas, dtype=numpy.int32).tobytes())
+        key.update(numpy.asarray(m._env, dtype=numpy.double).tobytes())
+    return key.hexdigest()
+
+def load_cderi_store(dfobj, auxmol, verbose=None):
+    '''Find the Cholesky decomposed integrals in the directory
+    dfobj.cderi_store.  If not found, generate the integrals and save them in
+    the directory.
+
+    The file is first written to a temporary file then renamed, so that the
+    processes which share the same directory never read incomplete files.
+
+    Returns:
+        A read-only memory-mapped array if the integrals are not compressed.
+        Otherwise the name of the HDF5 file.
+    '''
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(dfobj.stdout, dfobj.verbose)
+    mol = dfobj.mol
+    dtype = numpy.dtype(dfobj.cderi_dtype)
+    store = dfobj.cderi_store
+    if not os.path.isdir(store):
+        os.makedirs(store)
+    erifile = os.path.join(store, 'cderi-%s-%s.h5' %
+                           (cderi_key(mol, auxmol), dtype.str[1:]))
+
+    if os.path.isfile(erifile):
+        log.debug('Load DF integrals from %s', erifile)
+    else:
+        log.debug('Generate DF integrals and save them in %s', erifile)
+        nao = mol.nao_nr()
+        naux = auxmol.nao_nr()
+        nao_pair = nao*(nao+1)//2
+        max_memory = (dfobj.max_memory - lib.current_memory()[0]) * .8
+        swapfile = ftmp = None
+        success = False
+        try:
+            if nao_pair*nao*3*8/1e6 < max_memory:
+                cderi = incore.cholesky_eri(mol, auxmol=auxmol, verbose=log)
+            else:
+                swapfile = tempfile.NamedTemporaryFile(dir=store)
+                cderi = outcore.cholesky_eri(mol, swapfile.name, auxmol=auxmol,
+                                             verbose=log)
+
+            ftmp = tempfile.NamedTemporaryFile(dir=store, suffix='.h5',
+                                               delete=False)
+            ftmp.close()
+            with h5py.File(ftmp.name, 'w') as f:
+                h5d = f.create_dataset('eri_mo', (naux,nao_pair), dtype,
+                                       compression=dfobj.cderi_compression)
+                blksize = max(1, int(max(200, max_memory)*.2e6/8/nao_pair))
+                with addons.load(cderi) as feri:
+                    for b0, b1 in outcore.prange(0, naux, blksize):
+                        h5d[b0:b1] = numpy.asarray(feri[b0:b1], dtype=dtype)
+            os.rename(ftmp.name, erifile)
+            success = True
+        finally:
+            cderi = None
+            # Remove the swap file and the incomplete file on any error
+            if swapfile is not None:
+                swapfile.close()
+            if not success and ftmp is not None and os.path.isfile(ftmp.name):
+                os.remove(ftmp.name)
+
+    with h5py.File(erifile, 'r') as f:
+        h5d = f['eri_mo']
+        shape = h5d.shape
+        dtype = h5d.dtype
+        if h5d.chunks is None and h5d.compression is None:
+            offset = h5d.id.get_offset()
+        else:
+            offset = None
+    if offset is None:
+        return erifile
+    else:
+        return numpy.memmap(erifile, dtype=dtype, mode='r', offset=offset,
+                            shape=shape)
+
+
 class DF4C(DF):
     '''Relativistic 4-component'''
     def build(self):
@@ -154,7 +293,8 @@ class DF4C(DF):
                     eriss = numpy.asarray(feriss[b0:b1], order='C')
                     yield erill, eriss
 
-    def get_jk(self, dm, hermi=1, vhfopt=None, with_j=True, with_k=True):
+    def get_jk(self, dm, hermi=1, vhfopt=None, with_j=True, with_k=True,
+               mo_coeff=None, mo_occ=None):
         from pyscf.df import df_jk
         return df_jk.r_get_jk(self, dm, hermi)
 
@@ -80,13 +80,26 @@ def density_fit(mf, auxbasis='weigend+etb', with_df=None):
             self.auxbasis = auxbasis
             self.direct_scf = False
             self.with_df = with_df
+            self._dm_orbs = None
             self._keys = self._keys.union(['auxbasis', 'with_df'])
 
+        def make_rdm1(self, mo_coeff=None, mo_occ=None):
+            if mo_coeff is None: mo_coeff = self.mo_coeff
+            if mo_occ is None: mo_occ = self.mo_occ
+            dm = mf_class.make_rdm1(self, mo_coeff, mo_occ)
+# Keep the orbitals of the density matrix.  When this density matrix is passed
+# to get_jk, the K matrix is computed with the orbitals directly and the
+# eigen-decomposition of the density matrix is skipped.
+            self._dm_orbs = (dm, mo_coeff, mo_occ)
+            return dm
+
         def get_jk(self, mol=None, dm=None, hermi=1):
             if self.with_df:
                 if mol is None: mol = self.mol
                 if dm is None: dm = self.make_rdm1()
-                return self.with_df.get_jk(dm, hermi)
+                mo_coeff, mo_occ = _dm_orbitals(self, dm, hermi)
+                return self.with_df.get_jk(dm, hermi, mo_coeff=mo_coeff,
+                                           mo_occ=mo_occ)
             else:
                 return mf_class.get_jk(self, mol, dm, hermi)
 
@@ -102,7 +115,9 @@ def density_fit(mf, auxbasis='weigend+etb', with_df=None):
             if self.with_df:
                 if mol is None: mol = self.mol
                 if dm is None: dm = self.make_rdm1()
-                return self.with_df.get_jk(dm, hermi, with_j=False)[1]
+                mo_coeff, mo_occ = _dm_orbitals(self, dm, hermi)
+                return self.with_df.get_jk(dm, hermi, with_j=False,
+                                           mo_coeff=mo_coeff, mo_occ=mo_occ)[1]
             else:
                 return mf_class.get_k(self, mol, dm, hermi)
 
@@ -125,8 +140,35 @@ def density_fit(mf, auxbasis='weigend+etb', with_df=None):
 
     return DFHF()
 
+def _dm_orbitals(mf, dm, hermi=1):
+    '''The orbitals and occupancies which generate the density matrix dm, if
+    dm was produced by mf.make_rdm1.  Only the RHF-like (2D dm) and the
+    UHF-like (a pair of dm) density matrices are recognized.
+    '''
+    if hermi != 1 or mf._dm_orbs is None or dm is not mf._dm_orbs[0]:
+        return None, None
+    mo_coeff, mo_occ = mf._dm_orbs[1:]
+    if numpy.ndim(dm) == numpy.ndim(mo_occ) + 1:
+        return mo_coeff, mo_occ
+    else:
+        return None, None
+
+
+def get_jk(dfobj, dms, hermi=1, vhfopt=None, with_j=True, with_k=True,
+           mo_coeff=None, mo_occ=None):
+    '''J and K matrices of density fitting.  The contributions of all density
+    matrices are evaluated together for each block of the 3-index tensor:
+    one GEMM for the Coulomb matrices of all density matrices and one
+    half-transformation for the exchange matrices of all density matrices.
+    The size of the blocks are determined by dfobj.max_memory.
 
-def get_jk(dfobj, dms, hermi=1, vhfopt=None, with_j=True, with_k=True):
+    Kwargs:
+        mo_coeff, mo_occ : ndarray
+            Orbitals and occupancies which generate the density matrices,
+            dms[k] = (mo_coeff[k]*mo_occ[k]).dot(mo_coeff[k].T).  If given,
+            K matrices (hermi=1) are computed with the occupied orbitals
+            and the eigen-decomposition of the density matrices is skipped.
+    '''
     t0 = t1 = (time.clock(), time.time())
     log = logger.Logger(dfobj.stdout, dfobj.verbose)
 
@@ -138,6 +180,7 @@ def get_jk(dfobj, dms, hermi=1, vhfopt=None, with_j=True, with_k=True):
     else:
         nset = len(dms)
     nao = dms[0].shape[0]
+    naoaux = dfobj.get_naoaux()
 
     fmmm = _ri.libri.RIhalfmmm_nr_s2_bra
     fdrv = _ao2mo.libao2mo.AO2MOnr_e2_drv
@@ -149,96 +192,234 @@ def get_jk(dfobj, dms, hermi=1, vhfopt=None, with_j=True, with_k=True):
 
     #:vj = reduce(numpy.dot, (cderi.reshape(-1,nao*nao), dm.reshape(-1),
     #:                        cderi.reshape(-1,nao*nao))).reshape(nao,nao)
+    # (L|ij) is symmetric in ij, dmtril works for arbitrary density matrices
+    if with_j:
+        i = numpy.arange(nao)
+        dmtril = numpy.empty((nset,nao*(nao+1)//2))
+        for k, dm in enumerate(dms):
+            dmtril[k] = pyscf.lib.pack_tril(dm+dm.T)
+            dmtril[k,i*(i+1)//2+i] *= .5
+        vjtril = numpy.zeros((nset,nao*(nao+1)//2))
+
     if hermi == 1: # and numpy.einsum('ij,ij->', dm, ovlp) > 0.1
 # I cannot assume dm is positive definite because it might be the density
 # matrix difference when the mf.direct_scf flag is set.
-        dmtril = []
-        cpos = []
-        cneg = []
-        for k, dm in enumerate(dms):
-            if with_j:
-                dmtril.append(pyscf.lib.pack_tril(dm+dm.T))
-                i = numpy.arange(nao)
-                dmtril[k][i*(i+1)//2+i] *= .5
-
-            if with_k:
-                e, c = scipy.linalg.eigh(dm)
+        # The decomposed orbitals of all density matrices are put in one
+        # array.  vk[k] = sum over cols[k] with sign[k]
+        orbs = []
+        cols = []
+        signs = []
+        p0 = 0
+        if with_k:
+            if mo_coeff is not None:
+                mo_coeff = numpy.asarray(mo_coeff).reshape(nset,nao,-1)
+                mo_occ = numpy.asarray(mo_occ, dtype=float).reshape(nset,-1)
+            for k, dm in enumerate(dms):
+                if mo_coeff is None:
+                    e, c = scipy.linalg.eigh(dm)
+                else:
+                    e, c = mo_occ[k], mo_coeff[k]
                 pos = e > OCCDROP
                 neg = e < -OCCDROP
 
                 #:vk = numpy.einsum('pij,jk->kpi', cderi, c[:,abs(e)>OCCDROP])
                 #:vk = numpy.einsum('kpi,kpj->ij', vk, vk)
-                tmp = numpy.einsum('ij,j->ij', c[:,pos], numpy.sqrt(e[pos]))
-                cpos.append(numpy.asarray(tmp, order='F'))
-                tmp = numpy.einsum('ij,j->ij', c[:,neg], numpy.sqrt(-e[neg]))
-                cneg.append(numpy.asarray(tmp, order='F'))
-        buf = numpy.empty((dfobj.blockdim*nao,nao))
-        for eri1 in dfobj.loop():
+                for idx, sign in ((pos, 1), (neg, -1)):
+                    if numpy.any(idx):
+                        orbs.append(c[:,idx] * numpy.sqrt(abs(e[idx])))
+                        cols.append((k, p0, p0+orbs[-1].shape[1]))
+                        signs.append(sign)
+                        p0 += orbs[-1].shape[1]
+        norb = p0
+        if norb > 0:
+            orbs = numpy.asarray(numpy.hstack(orbs), order='F')
+
+        max_memory = max(2000, dfobj.max_memory-pyscf.lib.current_memory()[0])
+        # cderi block and its prefetch buffer, half-transformed block and
+        # a copy for the non-contiguous slices
+        blksize = max(4, int(max_memory*.8e6/8/(nao**2 + norb*nao*2)))
+        blksize = min(naoaux, blksize)
+        buf = numpy.empty((blksize*norb*nao))
+        for eri1 in dfobj.loop(blksize):
             naux, nao_pair = eri1.shape
             assert(nao_pair == nao*(nao+1)//2)
-            for k in range(nset):
-                if with_j:
-                    buf1 = reduce(numpy.dot, (eri1, dmtril[k], eri1))
-                    vj[k] += pyscf.lib.unpack_tril(buf1, hermi)
-                if with_k and cpos[k].shape[1] > 0:
-                    buf1 = buf[:naux*cpos[k].shape[1]]
-                    fdrv(ftrans, fmmm,
-                         buf1.ctypes.data_as(ctypes.c_void_p),
-                         eri1.ctypes.data_as(ctypes.c_void_p),
-                         cpos[k].ctypes.data_as(ctypes.c_void_p),
-                         ctypes.c_int(naux), ctypes.c_int(nao),
-                         ctypes.c_int(0), ctypes.c_int(cpos[k].shape[1]),
-                         ctypes.c_int(0), ctypes.c_int(0), null, ctypes.c_int(0))
-                    vk[k] += pyscf.lib.dot(buf1.T, buf1)
-                if with_k and cneg[k].shape[1] > 0:
-                    buf1 = buf[:naux*cneg[k].shape[1]]
-                    fdrv(ftrans, fmmm,
-                         buf1.ctypes.data_as(ctypes.c_void_p),
-                         eri1.ctypes.data_as(ctypes.c_void_p),
-                         cneg[k].ctypes.data_as(ctypes.c_void_p),
-                         ctypes.c_int(naux), ctypes.c_int(nao),
-                         ctypes.c_int(0), ctypes.c_int(cneg[k].shape[1]),
-                         ctypes.c_int(0), ctypes.c_int(0), null, ctypes.c_int(0))
-                    vk[k] -= pyscf.lib.dot(buf1.T, buf1)
+            if with_j:
+                rho = numpy.dot(eri1, dmtril.T)
+                vjtril += pyscf.lib.dot(rho.T, eri1)
+            if norb > 0:
+                buf1 = buf[:naux*norb*nao].reshape(naux,norb,nao)
+                fdrv(ftrans, fmmm,
+                     buf1.ctypes.data_as(ctypes.c_void_p),
+                     eri1.ctypes.data_as(ctypes.c_void_p),
+                     orbs.ctypes.data_as(ctypes.c_void_p),
+                     ctypes.c_int(naux), ctypes.c_int(nao),
+                     ctypes.c_int(0), ctypes.c_int(norb),
+                     ctypes.c_int(0), ctypes.c_int(0), null, ctypes.c_int(0))
+                for (k, c0, c1), sign in zip(cols, signs):
+                    buf2 = buf1[:,c0:c1].reshape(-1,nao)
+                    pyscf.lib.dot(buf2.T, buf2, sign, vk[k], 1)
             t1 = log.timer_debug1('jk', *t1)
     else:
         #:vk = numpy.einsum('pij,jk->pki', cderi, dm)
         #:vk = numpy.einsum('pki,pkj->ij', cderi, vk)
         fcopy = _ri.libri.RImmm_nr_s2_copy
         rargs = (ctypes.c_int(nao),
-                 ctypes.c_int(0), ctypes.c_int(nao),
+                 ctypes.c_int(0), ctypes.c_int(nset*nao),
                  ctypes.c_int(0), ctypes.c_int(0), null, ctypes.c_int(0))
-        dms = [numpy.asarray(dm, order='F') for dm in dms]
-        buf = numpy.empty((2,dfobj.blockdim,nao,nao))
-        for eri1 in dfobj.loop():
+        max_memory = max(2000, dfobj.max_memory-pyscf.lib.current_memory()[0])
+        if with_k:
+            # All density matrices are transformed in one call
+            dms = numpy.asarray(numpy.hstack(dms), order='F')
+            blksize = max(4, int(max_memory*.8e6/8/(nao**2*(nset+3))))
+            blksize = min(naoaux, blksize)
+            buf = numpy.empty((blksize*nao*nao*(nset+1)))
+        else:
+            # cderi block and its prefetch buffer
+            blksize = max(4, int(max_memory*.8e6/8/(nao**2)))
+            blksize = min(naoaux, blksize)
+        for eri1 in dfobj.loop(blksize):
             naux, nao_pair = eri1.shape
-            for k in range(nset):
-                buf1 = buf[0,:naux]
+            if with_j:
+                rho = numpy.dot(eri1, dmtril.T)
+                vjtril += pyscf.lib.dot(rho.T, eri1)
+
+            if with_k:
+                buf1 = buf[:naux*nset*nao*nao].reshape(naux,nset,nao,nao)
                 fdrv(ftrans, fmmm,
                      buf1.ctypes.data_as(ctypes.c_void_p),
                      eri1.ctypes.data_as(ctypes.c_void_p),
-                     dms[k].ctypes.data_as(ctypes.c_void_p),
+                     dms.ctypes.data_as(ctypes.c_void_p),
                      ctypes.c_int(naux), *rargs)
-                rho = numpy.einsum('kii->k', buf1)
-                vj[k] += pyscf.lib.unpack_tril(numpy.dot(rho, eri1), 1)
-
-                if with_k:
-                    buf2 = buf[1,:naux]
-                    fdrv(ftrans, fcopy,
-                         buf2.ctypes.data_as(ctypes.c_void_p),
-                         eri1.ctypes.data_as(ctypes.c_void_p),
-                         dms[k].ctypes.data_as(ctypes.c_void_p),
-                         ctypes.c_int(naux), *rargs)
-                    vk[k] += pyscf.lib.dot(buf1.reshape(-1,nao).T,
-                                           buf2.reshape(-1,nao))
+                buf2 = buf[naux*nset*nao*nao:naux*(nset+1)*nao*nao]
+                buf2 = buf2.reshape(naux,nao,nao)
+                fdrv(ftrans, fcopy,
+                     buf2.ctypes.data_as(ctypes.c_void_p),
+                     eri1.ctypes.data_as(ctypes.c_void_p),
+                     null, ctypes.c_int(naux), ctypes.c_int(nao),
+                     ctypes.c_int(0), ctypes.c_int(nao),
+                     ctypes.c_int(0), ctypes.c_int(0), null, ctypes.c_int(0))
+                buf2 = buf2.reshape(-1,nao)
+                for k in range(nset):
+                    pyscf.lib.dot(buf1[:,k].reshape(-1,nao).T, buf2, 1, vk[k], 1)
             t1 = log.timer_debug1('jk', *t1)
 
-    if len(dms) == 1:
+    if with_j:
+        for k in range(nset):
+            vj[k] = pyscf.lib.unpack_tril(vjtril[k], 1)
+    if nset == 1:
         vj = vj[0]
         vk = vk[0]
     logger.timer(dfobj, 'vj and vk', *t0)
     return vj, vk
 
+def gen_jk_ov(dfobj, orbos):
+    '''Generate a function to compute the J and K matrices of the density
+    matrices of occupied-virtual orbital rotations, which are the first order
+    density matrices in the orbital Hessian of SCF
+
+        dm[k] = orbv[k].dot(orbo[k].T) + orbo[k].dot(orbv[k].T)
+
+    The half-transformed 3-index tensor (L|i nu) of the occupied orbitals orbo
+    does not change in the micro iterations of the second order SCF solver.
+    It is computed once and held in memory if it fits in dfobj.max_memory.
+    Otherwise it is regenerated in every call.
+
+    Args:
+        orbos : a list of 2D arrays
+            Occupied orbitals for each density matrix
+
+    Returns:
+        A function jk_ov(orbvs, with_j=True, with_k=True) which returns the J
+        and K matrices with shape (len(orbos),nao,nao).  orbvs[k] has the
+        same shape as orbos[k].
+    '''
+    log = logger.Logger(dfobj.stdout, dfobj.verbose)
+    nset = len(orbos)
+    nao = orbos[0].shape[0]
+    noccs = numpy.cumsum([0] + [orbo.shape[1] for orbo in orbos])
+    nocc = noccs[-1]
+    orbo = numpy.asarray(numpy.hstack(orbos), order='F')
+    naoaux = dfobj.get_naoaux()
+
+    fmmm = _ri.libri.RIhalfmmm_nr_s2_bra
+    fdrv = _ao2mo.libao2mo.AO2MOnr_e2_drv
+    ftrans = _ao2mo.libao2mo.AO2MOtranse2_nr_s2
+    null = pyscf.lib.c_null_ptr()
+    def half_trans(eri1, orbs):
+        naux = eri1.shape[0]
+        norb = orbs.shape[1]
+        buf = numpy.empty((naux,norb,nao))
+        fdrv(ftrans, fmmm,
+             buf.ctypes.data_as(ctypes.c_void_p),
+             eri1.ctypes.data_as(ctypes.c_void_p),
+             orbs.ctypes.data_as(ctypes.c_void_p),
+             ctypes.c_int(naux), ctypes.c_int(nao),
+             ctypes.c_int(0), ctypes.c_int(norb),
+             ctypes.c_int(0), ctypes.c_int(0), null, ctypes.c_int(0))
+        return buf
+
+    max_memory = max(2000, dfobj.max_memory-pyscf.lib.current_memory()[0])
+    blksize = max(4, int(max_memory*.5e6/8/(nao**2 + nocc*nao*4)))
+    blksize = min(naoaux, blksize)
+    # The cached blocks are indexed by their offsets.  dfobj.loop does not
+    # tell the offsets and it may change the order of the blocks.
+    def loop_cderi():
+        with df.addons.load(dfobj._cderi) as feri:
+            for b0, b1 in dfobj.prange(0, naoaux, blksize):
+                yield b0, numpy.asarray(feri[b0:b1], dtype=numpy.double,
+                                        order='C')
+
+    if naoaux*nocc*nao*8/1e6 < max_memory*.4:
+        t0 = (time.clock(), time.time())
+        ocache = dict([(b0, half_trans(eri1, orbo))
+                       for b0, eri1 in loop_cderi()])
+        log.timer_debug1('(L|i nu) of occupied orbitals', *t0)
+    else:
+        ocache = None
+        log.debug1('Not enough memory to cache (L|i nu) of occupied orbitals')
+
+    def jk_ov(orbvs, with_j=True, with_k=True):
+        t0 = (time.clock(), time.time())
+        vj = numpy.zeros((nset,nao,nao))
+        vk = numpy.zeros((nset,nao,nao))
+        if with_j:
+            i = numpy.arange(nao)
+            dmtril = numpy.empty((nset,nao*(nao+1)//2))
+            for k in range(nset):
+                dm = numpy.dot(orbvs[k], orbos[k].T)
+                dm = dm + dm.T
+                dmtril[k] = pyscf.lib.pack_tril(dm+dm.T)
+                dmtril[k,i*(i+1)//2+i] *= .5
+            vjtril = numpy.zeros((nset,nao*(nao+1)//2))
+        if with_k:
+            orbv = numpy.asarray(numpy.hstack(orbvs), order='F')
+            if ocache is None:
+                orbv = numpy.asarray(numpy.hstack((orbv, orbo)), order='F')
+
+        for b0, eri1 in loop_cderi():
+            if with_j:
+                rho = numpy.dot(eri1, dmtril.T)
+                vjtril += pyscf.lib.dot(rho.T, eri1)
+            if with_k:
+                buf = half_trans(eri1, orbv)
+                if ocache is None:
+                    bufv, bufo = buf[:,:nocc], buf[:,nocc:]
+                else:
+                    bufv, bufo = buf, ocache[b0]
+                for k in range(nset):
+                    p0, p1 = noccs[k], noccs[k+1]
+                    pyscf.lib.dot(bufv[:,p0:p1].reshape(-1,nao).T,
+                                  bufo[:,p0:p1].reshape(-1,nao), 1, vk[k], 1)
+
+        for k in range(nset):
+            if with_j:
+                vj[k] = pyscf.lib.unpack_tril(vjtril[k], 1)
+            if with_k:
+                vk[k] = vk[k] + vk[k].T
+        log.timer_debug1('vj and vk of orbital rotations', *t0)
+        return vj, vk
+    return jk_ov
+
 
 def r_get_jk(dfobj, dms, hermi=1):
     '''Relativistic density fitting JK'''
@@ -4,6 +4,7 @@
 
 import unittest
 import tempfile
+import shutil
 import numpy
 import scipy.linalg
 import h5py
@@ -203,6 +204,33 @@ class KnowValues(unittest.TestCase):
         mo_eri1 = dfobj.ao2mo(mos)
         self.assertTrue(numpy.allclose(mo_eri0, mo_eri1))
 
+    def test_cderi_store(self):
+        store = tempfile.mkdtemp()
+        try:
+            ref = df.incore.cholesky_eri(mol)
+            mydf = df.DF(mol)
+            mydf.cderi_store = store
+            mydf.build()
+            self.assertTrue(isinstance(mydf._cderi, numpy.memmap))
+            self.assertTrue(numpy.allclose(mydf._cderi, ref))
+
+            mydf1 = df.DF(mol)
+            mydf1.cderi_store = store
+            mydf1.build()
+            self.assertEqual(mydf1._cderi.filename, mydf._cderi.filename)
+
+            mydf.cderi_dtype = numpy.float32
+            mydf.cderi_compression = 'gzip'
+            mydf.build()
+            self.assertTrue(isinstance(mydf._cderi, str))
+            v = 0
+            for eri1 in mydf.loop(50):
+                self.assertEqual(eri1.dtype, numpy.double)
+                v = v + eri1.sum(axis=0)
+            self.assertTrue(numpy.allclose(v, ref.sum(axis=0), atol=1e-4))
+        finally:
+            shutil.rmtree(store)
+
 
 if __name__ == "__main__":
     print("Full Tests for df")
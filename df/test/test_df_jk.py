@@ -8,6 +8,7 @@ import scipy.linalg
 from pyscf import lib
 from pyscf import gto
 from pyscf import scf
+from pyscf import df
 from pyscf.df import df_jk
 
 mol = gto.M(
@@ -95,6 +96,72 @@ class KnowValues(unittest.TestCase):
         vhf0 = vj1 - vk1 * .5
         self.assertTrue(numpy.allclose(vhf0, vhf1))
 
+    def test_get_jk_hermi1(self):
+        nao = mol.nao_nr()
+        numpy.random.seed(1)
+        dm = numpy.random.random((3,nao,nao)) - .5
+        dm = dm + dm.transpose(0,2,1)
+        mf = scf.density_fit(scf.RHF(mol))
+        vj0, vk0 = df_jk.get_jk(mf.with_df, dm, 0)
+        vj1, vk1 = df_jk.get_jk(mf.with_df, dm, 1)
+        self.assertTrue(numpy.allclose(vj0, vj1))
+        self.assertTrue(numpy.allclose(vk0, vk1))
+        vj1, vk1 = df_jk.get_jk(mf.with_df, dm[1], 1)
+        self.assertTrue(numpy.allclose(vj0[1], vj1))
+        self.assertTrue(numpy.allclose(vk0[1], vk1))
+
+    def test_get_jk_mo_coeff(self):
+        nao = mol.nao_nr()
+        numpy.random.seed(1)
+        mo = numpy.random.random((2,nao,nao))
+        mo_occ = numpy.zeros((2,nao))
+        mo_occ[0,:5] = 1
+        mo_occ[1,:4] = 1
+        dm = numpy.einsum('xpi,xi,xqi->xpq', mo, mo_occ, mo)
+        mydf = df.DF(mol)
+        vj0, vk0 = df_jk.get_jk(mydf, dm, 1)
+        vj1, vk1 = df_jk.get_jk(mydf, dm, 1, mo_coeff=mo, mo_occ=mo_occ)
+        self.assertTrue(numpy.allclose(vj0, vj1))
+        self.assertTrue(numpy.allclose(vk0, vk1))
+
+        mf = scf.density_fit(scf.UHF(mol))
+        dm = mf.make_rdm1(mo, mo_occ)
+        self.assertTrue(df_jk._dm_orbitals(mf, dm)[0] is mo)
+        self.assertTrue(df_jk._dm_orbitals(mf, dm.copy())[0] is None)
+        vj1, vk1 = mf.get_jk(mol, dm)
+        self.assertTrue(numpy.allclose(vj0, vj1))
+        self.assertTrue(numpy.allclose(vk0, vk1))
+
+    def test_gen_jk_ov(self):
+        nao = mol.nao_nr()
+        numpy.random.seed(1)
+        orbo = numpy.random.random((2,nao,5))
+        orbv = numpy.random.random((2,nao,5))
+        dm = numpy.einsum('xpi,xqi->xpq', orbv, orbo)
+        dm = dm + dm.transpose(0,2,1)
+        mydf = df.DF(mol)
+        vj0, vk0 = df_jk.get_jk(mydf, dm, 1)
+        jk_ov = df_jk.gen_jk_ov(mydf, orbo)
+        vj1, vk1 = jk_ov(orbv)
+        self.assertTrue(numpy.allclose(vj0, vj1))
+        self.assertTrue(numpy.allclose(vk0, vk1))
+        vj1, vk1 = jk_ov(orbv)
+        self.assertTrue(numpy.allclose(vk0, vk1))
+
+    def test_loop_outcore(self):
+        mydf = df.DF(mol)
+        mydf.max_memory = 0
+        mydf.build()
+        self.assertTrue(isinstance(mydf._cderi, str))
+        with df.addons.load(mydf._cderi) as feri:
+            ref = numpy.asarray(feri).sum(axis=0)
+        for blksize in (7, 50):
+            v = 0
+            for eri1 in mydf.loop(blksize):
+                self.assertTrue(eri1.shape[0] <= blksize)
+                v = v + eri1.sum(axis=0)
+            self.assertTrue(numpy.allclose(v, ref))
+
     def test_uhf_veff(self):
         mf = scf.density_fit(scf.UHF(mol))
         nao = mol.nao_nr()
@@ -14,13 +14,23 @@ Reference for Lebedev-Laikov grid:
 
 import ctypes
 import numpy
+import scipy.spatial
 import pyscf.lib
 from pyscf.lib import logger
 from pyscf import gto
+from pyscf import symm
 from pyscf.dft import radi
 
 libdft = pyscf.lib.load_library('libdft')
 
+# The edge length (in Bohr) of the boxes to group the grids
+GROUP_BOX_SIZE = 1.2
+
+# Atomic grids (wrt the atom center) are cached and shared by all molecules.
+# The key is (nuclear charge, n_rad, n_ang, radi_method, prune).
+_atomic_grids_cache = {}
+ATOMIC_GRIDS_CACHE_SIZE = 64
+
 # ~= (L+1)**2/3
 LEBEDEV_ORDER = {
       0:    1,
@@ -215,7 +225,9 @@ def gen_atomic_grids(mol, atom_grid={}, radi_method=radi.gauss_chebyshev,
     Returns:
         A dict, with the atom symbol for the dict key.  For each atom type,
         the dict value has two items: one is the meshgrid coordinates wrt the
-        atom center; the second is the volume of that grid.
+        atom center; the second is the volume of that grid.  The grids are
+        cached (see _atomic_grids_cache) and the returned arrays are
+        read-only.
     '''
     atom_grids_tab = {}
     for ia in range(mol.natm):
@@ -233,6 +245,12 @@ def gen_atomic_grids(mol, atom_grid={}, radi_method=radi.gauss_chebyshev,
             else:
                 n_rad = _default_rad(chg, level)
                 n_ang = _default_ang(chg, level)
+
+            key = (chg, n_rad, n_ang, radi_method, prune)
+            if key in _atomic_grids_cache:
+                atom_grids_tab[symb] = _atomic_grids_cache[key]
+                continue
+
             rad, dr = radi_method(n_rad)
             rad_weight = 4*numpy.pi * rad*rad * dr
             # atomic_scale = 1
@@ -259,7 +277,14 @@ def gen_atomic_grids(mol, atom_grid={}, radi_method=radi.gauss_chebyshev,
                                                grid[:,:3]).reshape(-1,3))
                     vol.append(numpy.einsum('i,j->ji', rad_weight[idx[i0:i1]],
                                             grid[:,3]).ravel())
-            atom_grids_tab[symb] = (numpy.vstack(coords), numpy.hstack(vol))
+            coords = numpy.vstack(coords)
+            vol = numpy.hstack(vol)
+            coords.flags.writeable = False
+            vol.flags.writeable = False
+            atom_grids_tab[symb] = (coords, vol)
+            if len(_atomic_grids_cache) >= ATOMIC_GRIDS_CACHE_SIZE:
+                _atomic_grids_cache.clear()
+            _atomic_grids_cache[key] = (coords, vol)
     return atom_grids_tab
 
 
@@ -332,6 +357,98 @@ def gen_partition(mol, atom_grids_tab,
 
 
 
+def arg_group_grids(coords, box_size=GROUP_BOX_SIZE):
+    '''Partition the space into cubic boxes and group the grids of the same
+    box.  The boxes are ordered along x, y, z.  After sorting, the grids in
+    one block of numint.BLKSIZE are close to each other.  Most AO functions
+    vanish on the entire block and are screened out by numint.make_mask.
+
+    Returns:
+        The indices to sort the grids
+    '''
+    coords = numpy.asarray(coords)
+    if coords.shape[0] == 0:
+        return numpy.arange(0)
+    ibox = numpy.asarray((coords - coords.min(axis=0)) / box_size,
+                         dtype=numpy.int64)
+    nbox = ibox.max(axis=0) + 1
+    box_id = (ibox[:,0] * nbox[1] + ibox[:,1]) * nbox[2] + ibox[:,2]
+    return numpy.argsort(box_id, kind='mergesort')
+
+
+def _symm_grids_ops(groupname):
+    '''Sign changes of (x,y,z) of the symmetry operations of the given
+    (D2h subgroup) point group'''
+    if groupname == 'Dooh':
+        groupname = 'D2h'
+    elif groupname == 'Coov':
+        groupname = 'C2v'
+    opdic = symm.geom.symm_ops(groupname)
+    return numpy.array([numpy.diag(opdic[op] * numpy.eye(3))
+                        for op in symm.param.OPERATOR_TABLE[groupname]])
+
+def _symm_grids_images(coords, op, tol):
+    '''Index of the image of each grid under the sign change op'''
+    ngrids = len(coords)
+    if ngrids == 0:
+        return numpy.zeros(0, dtype=int)
+    # The nearest grid of each image.  Grids on the innermost radial shells
+    # can be closer to each other than tol.  The nearest one is taken for
+    # them and the mapping is checked to be an involution, as op is.
+    tree = scipy.spatial.cKDTree(coords)
+    dist, images = tree.query(coords*op, p=numpy.inf)
+    missing = dist > tol
+    if missing.any():
+        raise RuntimeError('Symmetry image of grid %s not found.  The '
+                           'grids are not symmetric.' % coords[missing][0])
+    mismatch = images[images] != numpy.arange(ngrids)
+    if mismatch.any():
+        raise RuntimeError('Symmetry image of grid %s is not unique within '
+                           'tol %g.' % (coords[mismatch][0], tol))
+    return images
+
+def symm_grids_orbits(mol, coords, tol=symm.geom.TOLERANCE):
+    '''Orbits of the symmetry-equivalent grids.  Each grid is labelled by
+    the smallest index of the grids in its orbit.  RuntimeError is raised if
+    the grids are not symmetric.
+    '''
+    ops = _symm_grids_ops(mol.groupname)
+    coords = numpy.asarray(coords)
+    orbit_id = numpy.arange(len(coords))
+    for op in ops:
+        orbit_id = numpy.minimum(orbit_id, _symm_grids_images(coords, op, tol))
+    return orbit_id
+
+def _sum_orbits(coords, weights, orbit_id):
+    ngrids = len(orbit_id)
+    keep = orbit_id == numpy.arange(ngrids)
+    weights = numpy.bincount(orbit_id, weights, minlength=ngrids)
+    return coords[keep], weights[keep]
+
+def symm_reduce_grids(mol, coords, weights, tol=symm.geom.TOLERANCE):
+    '''Symmetry-unique grids of the point group of mol.  Each grid is mapped
+    to its images of the symmetry operations.  For each orbit of the
+    symmetry-equivalent grids, only one grid is kept and its weight is the
+    sum of the weights of the orbit.  The integral of any totally symmetric
+    function on the reduced grids equals to the integral on the full grids.
+
+    Args:
+        mol : an instance of :class:`Mole`, with mol.symmetry enabled
+
+    Kwargs:
+        tol : float
+            Two grids are equivalent if their coordinates differ less than
+            tol.  The default is the tolerance of the symmetry detection of
+            the geometry.
+
+    Returns:
+        coords, weights of the symmetry-unique grids
+    '''
+    coords = numpy.asarray(coords)
+    orbit_id = symm_grids_orbits(mol, coords, tol)
+    return _sum_orbits(coords, weights, orbit_id)
+
+
 class Grids(pyscf.lib.StreamObject):
     '''DFT mesh grids
 
@@ -370,7 +487,10 @@ class Grids(pyscf.lib.StreamObject):
             | None : to switch off grid pruning
 
         symmetry : bool
-            whether to symmetrize mesh grids (TODO)
+            whether to generate the symmetry-unique grids (see
+            :func:`symm_reduce_grids`) in addition to the full grids.  The
+            XC potential of symmetric densities is evaluated on the reduced
+            grids then symmetrized in the SO basis.  Default is False.
 
         atom_grid : dict
             Set (radial, angular) grids for particular atoms.
@@ -406,13 +526,18 @@ class Grids(pyscf.lib.StreamObject):
         self.becke_scheme = original_becke
         self.level = 3
         self.prune = nwchem_prune
-        self.symmetry = mol.symmetry
+        self.symmetry = False
         self.atom_grid = {}
+        # Grids whose weights are smaller than weight_cutoff are removed
+        self.weight_cutoff = 0
 
 ##################################################
 # don't modify the following attributes, they are not input options
         self.coords  = None
         self.weights = None
+        self.symm_coords  = None
+        self.symm_weights = None
+        self._symm_grids_src = None
         self._keys = set(self.__dict__.keys())
 
     def dump_flags(self):
@@ -421,6 +546,8 @@ class Grids(pyscf.lib.StreamObject):
         logger.info(self, 'pruning grids: %s', self.prune)
         logger.info(self, 'grids dens level: %d', self.level)
         logger.info(self, 'symmetrized grids: %d', self.symmetry)
+        if self.weight_cutoff:
+            logger.info(self, 'weight_cutoff = %g', self.weight_cutoff)
         if self.radii_adjust is not None:
             logger.info(self, 'atomic radii adjust function: %s',
                         self.radii_adjust)
@@ -429,7 +556,15 @@ class Grids(pyscf.lib.StreamObject):
             logger.info(self, 'User specified grid scheme %s', str(self.atom_grid))
         return self
 
-    def build(self, mol=None):
+    def build(self, mol=None, sort_grids=True):
+        '''Generate grids and weights.  If sort_grids is set, the grids are
+        grouped in small boxes (see :func:`arg_group_grids`) to improve the
+        AO screening in numerical integration.
+
+        The atomic grids are cached in gen_atomic_grids.  When only the
+        geometry is changed, e.g. in geometry optimization or scanning,
+        only the Becke partitioning is recomputed.
+        '''
         if mol is None: mol = self.mol
         if self.verbose >= logger.WARN:
             self.check_sanity()
@@ -440,8 +575,73 @@ class Grids(pyscf.lib.StreamObject):
                 self.gen_partition(mol, atom_grids_tab,
                                    self.radii_adjust, self.atomic_radii,
                                    self.becke_scheme)
+        if self.weight_cutoff:
+            idx = self.weights > self.weight_cutoff
+            logger.debug(self, 'Drop %d grids of small weights',
+                         self.weights.size - numpy.count_nonzero(idx))
+            self.coords = self.coords[idx]
+            self.weights = self.weights[idx]
+        if sort_grids:
+            idx = arg_group_grids(self.coords)
+            self.coords = self.coords[idx]
+            self.weights = self.weights[idx]
         pyscf.lib.logger.info(self, 'tot grids = %d', len(self.weights))
+        self.reduce_symm(mol)
         return self.coords, self.weights
+
+    def reduce_symm(self, mol=None):
+        '''Generate the symmetry-unique grids self.symm_coords and
+        self.symm_weights from self.coords and self.weights.  They are
+        required to be regenerated whenever self.coords is changed, see
+        :meth:`get_symm_grids`.  If self.coords are not symmetric, a warning is
+        printed and the symmetry-unique grids are not generated.
+        '''
+        if mol is None: mol = self.mol
+        self.symm_coords = self.symm_weights = None
+        self._symm_grids_src = None
+        if (self.symmetry and mol.symmetry and mol.groupname != 'C1' and
+            self.coords is not None):
+            try:
+                orbit_id = symm_grids_orbits(mol, self.coords)
+            except RuntimeError as e:
+                logger.warn(self, 'Symmetry-unique grids are not used.  %s', e)
+                return self
+            self.symm_coords, self.symm_weights = \
+                    _sum_orbits(self.coords, self.weights, orbit_id)
+            self._symm_grids_src = (self.coords, self.weights, orbit_id)
+            if self.symm_weights.size > 0:
+                idx = arg_group_grids(self.symm_coords)
+                self.symm_coords = self.symm_coords[idx]
+                self.symm_weights = self.symm_weights[idx]
+            pyscf.lib.logger.info(self, 'symmetry-unique grids = %d',
+                                  len(self.symm_weights))
+        return self
+
+    def complete_symm_orbits(self, idx):
+        '''Extend the boolean mask idx of self.coords to the whole orbits of
+        the symmetry-equivalent grids.  An orbit is kept if any of its grids
+        is selected, so the grids pruned by the mask remain symmetric.  idx is
+        returned unchanged if the orbits of self.coords are not available.
+        '''
+        src = self._symm_grids_src
+        if (src is None or src[0] is not self.coords or
+            src[1] is not self.weights):
+            return idx
+        orbit_id = src[2]
+        keep = numpy.zeros(orbit_id.size, dtype=bool)
+        keep[orbit_id[idx]] = True
+        return keep[orbit_id]
+
+    def get_symm_grids(self):
+        '''The symmetry-unique grids (symm_coords, symm_weights).  (None, None)
+        is returned if they were not generated from the current self.coords
+        and self.weights.
+        '''
+        src = self._symm_grids_src
+        if (self.symm_coords is None or src is None or
+            src[0] is not self.coords or src[1] is not self.weights):
+            return None, None
+        return self.symm_coords, self.symm_weights
     def setup_grids(self, mol=None):
         import warnings
         with warnings.catch_warnings():
@@ -459,10 +659,10 @@ class Grids(pyscf.lib.StreamObject):
                          level=None, prune=None):
         ''' See gen_grid.gen_atomic_grids function'''
         if atom_grid is None: atom_grid = self.atom_grid
-        if radi_method is None: radi_method = mol.radi_method
+        if radi_method is None: radi_method = self.radi_method
         if level is None: level = self.level
         if prune is None: prune = self.prune
-        return gen_atomic_grids(mol, atom_grid, self.radi_method, level, prune)
+        return gen_atomic_grids(mol, atom_grid, radi_method, level, prune)
 
     @pyscf.lib.with_doc(gen_partition.__doc__)
     def gen_partition(self, mol, atom_grids_tab,
@@ -4,6 +4,8 @@
 #
 
 import ctypes
+import copy
+import tempfile
 import numpy
 import scipy.linalg
 import pyscf.lib
@@ -16,6 +18,13 @@ except (ImportError, OSError):
 libdft = pyscf.lib.load_library('libdft')
 OCCDROP = 1e-12
 BLKSIZE = 96
+# If the AOs which are not zero on a batch of grids are less than this
+# fraction of all AOs, _dot_ao_ao and _dot_ao_dm multiply the sub-matrices of
+# the significant AOs only.
+SPARSE_AO_RATIO = .5
+# The symmetry-unique grids (grids.symm_coords) are used only if the density
+# matrices deviate from the totally symmetric representation less than this
+SYMM_DM_TOL = 1e-10
 
 def eval_ao(mol, coords, deriv=0, relativity=0, shls_slice=None,
             non0tab=None, out=None, verbose=None):
@@ -420,8 +429,29 @@ def eval_mat(mol, ao, weight, rho, vxc,
     return mat + mat.T
 
 
+def _sparse_ao_index(mol, nao, ngrids, non0tab):
+    '''Indices of the AOs which are not zero on the given grids (indicated
+    by non0tab).  Returns None if the significant AOs are not sparse.
+    '''
+    nblk = (ngrids+BLKSIZE-1) // BLKSIZE
+    ao_loc = mol.ao_loc_nr()
+    if ao_loc[-1] != nao:
+        return None
+    shls_non0 = non0tab[:nblk].any(axis=0)
+    idx = numpy.where(numpy.repeat(shls_non0, ao_loc[1:]-ao_loc[:-1]))[0]
+    if idx.size < nao * SPARSE_AO_RATIO:
+        return idx
+    else:
+        return None
+
 def _dot_ao_ao(mol, ao1, ao2, nao, ngrids, non0tab):
     '''return numpy.dot(ao1.T, ao2)'''
+    idx = _sparse_ao_index(mol, nao, ngrids, non0tab)
+    if idx is not None:
+        vv = numpy.zeros((nao,nao))
+        vv[idx[:,None],idx] = pyscf.lib.dot(ao1[:,idx].T, ao2[:,idx])
+        return vv
+
     natm = ctypes.c_int(mol._atm.shape[0])
     nbas = ctypes.c_int(mol.nbas)
     ao1 = numpy.asarray(ao1, order='C')
@@ -440,6 +470,10 @@ def _dot_ao_ao(mol, ao1, ao2, nao, ngrids, non0tab):
 
 def _dot_ao_dm(mol, ao, dm, nao, ngrids, non0tab):
     '''return numpy.dot(ao, dm)'''
+    idx = _sparse_ao_index(mol, nao, ngrids, non0tab)
+    if idx is not None:
+        return pyscf.lib.dot(ao[:,idx], numpy.asarray(dm)[idx])
+
     natm = ctypes.c_int(mol._atm.shape[0])
     nbas = ctypes.c_int(mol.nbas)
     vm = numpy.empty((ngrids,dm.shape[1]))
@@ -456,6 +490,54 @@ def _dot_ao_dm(mol, ao, dm, nao, ngrids, non0tab):
                         mol._env.ctypes.data_as(ctypes.c_void_p))
     return vm
 
+def _eval_rho_stack(mol, ao, dms, non0tab=None, xctype='LDA'):
+    '''Electron densities (and density derivatives for GGA) of a stack of
+    density matrices.  Same to calling :func:`eval_rho` for each density
+    matrix, but AO values are contracted with all density matrices in one
+    GEMM.
+
+    Returns:
+        2D array of shape (nset,N) if xctype = LDA;  3D array of shape
+        (nset,4,N) if xctype = GGA
+    '''
+    xctype = xctype.upper()
+    dms = numpy.asarray(dms)
+    nset, nao = dms.shape[:2]
+    if xctype == 'LDA':
+        ao0 = ao
+    else:
+        ao0 = ao[0]
+    ngrids = ao0.shape[0]
+    if non0tab is None:
+        non0tab = numpy.ones(((ngrids+BLKSIZE-1)//BLKSIZE,mol.nbas),
+                             dtype=numpy.int8)
+    dm_stack = dms.transpose(1,0,2).reshape(nao,nset*nao)
+    c0 = _dot_ao_dm(mol, ao0, dm_stack, nao, ngrids, non0tab)
+    c0 = c0.reshape(ngrids,nset,nao)
+    if xctype == 'LDA':
+        rho = numpy.einsum('pi,pni->np', ao0, c0)
+    elif xctype == 'GGA':
+        rho = numpy.einsum('xpi,pni->nxp', ao[:4], c0)
+        rho[:,1:] *= 2 # *2 for +c.c.
+    else:
+        raise NotImplementedError('meta-GGA')
+    return rho
+
+def _dot_ao_aos(mol, ao, aows, nao, ngrids, non0tab):
+    '''return numpy.einsum('pi,pnj->nij', ao, aows) in one GEMM'''
+    nset = aows.shape[1]
+    idx = _sparse_ao_index(mol, nao, ngrids, non0tab)
+    if idx is not None:
+        nidx = idx.size
+        v = pyscf.lib.dot(ao[:,idx].T, aows[:,:,idx].reshape(ngrids,-1))
+        vv = numpy.zeros((nset,nao,nao))
+        vv[:,idx[:,None],idx] = v.reshape(nidx,nset,nidx).transpose(1,0,2)
+    else:
+        aows = numpy.asarray(aows, order='C')
+        v = pyscf.lib.dot(ao.T, aows.reshape(ngrids,-1))
+        vv = v.reshape(nao,nset,nao).transpose(1,0,2)
+    return vv
+
 def nr_vxc(mol, grids, xc_code, dm, spin=0, relativity=0, hermi=1,
            max_memory=2000, verbose=None):
     if isinstance(spin, (list, tuple, numpy.ndarray)):
@@ -526,8 +608,6 @@ def nr_rks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
                           'and will be removed in future release.\n')
 
     xctype = ni._xc_type(xc_code)
-    make_rho, nset, nao = ni._gen_rho_evaluator(mol, dms, hermi)
-
     ngrids = len(grids.weights)
     if ni.non0tab is None:
         non0tab = numpy.ones(((ngrids+BLKSIZE-1)//BLKSIZE,mol.nbas),
@@ -535,6 +615,13 @@ def nr_rks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
     else:
         non0tab = ni.non0tab
 
+    if (xctype in ('LDA', 'GGA') and
+        not (isinstance(dms, numpy.ndarray) and dms.ndim == 2) and len(dms) > 1):
+        return _nr_rks_fused(ni, mol, grids, xc_code, dms, relativity,
+                             non0tab, max_memory, verbose)
+
+    make_rho, nset, nao = ni._gen_rho_evaluator(mol, dms, hermi)
+
     nelec = numpy.zeros(nset)
     excsum = numpy.zeros(nset)
     vmat = numpy.zeros((nset,nao,nao))
@@ -656,6 +743,11 @@ def nr_uks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
 
     dms = numpy.asarray(dms)
     nao = dms.shape[-1]
+    if xctype in ('LDA', 'GGA') and dms.ndim == 4 and dms.shape[1] > 1:
+        nelec, excsum, vmat = _nr_uks_fused(ni, mol, grids, xc_code, dms,
+                                            relativity, non0tab, max_memory,
+                                            verbose)
+        return nelec, excsum, vmat.reshape(dms.shape)
     if dms.ndim == 2:
         make_rhoa, nset = ni._gen_rho_evaluator(mol, dms*.5, hermi)[:2]
         make_rhob = make_rhoa
@@ -769,9 +861,190 @@ def nr_uks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
         excsum = excsum[0]
     return nelec, excsum, vmat.reshape(dms.shape)
 
+def _nr_rks_fused(ni, mol, grids, xc_code, dms, relativity=0, non0tab=None,
+                  max_memory=2000, verbose=None):
+    '''nr_rks for multiple density matrices (LDA and GGA).  For each block
+    of grids, the densities of all density matrices are generated in one
+    GEMM, the functional is evaluated in one call on the concatenated
+    densities, and the XC potential matrices are accumulated in one GEMM.
+    '''
+    xctype = ni._xc_type(xc_code)
+    dms = numpy.asarray(dms)
+    nset, nao = dms.shape[:2]
+    if xctype == 'LDA':
+        ao_deriv = 0
+    else:
+        ao_deriv = 1
+    # The stacked intermediates are ~nset times as large as the AO values
+    max_memory = max_memory / (nset+1)
+
+    nelec = numpy.zeros(nset)
+    excsum = numpy.zeros(nset)
+    vmat = numpy.zeros((nset,nao,nao))
+    for ao, mask, weight, coords \
+            in ni.block_loop(mol, grids, nao, ao_deriv, max_memory, non0tab):
+        ngrid = weight.size
+        rho = _eval_rho_stack(mol, ao, dms, mask, xctype)
+        if xctype == 'LDA':
+            exc, vxc = ni.eval_xc(xc_code, rho.ravel(), 0, relativity, 1,
+                                  verbose)[:2]
+            den = rho * weight
+            vrho = vxc[0].reshape(nset,ngrid)
+            # *.5 because vmat + vmat.T
+            aow = numpy.einsum('pi,np->pni', ao, .5*weight*vrho)
+            vmat += _dot_ao_aos(mol, ao, aow, nao, ngrid, mask)
+        else:
+            rho_cat = rho.transpose(1,0,2).reshape(4,-1)
+            exc, vxc = ni.eval_xc(xc_code, rho_cat, 0, relativity, 1,
+                                  verbose)[:2]
+            den = rho[:,0] * weight
+            vrho = vxc[0].reshape(nset,ngrid)
+            vsigma = vxc[1].reshape(nset,ngrid)
+            wv = numpy.empty((4,nset,ngrid))
+            wv[0]  = weight * vrho * .5
+            wv[1:] = rho[:,1:].transpose(1,0,2) * (weight * vsigma * 2)
+            aow = numpy.einsum('xpi,xnp->pni', ao, wv)
+            vmat += _dot_ao_aos(mol, ao[0], aow, nao, ngrid, mask)
+        nelec += den.sum(axis=1)
+        excsum += (den * exc.reshape(nset,ngrid)).sum(axis=1)
+        rho = rho_cat = exc = vxc = vrho = vsigma = wv = aow = None
+
+    vmat = vmat + vmat.transpose(0,2,1)
+    return nelec, excsum, vmat
+
+def _nr_uks_fused(ni, mol, grids, xc_code, dms, relativity=0, non0tab=None,
+                  max_memory=2000, verbose=None):
+    '''nr_uks for multiple (alpha,beta) pairs of density matrices (LDA and
+    GGA).  See :func:`_nr_rks_fused`.
+    '''
+    xctype = ni._xc_type(xc_code)
+    dms = numpy.asarray(dms)
+    nset, nao = dms.shape[1:3]
+    if xctype == 'LDA':
+        ao_deriv = 0
+    else:
+        ao_deriv = 1
+    max_memory = max_memory / (nset*2+1)
+
+    nelec = numpy.zeros((2,nset))
+    excsum = numpy.zeros(nset)
+    vmat = numpy.zeros((2,nset,nao,nao))
+    for ao, mask, weight, coords \
+            in ni.block_loop(mol, grids, nao, ao_deriv, max_memory, non0tab):
+        ngrid = weight.size
+        rho = _eval_rho_stack(mol, ao, dms.reshape(-1,nao,nao), mask, xctype)
+        rho_a, rho_b = rho[:nset], rho[nset:]
+        if xctype == 'LDA':
+            exc, vxc = ni.eval_xc(xc_code, (rho_a.ravel(), rho_b.ravel()),
+                                  1, relativity, 1, verbose)[:2]
+            den_a = rho_a * weight
+            den_b = rho_b * weight
+            vrho = vxc[0].reshape(nset,ngrid,2)
+            wv = numpy.empty((2,nset,ngrid))
+            wv[0] = .5 * weight * vrho[:,:,0]
+            wv[1] = .5 * weight * vrho[:,:,1]
+            aow = numpy.einsum('pi,np->pni', ao, wv.reshape(-1,ngrid))
+            v = _dot_ao_aos(mol, ao, aow, nao, ngrid, mask)
+        else:
+            rho_a_cat = rho_a.transpose(1,0,2).reshape(4,-1)
+            rho_b_cat = rho_b.transpose(1,0,2).reshape(4,-1)
+            exc, vxc = ni.eval_xc(xc_code, (rho_a_cat, rho_b_cat),
+                                  1, relativity, 1, verbose)[:2]
+            den_a = rho_a[:,0] * weight
+            den_b = rho_b[:,0] * weight
+            vrho = vxc[0].reshape(nset,ngrid,2)
+            vsigma = vxc[1].reshape(nset,ngrid,3)
+            drho_a = rho_a[:,1:].transpose(1,0,2)
+            drho_b = rho_b[:,1:].transpose(1,0,2)
+            wv = numpy.empty((4,2,nset,ngrid))
+            wv[0,0] = weight * vrho[:,:,0] * .5
+            wv[1:,0] = drho_a * (weight * vsigma[:,:,0] * 2)  # sigma_uu
+            wv[1:,0]+= drho_b * (weight * vsigma[:,:,1])      # sigma_ud
+            wv[0,1] = weight * vrho[:,:,1] * .5
+            wv[1:,1] = drho_b * (weight * vsigma[:,:,2] * 2)  # sigma_dd
+            wv[1:,1]+= drho_a * (weight * vsigma[:,:,1])      # sigma_ud
+            aow = numpy.einsum('xpi,xnp->pni', ao, wv.reshape(4,-1,ngrid))
+            v = _dot_ao_aos(mol, ao[0], aow, nao, ngrid, mask)
+        vmat += v.reshape(2,nset,nao,nao)
+        exc = exc.reshape(nset,ngrid)
+        nelec[0] += den_a.sum(axis=1)
+        nelec[1] += den_b.sum(axis=1)
+        excsum += (den_a * exc).sum(axis=1)
+        excsum += (den_b * exc).sum(axis=1)
+        rho = rho_a = rho_b = exc = vxc = vrho = vsigma = wv = aow = v = None
+
+    vmat = vmat + vmat.transpose(0,1,3,2)
+    return nelec, excsum, vmat
+
 nr_rks_vxc = nr_rks
 nr_uks_vxc = nr_uks
 
+def _symm_adapted_orbitals(ni, mol, grids, dms):
+    '''Orthonormal symmetry adapted orbitals if the XC potential of dms can
+    be evaluated on the symmetry-unique grids, otherwise None.  The
+    orthonormalized orbitals are cached in ni._symm_so.
+    '''
+    if (not hasattr(grids, 'get_symm_grids') or
+        grids.get_symm_grids()[0] is None or
+        not getattr(mol, 'symmetry', False) or
+        getattr(mol, 'symm_orb', None) is None):
+        return None
+    dms = numpy.asarray(dms)
+    if dms.ndim < 2:
+        return None
+    nao = dms.shape[-1]
+    cache = getattr(ni, '_symm_so', None)
+    if cache is not None and cache[0] is mol.symm_orb:
+        so = cache[1]
+    else:
+        so = [scipy.linalg.qr(c, mode='economic')[0]
+              for c in mol.symm_orb if c.shape[1] > 0]
+        ni._symm_so = (mol.symm_orb, so)
+    if sum(c.shape[1] for c in so) != nao:
+        return None
+    for dm in dms.reshape(-1,nao,nao):
+        if abs(_symmetrize_mat(dm, so) - dm).max() > SYMM_DM_TOL:
+            return None
+    return so
+
+def _symmetrize_mat(mat, so):
+    '''Project the matrix to the totally symmetric representation,
+    sum_Gamma P_Gamma mat P_Gamma
+    '''
+    out = numpy.zeros_like(mat)
+    for c in so:
+        x = numpy.dot(numpy.dot(c.T, mat), c)
+        out += numpy.dot(numpy.dot(c, x), c.T)
+    return out
+
+def _nr_vxc_symm(ni, so, mol, grids, xc_code, dms, spin=0, relativity=0,
+                 hermi=1, max_memory=2000, verbose=None):
+    '''XC functional and potential of totally symmetric density matrices.
+    The XC potential matrix is integrated on the symmetry-unique grids, then
+    symmetrized in the basis of the symmetry adapted orbitals so.
+    '''
+    sgrids = copy.copy(grids)
+    sgrids.coords, sgrids.weights = grids.get_symm_grids()
+    sgrids.symm_coords = sgrids.symm_weights = None
+    sgrids._symm_grids_src = None
+    cache = getattr(ni, '_symm_non0tab', None)
+    if cache is None or cache[0] is not sgrids.coords:
+        cache = ni._symm_non0tab = (sgrids.coords,
+                                    ni.make_mask(mol, sgrids.coords))
+    sni = copy.copy(ni)
+    sni.non0tab = cache[1]
+    sni._ao_cache = getattr(ni, '_symm_ao_cache', None)
+    if spin == 0:
+        nelec, excsum, vmat = nr_rks(sni, mol, sgrids, xc_code, dms,
+                                     relativity, hermi, max_memory, verbose)
+    else:
+        nelec, excsum, vmat = nr_uks(sni, mol, sgrids, xc_code, dms,
+                                     relativity, hermi, max_memory, verbose)
+    ni._symm_ao_cache = sni._ao_cache
+    nao = vmat.shape[-1]
+    vsym = [_symmetrize_mat(v, so) for v in vmat.reshape(-1,nao,nao)]
+    return nelec, excsum, numpy.asarray(vsym).reshape(vmat.shape)
+
 def nr_rks_fxc(ni, mol, grids, xc_code, dm0, dms, relativity=0, hermi=1,
                rho0=None, vxc=None, fxc=None, max_memory=2000, verbose=None):
     '''Contract RKS XC kernel matrix with given density matrices
@@ -813,7 +1086,10 @@ def nr_rks_fxc(ni, mol, grids, xc_code, dm0, dms, relativity=0, hermi=1,
     '''
     xctype = ni._xc_type(xc_code)
 
-    make_rho, nset, nao = ni._gen_rho_evaluator(mol, dms, hermi)
+    dms = numpy.asarray(dms)
+    nao = dms.shape[-1]
+    nset = dms.size // (nao*nao)
+    dms = dms.reshape(nset,nao,nao)
     if ((xctype == 'LDA' and fxc is None) or
         (xctype == 'GGA' and rho0 is None)):
         make_rho0 = ni._gen_rho_evaluator(mol, dm0, 1)[0]
@@ -824,6 +1100,8 @@ def nr_rks_fxc(ni, mol, grids, xc_code, dm0, dms, relativity=0, hermi=1,
                              dtype=numpy.int8)
     else:
         non0tab = ni.non0tab
+    # The densities and potentials of all dms are stacked in each block
+    max_memory = max_memory / (nset+1)
 
     vmat = numpy.zeros((nset,nao,nao))
     if xctype == 'LDA':
@@ -840,11 +1118,10 @@ def nr_rks_fxc(ni, mol, grids, xc_code, dm0, dms, relativity=0, hermi=1,
                 frr = fxc[0][ip:ip+ngrid]
                 ip += ngrid
 
-            for i in range(nset):
-                rho1 = make_rho(i, ao, mask, 'LDA')
-                aow = numpy.einsum('pi,p->pi', ao, weight*frr*rho1)
-                vmat[i] += _dot_ao_ao(mol, aow, ao, nao, weight.size, mask)
-                rho1 = aow = None
+            rho1 = _eval_rho_stack(mol, ao, dms, mask, 'LDA')
+            aow = numpy.einsum('pi,np->pni', ao, weight*frr*rho1)
+            vmat += _dot_ao_aos(mol, ao, aow, nao, ngrid, mask)
+            rho1 = aow = None
 
     elif xctype == 'GGA':
         ao_deriv = 1
@@ -867,19 +1144,18 @@ def nr_rks_fxc(ni, mol, grids, xc_code, dm0, dms, relativity=0, hermi=1,
                 fgg = fxc[2][ip:ip+ngrid]
                 ip += ngrid
 
-            wv = numpy.empty((4,ngrid))
-            for i in range(nset):
-                rho1 = make_rho(i, ao, mask, 'GGA')
-                sigma1 = numpy.einsum('xi,xi->i', rho[1:], rho1[1:])
-                wv[0]  = frr * rho1[0]
-                wv[0] += frg * sigma1 * 2
-                wv[1:] = (fgg * sigma1 * 4 + frg * rho1[0] * 2) * rho[1:]
-                wv[1:]+= vgamma * rho1[1:] * 2
-                wv[1:]*= 2  # for (\nabla\mu) \nu + \mu (\nabla\nu)
-                wv *= weight
-                aow = numpy.einsum('npi,np->pi', ao, wv)
-                vmat[i] += _dot_ao_ao(mol, aow, ao[0], nao, ngrid, mask)
-                rho1 = sigma1 = aow = None
+            rho1 = _eval_rho_stack(mol, ao, dms, mask, 'GGA')
+            sigma1 = numpy.einsum('xp,nxp->np', rho[1:], rho1[:,1:])
+            wv = numpy.empty((4,nset,ngrid))
+            wv[0]  = frr * rho1[:,0]
+            wv[0] += frg * sigma1 * 2
+            wv[1:] = (fgg * sigma1 * 4 + frg * rho1[:,0] * 2) * rho[1:,None]
+            wv[1:]+= vgamma * rho1[:,1:].transpose(1,0,2) * 2
+            wv[1:]*= 2  # for (\nabla\mu) \nu + \mu (\nabla\nu)
+            wv *= weight
+            aow = numpy.einsum('xpi,xnp->pni', ao, wv)
+            vmat += _dot_ao_aos(mol, ao[0], aow, nao, ngrid, mask)
+            rho1 = sigma1 = wv = aow = None
     else:
         raise NotImplementedError('meta-GGA')
 
@@ -1154,6 +1430,71 @@ def large_rho_indices(ni, mol, dm, grids, cutoff=1e-10, max_memory=2000):
     return numpy.hstack(idx)
 
 
+class _AOCache(object):
+    '''AO values (and derivatives) on grids, kept for the next loop over the
+    same grids.  The first max_memory MB are held in memory.  If spill is set,
+    the AO values beyond max_memory are stored in a memory-mapped temporary
+    file.  The filled grids are recorded for each component, so a loop of a
+    lower deriv order does not mark the higher derivatives as cached.
+    '''
+    def __init__(self, mol, coords, non0tab, nao, deriv, max_memory=0,
+                 spill=False):
+        self.mol = mol
+        self._env = mol._env.copy()
+        self.coords = coords.copy()
+        self.non0tab = non0tab.copy()
+        self.nao = nao
+        self.deriv = deriv
+        comp = (deriv+1)*(deriv+2)*(deriv+3)//6
+        ngrids = coords.shape[0]
+        self.nram = min(ngrids, int(max_memory*1e6/(comp*nao*8)))
+        self.ram = numpy.empty((comp,self.nram,nao))
+        if spill and self.nram < ngrids:
+            self._swapfile = tempfile.NamedTemporaryFile(suffix='aocache')
+            self.disk = numpy.memmap(self._swapfile.name, dtype=numpy.double,
+                                     mode='w+', shape=(comp,ngrids-self.nram,nao))
+            self.ncached = ngrids
+        else:
+            self.disk = None
+            self.ncached = self.nram
+        self.filled = numpy.zeros((comp,ngrids), dtype=bool)
+
+    def match(self, mol, coords, non0tab, nao, deriv):
+        return (mol is self.mol and deriv <= self.deriv and nao == self.nao and
+                coords.shape == self.coords.shape and
+                non0tab.shape == self.non0tab.shape and
+                numpy.array_equal(mol._env, self._env) and
+                numpy.array_equal(coords, self.coords) and
+                numpy.array_equal(non0tab, self.non0tab))
+
+    def _parts(self, p0, p1):
+        nram = self.nram
+        if p0 < nram:
+            yield self.ram, p0, min(p1, nram), 0
+        if p1 > nram:
+            q0 = max(p0, nram)
+            yield self.disk, q0-nram, p1-nram, q0-p0
+
+    def load(self, p0, p1, comp, out):
+        '''AO values of grids [p0:p1] in out, or None if they are not cached'''
+        if p1 > self.ncached or not self.filled[:comp,p0:p1].all():
+            return None
+        ao = numpy.ndarray((comp,p1-p0,self.nao), buffer=out)
+        for buf, q0, q1, i0 in self._parts(p0, p1):
+            ao[:,i0:i0+q1-q0] = buf[:comp,q0:q1]
+        if comp == 1:
+            ao = ao[0]
+        return ao
+
+    def save(self, p0, p1, ao):
+        if p1 > self.ncached:
+            return
+        ao = ao.reshape(-1,p1-p0,self.nao)
+        comp = ao.shape[0]
+        for buf, q0, q1, i0 in self._parts(p0, p1):
+            buf[:comp,q0:q1] = ao[:,i0:i0+q1-q0]
+        self.filled[:comp,p0:p1] = True
+
 class _NumInt(object):
     '''libxc is the default xc functional evaluator.  Change the default one
     by setting
@@ -1163,6 +1504,17 @@ class _NumInt(object):
 
     def __init__(self):
         self.non0tab = None
+        # AO values on grids are cached in memory up to ao_cache_memory MB,
+        # and reused in the next loop over the same grids (SCF iterations,
+        # TDDFT, nuclear gradients).  If ao_cache_spill is set, the AO values
+        # beyond ao_cache_memory are cached in a memory-mapped file.
+        self.ao_cache_memory = 0
+        self.ao_cache_spill = False
+        self._ao_cache = None
+        self._symm_ao_cache = None
+        # Cached SO basis and non0tab for the symmetry-unique grids
+        self._symm_so = None
+        self._symm_non0tab = None
 
     def nr_vxc(self, mol, grids, xc_code, dms, spin=0, relativity=0, hermi=1,
                max_memory=2000, verbose=None):
@@ -1180,6 +1532,10 @@ class _NumInt(object):
     @pyscf.lib.with_doc(nr_rks.__doc__)
     def nr_rks(self, mol, grids, xc_code, dms, relativity=0, hermi=1,
                max_memory=2000, verbose=None):
+        so = _symm_adapted_orbitals(self, mol, grids, dms)
+        if so is not None:
+            return _nr_vxc_symm(self, so, mol, grids, xc_code, dms, 0,
+                                relativity, hermi, max_memory, verbose)
         if self.non0tab is None:
             self.non0tab = self.make_mask(mol, grids.coords)
         return nr_rks(self, mol, grids, xc_code, dms, relativity, hermi,
@@ -1188,6 +1544,10 @@ class _NumInt(object):
     @pyscf.lib.with_doc(nr_uks.__doc__)
     def nr_uks(self, mol, grids, xc_code, dms, relativity=0, hermi=1,
                max_memory=2000, verbose=None):
+        so = _symm_adapted_orbitals(self, mol, grids, dms)
+        if so is not None:
+            return _nr_vxc_symm(self, so, mol, grids, xc_code, dms, 1,
+                                relativity, hermi, max_memory, verbose)
         if self.non0tab is None:
             self.non0tab = self.make_mask(mol, grids.coords)
         return nr_uks(self, mol, grids, xc_code, dms, relativity, hermi,
@@ -1235,14 +1595,34 @@ class _NumInt(object):
                                  dtype=numpy.int8)
         if buf is None:
             buf = numpy.empty((comp,blksize,nao))
+        cache = self._get_ao_cache(mol, grids.coords, non0tab, nao, deriv)
         for ip0 in range(0, ngrids, blksize):
             ip1 = min(ngrids, ip0+blksize)
             coords = grids.coords[ip0:ip1]
             weight = grids.weights[ip0:ip1]
             non0 = non0tab[ip0//BLKSIZE:]
-            ao = self.eval_ao(mol, coords, deriv=deriv, non0tab=non0, out=buf)
+            ao = None
+            if cache is not None:
+                ao = cache.load(ip0, ip1, comp, buf)
+            if ao is None:
+                ao = self.eval_ao(mol, coords, deriv=deriv, non0tab=non0, out=buf)
+                if cache is not None:
+                    cache.save(ip0, ip1, ao)
             yield ao, non0, weight, coords
 
+    def _get_ao_cache(self, mol, coords, non0tab, nao, deriv):
+        '''The AO cache for the given grids, see :class:`_AOCache`'''
+        if not (self.ao_cache_memory > 0 or self.ao_cache_spill):
+            return None
+        cache = self._ao_cache
+        if (cache is None or
+            not cache.match(mol, coords, non0tab, nao, deriv)):
+            self._ao_cache = None  # release the old cache first
+            cache = self._ao_cache = _AOCache(mol, coords, non0tab, nao, deriv,
+                                              self.ao_cache_memory,
+                                              self.ao_cache_spill)
+        return cache
+
     def _gen_rho_evaluator(self, mol, dms, hermi=1):
         if hermi == 1:
             natocc = []
@@ -105,10 +105,12 @@ def get_veff(ks, mol=None, dm=None, dm_last=0, vhf_last=0, hermi=1):
     if small_rho_cutoff > 1e-20 and ground_state:
         # Filter grids the first time setup grids
         idx = ks._numint.large_rho_indices(mol, dm, ks.grids, small_rho_cutoff)
+        idx = ks.grids.complete_symm_orbits(idx)
         logger.debug(ks, 'Drop grids %d',
                      ks.grids.weights.size - numpy.count_nonzero(idx))
         ks.grids.coords  = numpy.asarray(ks.grids.coords [idx], order='C')
         ks.grids.weights = numpy.asarray(ks.grids.weights[idx], order='C')
+        ks.grids.reduce_symm(mol)
         ks._numint.non0tab = None
     return vhf + vx
 
@@ -169,7 +171,8 @@ class RKS(pyscf.scf.hf.RHF):
                 | gen_grid.treutler_prune
                 | None : to switch off grids pruning
 
-            grids.symmetry  True/False  to symmetrize mesh grids (TODO)
+            grids.symmetry  True/False  to integrate the symmetric densities on
+            the symmetry-unique grids.  Default is False
 
             grids.atom_grid  Set (radial, angular) grids for particular atoms.
             Eg, grids.atom_grid = {'H': (20,110)} will generate 20 radial
@@ -69,6 +69,99 @@ class KnowValues(unittest.TestCase):
         self.assertAlmostEqual(numpy.linalg.norm(coord), 149.55023044392638, 9)
         self.assertAlmostEqual(numpy.linalg.norm(weight), 586.36841824004455, 9)
 
+    def test_arg_group_grids(self):
+        grid = gen_grid.Grids(h2o)
+        grid.atom_grid = {"H": (10, 50), "O": (10, 50),}
+        coords0, weights0 = grid.build(sort_grids=False)
+        coords1, weights1 = grid.build()
+        idx = gen_grid.arg_group_grids(coords0)
+        self.assertTrue(numpy.allclose(coords0[idx], coords1))
+        self.assertTrue(numpy.allclose(weights0[idx], weights1))
+        ibox = numpy.floor((coords1 - coords1.min(axis=0)) /
+                           gen_grid.GROUP_BOX_SIZE)
+        nbox = ibox.max(axis=0) + 1
+        box_id = (ibox[:,0] * nbox[1] + ibox[:,1]) * nbox[2] + ibox[:,2]
+        self.assertTrue(numpy.all(numpy.diff(box_id) >= 0))
+
+    def test_weight_cutoff(self):
+        grid = gen_grid.Grids(h2o)
+        grid.atom_grid = {"H": (10, 50), "O": (10, 50),}
+        coords0, weights0 = grid.build()
+        grid.weight_cutoff = 1e-10
+        coords1, weights1 = grid.build()
+        self.assertEqual(weights1.size, numpy.count_nonzero(weights0 > 1e-10))
+        self.assertAlmostEqual(weights0.sum(), weights1.sum(), 6)
+
+    def test_atomic_grids_cache(self):
+        grid = gen_grid.Grids(h2o)
+        tab0 = grid.gen_atomic_grids(h2o)
+        tab1 = grid.gen_atomic_grids(h2o)
+        self.assertTrue(tab0['O'][0] is tab1['O'][0])
+        self.assertFalse(tab0['O'][0].flags.writeable)
+
+        mol1 = h2o.copy()
+        mol1.atom = [["O" , (0. , 0.     , 0.1)],
+                     [1   , (0. , -0.757 , 0.587)],
+                     [1   , (0. , 0.757  , 0.587)] ]
+        mol1.build(False, False)
+        tab2 = grid.gen_atomic_grids(mol1)
+        self.assertTrue(tab0['H'][1] is tab2['H'][1])
+
+    def test_symm_reduce_grids(self):
+        mol = h2o.copy()
+        mol.symmetry = True
+        mol.build(False, False)
+        grid = gen_grid.Grids(mol)
+        self.assertFalse(grid.symmetry)
+        grid.symmetry = True
+        grid.atom_grid = {"H": (10, 50), "O": (10, 50),}
+        coords, weights = grid.build()
+        self.assertTrue(grid.symm_weights.size*3 < weights.size)
+        self.assertAlmostEqual(grid.symm_weights.sum(), weights.sum(), 9)
+        r2 = numpy.einsum('pi,pi->p', coords, coords)
+        r2s = numpy.einsum('pi,pi->p', grid.symm_coords, grid.symm_coords)
+        self.assertAlmostEqual(numpy.dot(weights, numpy.exp(-r2)),
+                               numpy.dot(grid.symm_weights, numpy.exp(-r2s)), 9)
+
+        grid.coords = grid.coords[::2]
+        self.assertTrue(grid.get_symm_grids()[0] is None)
+        coords1 = coords.copy()
+        coords1[0] += .01
+        self.assertRaises(RuntimeError, gen_grid.symm_reduce_grids,
+                          mol, coords1, weights)
+        grid.coords, grid.weights = coords1, weights
+        grid.reduce_symm(mol)
+        self.assertTrue(grid.symm_coords is None)
+
+        # Pruning whole orbits keeps the grids symmetric
+        grid.coords, grid.weights = coords, weights
+        grid.reduce_symm(mol)
+        numpy.random.seed(1)
+        idx = numpy.random.random(weights.size) > .7
+        idx1 = grid.complete_symm_orbits(idx)
+        self.assertTrue(idx1[idx].all())
+        self.assertTrue(idx1.sum() > idx.sum())
+        grid.coords, grid.weights = coords[idx1], weights[idx1]
+        grid.reduce_symm(mol)
+        self.assertTrue(grid.symm_coords is not None)
+        self.assertAlmostEqual(grid.symm_weights.sum(), weights[idx1].sum(), 9)
+
+        # Three grids within tol; the image of the last one is not unique
+        coords2 = numpy.array([[0, 0, 2e-6], [0, 0, -1e-6], [0, 0, -3e-6]])
+        self.assertRaises(RuntimeError, gen_grid._symm_grids_images,
+                          coords2, numpy.array([1, 1, -1]), 1e-5)
+
+        mf = dft.RKS(mol)
+        mf.xc = 'b3lyp'
+        mf.grids.symmetry = True
+        mf.grids.atom_grid = {"H": (20, 110), "O": (20, 110),}
+        e1 = mf.kernel()
+        self.assertTrue(mf.grids.symm_coords is not None)
+        mf.grids.symmetry = False
+        mf.grids.coords = None
+        e0 = mf.kernel()
+        self.assertAlmostEqual(e1, e0, 8)
+
     def test_gen_atomic_grids(self):
         grid = gen_grid.Grids(h2o)
         grid.prune = None
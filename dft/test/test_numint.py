@@ -16,7 +16,7 @@ mol.build()
 mf = dft.RKS(mol)
 mf.grids.atom_grid = {"H": (50, 110)}
 mf.prune = None
-mf.grids.build()
+mf.grids.build(sort_grids=False)
 nao = mol.nao_nr()
 
 class KnowValues(unittest.TestCase):
@@ -49,6 +49,94 @@ class KnowValues(unittest.TestCase):
                                      mf.grids.weights.size, non0tab)
         self.assertTrue(numpy.allclose(res0, res1))
 
+    def test_dot_ao_sparse(self):
+        coords = mf.grids.coords[:500]
+        ngrids = len(coords)
+        non0tab = numpy.zeros(((ngrids+dft.numint.BLKSIZE-1)//dft.numint.BLKSIZE,
+                               mol.nbas), dtype=numpy.int8)
+        non0tab[:,:mol.nbas//3] = 1
+        self.assertTrue(dft.numint._sparse_ao_index(mol, nao, ngrids, non0tab)
+                        is not None)
+        ao = dft.numint.eval_ao(mol, coords, deriv=1, non0tab=non0tab)
+        res0 = lib.dot(ao[0].T, ao[1])
+        res1 = dft.numint._dot_ao_ao(mol, ao[0], ao[1], nao, ngrids, non0tab)
+        self.assertTrue(numpy.allclose(res0, res1))
+
+        numpy.random.seed(1)
+        dm = numpy.random.random((nao,nao))
+        res0 = lib.dot(ao[0], dm)
+        res1 = dft.numint._dot_ao_dm(mol, ao[0], dm, nao, ngrids, non0tab)
+        self.assertTrue(numpy.allclose(res0, res1))
+
+    def test_nr_rks_fused(self):
+        ni = dft.numint._NumInt()
+        numpy.random.seed(2)
+        dms = numpy.random.random((3,nao,nao)) * .01
+        dms = dms + dms.transpose(0,2,1)
+        for xc in ('lda,vwn', 'b88,p86'):
+            nelec, exc, vmat = ni.nr_rks(mol, mf.grids, xc, dms)
+            for i in range(3):
+                ref = ni.nr_rks(mol, mf.grids, xc, dms[i])
+                self.assertAlmostEqual(nelec[i], ref[0], 9)
+                self.assertAlmostEqual(exc[i], ref[1], 9)
+                self.assertTrue(numpy.allclose(vmat[i], ref[2]))
+
+            dms1 = numpy.asarray((dms, dms[::-1]))
+            nelec, exc, vmat = ni.nr_uks(mol, mf.grids, xc, dms1)
+            for i in range(3):
+                ref = ni.nr_uks(mol, mf.grids, xc, dms1[:,i])
+                self.assertAlmostEqual(nelec[0,i], ref[0][0], 9)
+                self.assertAlmostEqual(nelec[1,i], ref[0][1], 9)
+                self.assertAlmostEqual(exc[i], ref[1], 9)
+                self.assertTrue(numpy.allclose(vmat[:,i], ref[2]))
+
+    def test_ao_cache(self):
+        numpy.random.seed(3)
+        dm = numpy.random.random((nao,nao)) * .01
+        dm = dm + dm.T
+        ni = dft.numint._NumInt()
+        ref = ni.nr_rks(mol, mf.grids, 'b88,p86', dm)
+
+        ni.ao_cache_memory = 10
+        ni.ao_cache_spill = True
+        res0 = ni.nr_rks(mol, mf.grids, 'b88,p86', dm)
+        cache = ni._ao_cache
+        self.assertTrue(cache.nram < mf.grids.weights.size)
+        self.assertTrue(cache.filled.all())
+        res1 = ni.nr_rks(mol, mf.grids, 'b88,p86', dm)
+        self.assertTrue(ni._ao_cache is cache)
+        res2 = ni.nr_rks(mol, mf.grids, 'lda,vwn', dm)
+        self.assertTrue(ni._ao_cache is cache)
+        self.assertAlmostEqual(res0[1], ref[1], 9)
+        self.assertAlmostEqual(res1[1], ref[1], 9)
+        self.assertTrue(numpy.allclose(res1[2], ref[2]))
+        ref = dft.numint._NumInt().nr_rks(mol, mf.grids, 'lda,vwn', dm)
+        self.assertAlmostEqual(res2[1], ref[1], 9)
+        self.assertTrue(numpy.allclose(res2[2], ref[2]))
+
+    def test_ao_cache_partial(self):
+        grids = dft.gen_grid.Grids(mol)
+        grids.coords = mf.grids.coords[:2000]
+        grids.weights = mf.grids.weights[:2000]
+        ni = dft.numint._NumInt()
+        ni.ao_cache_memory = 5
+        non0tab = ni.make_mask(mol, grids.coords)
+        BLKSIZE = dft.numint.BLKSIZE
+        # The block across cache.nram is not cached in the first loop.  The
+        # loops of deriv=0 fill the value component of this region only.
+        for deriv, blksize in ((1, BLKSIZE*30), (0, BLKSIZE*7),
+                               (1, BLKSIZE*7), (0, BLKSIZE*30)):
+            for ao, non0, weight, coords \
+                    in ni.block_loop(mol, grids, nao, deriv, non0tab=non0tab,
+                                     blksize=blksize):
+                ref = ni.eval_ao(mol, coords, deriv=deriv, non0tab=non0)
+                self.assertTrue(numpy.allclose(ao, ref))
+        cache = ni._ao_cache
+        self.assertEqual(cache.deriv, 1)
+        self.assertTrue(cache.nram < grids.weights.size)
+        self.assertTrue(cache.disk is None)
+        self.assertFalse(cache.filled[1:].all())
+
     def test_eval_rho(self):
         numpy.random.seed(10)
         ngrids = 500
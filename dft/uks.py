@@ -78,10 +78,12 @@ def get_veff(ks, mol=None, dm=None, dm_last=0, vhf_last=0, hermi=1):
     if small_rho_cutoff > 1e-20 and ground_state:
         idx = ks._numint.large_rho_indices(mol, dm[0]+dm[1], ks.grids,
                                            small_rho_cutoff)
+        idx = ks.grids.complete_symm_orbits(idx)
         logger.debug(ks, 'Drop grids %d',
                      ks.grids.weights.size - numpy.count_nonzero(idx))
         ks.grids.coords  = numpy.asarray(ks.grids.coords [idx], order='C')
         ks.grids.weights = numpy.asarray(ks.grids.weights[idx], order='C')
+        ks.grids.reduce_symm(mol)
         ks._numint.non0tab = None
     return vhf + vx
 
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+Time spent on each SCF cycle for the incremental Fock build of direct SCF.
+
+mf.rebuild_nsteps = 1 rebuilds the HF potential from the full density matrix
+in every cycle.  With larger rebuild_nsteps, only the change of the density
+matrix is contracted with the integrals.  The integral screening based on
+the density matrix increment makes the late SCF cycles cheaper.
+'''
+
+import os
+import time
+from pyscf import lib
+from pyscf import gto, scf
+
+mol = gto.Mole()
+mol.verbose = 0
+log = lib.logger.Logger(mol.stdout, 5)
+with open('/proc/cpuinfo') as f:
+    for line in f:
+        if 'model name' in line:
+            log.note(line[:-1])
+            break
+with open('/proc/meminfo') as f:
+    log.note(f.readline()[:-1])
+log.note('OMP_NUM_THREADS=%s\n', os.environ.get('OMP_NUM_THREADS', None))
+
+mol.atom = '''
+c   1.217739890298750 -0.703062453466927  0.000000000000000
+h   2.172991468538160 -1.254577209307266  0.000000000000000
+c   1.217739890298750  0.703062453466927  0.000000000000000
+h   2.172991468538160  1.254577209307266  0.000000000000000
+c   0.000000000000000  1.406124906933854  0.000000000000000
+h   0.000000000000000  2.509154418614532  0.000000000000000
+c  -1.217739890298750  0.703062453466927  0.000000000000000
+h  -2.172991468538160  1.254577209307266  0.000000000000000
+c  -1.217739890298750 -0.703062453466927  0.000000000000000
+h  -2.172991468538160 -1.254577209307266  0.000000000000000
+c   0.000000000000000 -1.406124906933854  0.000000000000000
+h   0.000000000000000 -2.509154418614532  0.000000000000000
+'''
+mol.basis = 'cc-pVTZ'
+mol.build()
+log.note('nao = %d', mol.nao_nr())
+
+for rebuild_nsteps in (1, 5, 0):
+    mf = scf.RHF(mol)
+    mf.max_memory = 10  # Skip the incore ERIs to enforce direct SCF
+    mf.rebuild_nsteps = rebuild_nsteps
+    timing = []
+    def record_time(envs):
+        timing.append(time.time())
+    mf.callback = record_time
+    t0 = time.time()
+    mf.kernel()
+    log.note('rebuild_nsteps = %d  E = %.12f  cycles = %d  total time %.2f s',
+             rebuild_nsteps, mf.e_tot, len(timing), time.time()-t0)
+    for i, t1 in enumerate(timing):
+        log.note('    cycle %2d  %.2f s', i+1, t1-t0)
+        t0 = t1
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+from pyscf import gto
+from pyscf import scf
+
+'''
+Reuse the density fitting integrals across calculations and processes.
+
+When the attribute cderi_store of the DF object is set to a directory, the
+Cholesky decomposed integrals are saved in that directory.  The file name is
+a hash key of the geometry, the basis and the auxiliary basis.  Any later
+calculation (in this or another process) with the same molecule and
+auxiliary basis loads the integrals from the file.  Uncompressed integrals
+are memory-mapped.
+
+cderi_dtype = numpy.float32 halves the file size.  cderi_compression = 'gzip'
+or 'lzf' compresses the integrals with the HDF5 filters.
+'''
+
+mol = gto.Mole()
+mol.build(
+    verbose = 0,
+    atom = '''8  0  0.     0
+              1  0  -0.757 0.587
+              1  0  0.757  0.587''',
+    basis = 'ccpvdz',
+)
+
+mf = scf.density_fit(scf.RHF(mol))
+mf.with_df.cderi_store = '/tmp/pyscf_cderi'
+energy = mf.kernel()
+print('E = %.12f, ref = -76.0259362997' % energy)
+
+# The second calculation reads the integrals generated by the first one
+mf = scf.density_fit(scf.RKS(mol))
+mf.with_df.cderi_store = '/tmp/pyscf_cderi'
+energy = mf.kernel()
+print('E = %.12f' % energy)
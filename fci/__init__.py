@@ -13,6 +13,7 @@ direct_spin0        No            Yes            Yes                Yes
 direct_spin1        No            No             Yes                Yes
 direct_uhf          No            No             Yes                No
 direct_nosym        No            No             No**               Yes
+selected_ci         No            No             Yes                Yes
 
 *  Real hermitian Hamiltonian implies (ij|kl) = (ji|kl) = (ij|lk) = (ji|lk)
 ** Hamiltonian is real but not hermitian, (ij|kl) != (ji|kl) ...
@@ -32,6 +33,8 @@ from pyscf.fci.rdm import reorder_rdm
 from pyscf.fci.spin_op import spin_square
 from pyscf.fci.direct_spin1 import make_pspace_precond, make_diag_precond
 from pyscf.fci import direct_nosym
+from pyscf.fci import selected_ci
+from pyscf.fci.selected_ci import SCI
 
 def solver(mol, singlet=True, symm=None):
     if symm is None:
@@ -12,6 +12,12 @@ def large_ci(ci, norb, nelec, tol=.1):
     neleca, nelecb = _unpack(nelec)
     idx = numpy.argwhere(abs(ci) > tol)
     res = []
+    if getattr(ci, '_strs', None) is not None:
+        # CI vector of selected CI, see selected_ci._SCIvector
+        strsa, strsb = ci._strs
+        for i,j in idx:
+            res.append((ci[i,j], bin(strsa[i]), bin(strsb[j])))
+        return res
     for i,j in idx:
         res.append((ci[i,j],
                     bin(cistring.addr2str(norb, neleca, i)),
@@ -78,6 +78,30 @@ def contract_2e(eri, fcivec, norb, nelec, link_index=None):
 # no *.5 because FCIcontract_2e_spin0 only compute half of the contraction
     return pyscf.lib.transpose_sum(ci1, inplace=True).reshape(fcivec.shape)
 
+def contract_2e_multi(eri, fcivecs, norb, nelec, link_index=None):
+    '''Contract the 2-electron Hamiltonian with a list of singlet FCI vectors
+    in one pass over the link table, see
+    :func:`direct_spin1.contract_2e_multi`.
+    '''
+    eri = pyscf.ao2mo.restore(4, eri, norb)
+    link_index = _unpack(norb, nelec, link_index)
+    na, nlink = link_index.shape[:2]
+    nvec = len(fcivecs)
+    ci0 = numpy.empty((nvec,na*na))
+    for i, c in enumerate(fcivecs):
+        assert(c.size == na**2)
+        ci0[i] = c.ravel()
+    ci1 = numpy.empty_like(ci0)
+
+    libfci.FCIcontract_2e_spin0_multi(eri.ctypes.data_as(ctypes.c_void_p),
+                                      ci0.ctypes.data_as(ctypes.c_void_p),
+                                      ci1.ctypes.data_as(ctypes.c_void_p),
+                                      ctypes.c_int(nvec), ctypes.c_int(norb),
+                                      ctypes.c_int(na), ctypes.c_int(nlink),
+                                      link_index.ctypes.data_as(ctypes.c_void_p))
+    return [pyscf.lib.transpose_sum(ci1[i].reshape(na,na), inplace=True)
+            .reshape(numpy.shape(c)) for i, c in enumerate(fcivecs)]
+
 absorb_h1e = direct_spin1.absorb_h1e
 
 @pyscf.lib.with_doc(direct_spin1.make_hdiag.__doc__)
@@ -299,9 +323,9 @@ def kernel_ms0(fci, h1e, eri, norb, nelec, ci0=None, link_index=None,
     precond = fci.make_precond(hdiag, pw, pv, addr)
 
     h2e = fci.absorb_h1e(h1e, eri, norb, nelec, .5)
-    def hop(c):
-        hc = fci.contract_2e(h2e, c, norb, nelec, link_index)
-        return hc.ravel()
+    def hop(cs):
+        hcs = fci.contract_2e_multi(h2e, cs, norb, nelec, link_index)
+        return [hc.ravel() for hc in hcs]
 
 #TODO: check spin of initial guess
     if ci0 is None:
@@ -362,6 +386,19 @@ class FCISolver(direct_spin1.FCISolver):
     def contract_2e(self, eri, fcivec, norb, nelec, link_index=None, **kwargs):
         return contract_2e(eri, fcivec, norb, nelec, link_index, **kwargs)
 
+    def contract_2e_multi(self, eri, fcivecs, norb, nelec, link_index=None,
+                          **kwargs):
+        '''Contract the 2-electron Hamiltonian with a list of FCI vectors.
+        The batched kernel :func:`contract_2e_multi` is used if contract_2e
+        is not overwritten.
+        '''
+        if (getattr(self.contract_2e, '__func__', None) is
+            getattr(FCISolver.contract_2e, '__func__', FCISolver.contract_2e)):
+            return contract_2e_multi(eri, fcivecs, norb, nelec, link_index)
+        else:
+            return [self.contract_2e(eri, c, norb, nelec, link_index, **kwargs)
+                    for c in fcivecs]
+
     def get_init_guess(self, norb, nelec, nroots, hdiag):
         return get_init_guess(norb, nelec, nroots, hdiag)
 
@@ -111,6 +111,37 @@ def contract_2e(eri, fcivec, norb, nelec, link_index=None):
                                 link_indexb.ctypes.data_as(ctypes.c_void_p))
     return ci1
 
+def contract_2e_multi(eri, fcivecs, norb, nelec, link_index=None):
+    '''Contract the 2-electron Hamiltonian with a list of FCI vectors.  The
+    vectors are contracted in one pass over the link tables, and the
+    integrals are multiplied with the intermediates of all vectors in one
+    dgemm call.  See also :func:`contract_2e`.
+
+    Returns:
+        A list of the contracted FCI vectors.  Each has the shape of the
+        corresponding input vector.
+    '''
+    eri = pyscf.ao2mo.restore(4, eri, norb)
+    link_indexa, link_indexb = _unpack(norb, nelec, link_index)
+    na, nlinka = link_indexa.shape[:2]
+    nb, nlinkb = link_indexb.shape[:2]
+    nvec = len(fcivecs)
+    ci0 = numpy.empty((nvec,na*nb))
+    for i, c in enumerate(fcivecs):
+        assert(c.size == na*nb)
+        ci0[i] = c.ravel()
+    ci1 = numpy.empty_like(ci0)
+
+    libfci.FCIcontract_2e_spin1_multi(eri.ctypes.data_as(ctypes.c_void_p),
+                                      ci0.ctypes.data_as(ctypes.c_void_p),
+                                      ci1.ctypes.data_as(ctypes.c_void_p),
+                                      ctypes.c_int(nvec), ctypes.c_int(norb),
+                                      ctypes.c_int(na), ctypes.c_int(nb),
+                                      ctypes.c_int(nlinka), ctypes.c_int(nlinkb),
+                                      link_indexa.ctypes.data_as(ctypes.c_void_p),
+                                      link_indexb.ctypes.data_as(ctypes.c_void_p))
+    return [ci1[i].reshape(numpy.shape(c)) for i, c in enumerate(fcivecs)]
+
 def make_hdiag(h1e, eri, norb, nelec):
     '''Diagonal Hamiltonian for Davidson preconditioner
     '''
@@ -410,9 +441,10 @@ def kernel_ms1(fci, h1e, eri, norb, nelec, ci0=None, link_index=None,
     precond = fci.make_precond(hdiag, pw, pv, addr)
 
     h2e = fci.absorb_h1e(h1e, eri, norb, nelec, .5)
-    def hop(c):
-        hc = fci.contract_2e(h2e, c, norb, nelec, (link_indexa,link_indexb))
-        return hc.ravel()
+    def hop(cs):
+        hcs = fci.contract_2e_multi(h2e, cs, norb, nelec,
+                                    (link_indexa,link_indexb))
+        return [hc.ravel() for hc in hcs]
 
     if ci0 is None:
         if hasattr(fci, 'get_init_guess'):
@@ -497,6 +529,11 @@ class FCISolver(pyscf.lib.StreamObject):
         self.davidson_only = False
         self.nroots = 1
         self.pspace_size = 400
+        # Keep the Davidson subspace in single precision and recompute H*x
+        # instead of storing it.  It reduces the memory footprint of the
+        # subspace by ~4 times at the cost of one more contract_2e per root
+        # in each iteration.
+        self.davidson_lowmem = False
 # Initialize symmetry attributes for the compatibility with direct_spin1_symm
 # solver.  They are not used by direct_spin1 solver.
         self.orbsym = None
@@ -517,6 +554,7 @@ class FCISolver(pyscf.lib.StreamObject):
         log.info('davidson only = %s', self.davidson_only)
         log.info('nroots = %d', self.nroots)
         log.info('pspace_size = %d', self.pspace_size)
+        log.info('davidson_lowmem = %s', self.davidson_lowmem)
         return self
 
 
@@ -540,12 +578,37 @@ class FCISolver(pyscf.lib.StreamObject):
     def contract_2e(self, eri, fcivec, norb, nelec, link_index=None, **kwargs):
         return contract_2e(eri, fcivec, norb, nelec, link_index, **kwargs)
 
+    def contract_2e_multi(self, eri, fcivecs, norb, nelec, link_index=None,
+                          **kwargs):
+        '''Contract the 2-electron Hamiltonian with a list of FCI vectors.
+        The batched kernel :func:`contract_2e_multi` is used if contract_2e
+        is not overwritten.  Otherwise, contract_2e is called for each
+        vector.
+        '''
+        if (getattr(self.contract_2e, '__func__', None) is
+            getattr(FCISolver.contract_2e, '__func__', FCISolver.contract_2e)):
+            return contract_2e_multi(eri, fcivecs, norb, nelec, link_index)
+        else:
+            return [self.contract_2e(eri, c, norb, nelec, link_index, **kwargs)
+                    for c in fcivecs]
+
     def eig(self, op, x0, precond, **kwargs):
-        if kwargs['nroots'] == 1 and x0[0].size > 6.5e7: # 500MB
-            lessio = True
+        '''Davidson diagonalization.  op takes a list of vectors and returns
+        the list of H*x, so that the new trial vectors of all roots can be
+        contracted together.'''
+        if getattr(self, 'davidson_lowmem', False):
+            e, c = pyscf.lib.davidson1_lowmem(op, x0, precond, **kwargs)
+        else:
+            if kwargs['nroots'] == 1 and x0[0].size > 6.5e7: # 500MB
+                lessio = True
+            else:
+                lessio = False
+            e, c = pyscf.lib.davidson1(op, x0, precond, lessio=lessio,
+                                       **kwargs)
+        if kwargs['nroots'] == 1:
+            return e[0], c[0]
         else:
-            lessio = False
-        return pyscf.lib.davidson(op, x0, precond, lessio=lessio, **kwargs)
+            return e, c
 
     def make_precond(self, hdiag, pspaceig, pspaceci, addr):
         if pspaceig is None:
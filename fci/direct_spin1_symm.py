@@ -94,6 +94,41 @@ def contract_2e(eri, fcivec, norb, nelec, link_index=None, orbsym=None):
                                      ctypes.c_int(len(dimirrep)))
     return ci1
 
+def contract_2e_multi(eri, fcivecs, norb, nelec, link_index=None, orbsym=None):
+    '''Contract the 2-electron Hamiltonian with a list of FCI vectors in one
+    pass over the link tables, see :func:`direct_spin1.contract_2e_multi`.
+    '''
+    if orbsym is None:
+        return direct_spin1.contract_2e_multi(eri, fcivecs, norb, nelec,
+                                              link_index)
+
+    eri = pyscf.ao2mo.restore(4, eri, norb)
+    link_indexa, link_indexb = direct_spin1._unpack(norb, nelec, link_index)
+    na, nlinka = link_indexa.shape[:2]
+    nb, nlinkb = link_indexb.shape[:2]
+    nvec = len(fcivecs)
+    ci0 = numpy.empty((nvec,na*nb))
+    for i, c in enumerate(fcivecs):
+        assert(c.size == na*nb)
+        ci0[i] = c.ravel()
+    ci1 = numpy.empty_like(ci0)
+
+    eri, link_indexa, dimirrep = reorder4irrep(eri, norb, link_indexa, orbsym)
+    link_indexb = reorder4irrep(eri, norb, link_indexb, orbsym)[1]
+    dimirrep = numpy.array(dimirrep, dtype=numpy.int32)
+
+    libfci.FCIcontract_2e_spin1_symm_multi(eri.ctypes.data_as(ctypes.c_void_p),
+                                           ci0.ctypes.data_as(ctypes.c_void_p),
+                                           ci1.ctypes.data_as(ctypes.c_void_p),
+                                           ctypes.c_int(nvec), ctypes.c_int(norb),
+                                           ctypes.c_int(na), ctypes.c_int(nb),
+                                           ctypes.c_int(nlinka), ctypes.c_int(nlinkb),
+                                           link_indexa.ctypes.data_as(ctypes.c_void_p),
+                                           link_indexb.ctypes.data_as(ctypes.c_void_p),
+                                           dimirrep.ctypes.data_as(ctypes.c_void_p),
+                                           ctypes.c_int(len(dimirrep)))
+    return [ci1[i].reshape(numpy.shape(c)) for i, c in enumerate(fcivecs)]
+
 
 def kernel(h1e, eri, norb, nelec, ci0=None, level_shift=1e-3, tol=1e-10,
            lindep=1e-14, max_cycle=50, max_space=12, nroots=1,
@@ -248,6 +283,24 @@ class FCISolver(direct_spin1.FCISolver):
             orbsym = self.orbsym
         return contract_2e(eri, fcivec, norb, nelec, link_index, orbsym, **kwargs)
 
+    def contract_2e_multi(self, eri, fcivecs, norb, nelec, link_index=None,
+                          orbsym=None, **kwargs):
+        '''Contract the 2-electron Hamiltonian with a list of FCI vectors.
+        The batched kernel :func:`contract_2e_multi` is used if contract_2e
+        is not overwritten.
+        '''
+        if (getattr(self.contract_2e, '__func__', None) is
+            getattr(FCISolver.contract_2e, '__func__', FCISolver.contract_2e)):
+            if orbsym is None:
+                orbsym = self.orbsym
+            return contract_2e_multi(eri, fcivecs, norb, nelec, link_index,
+                                     orbsym)
+        else:
+            if orbsym is not None:
+                kwargs['orbsym'] = orbsym
+            return [self.contract_2e(eri, c, norb, nelec, link_index, **kwargs)
+                    for c in fcivecs]
+
     def get_init_guess(self, norb, nelec, nroots, hdiag):
         wfnsym = _id_wfnsym(self, norb, nelec, self.wfnsym)
         return get_init_guess(norb, nelec, nroots, hdiag, self.orbsym, wfnsym)
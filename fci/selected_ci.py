@@ -0,0 +1,724 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+Selected CI
+
+The CI space is the direct product of a selected set of alpha strings and a
+selected set of beta strings.  As in direct_spin1, the CI coefficients are
+stored in a 2D array [alpha,beta].  The binary strings (int64, see
+cistring.gen_strings4orblist) of the rows and columns are attached to the CI
+vector as the attribute _strs.
+
+The string space is enlarged iteratively by the heat-bath criterion
+(JCTC, 12, 3674).  Starting from the important strings of the current
+wavefunction, a single or double excitation is selected if
+|<new|H|old>| * max|c_old| > select_cutoff.  The address of a string in the
+selected space is looked up by bisection of the sorted string list.
+
+The Hamiltonian is contracted exactly within the selected space
+
+    H = \sum_{pq,rs} h2e_{pq,rs} E_pq E_rs
+      = H_aa + H_bb + 2 \sum_{pq,rs} h2e_{pq,rs} E^a_pq E^b_rs
+
+The alpha-beta part only couples the selected strings.  The same-spin part
+is evaluated as E_pq E_rs = p^+ r^+ s q + \delta_{qr} E_ps, in which the
+N-2 electron strings of the annihilation pairs are enumerated so that the
+intermediate states are not truncated by the selection.
+'''
+
+import sys
+import time
+import numpy
+import scipy.sparse
+import pyscf.lib
+from pyscf.lib import logger
+from pyscf import ao2mo
+from pyscf.fci import direct_spin1
+from pyscf.fci import rdm
+
+
+class _SCIvector(numpy.ndarray):
+    '''CI coefficients with the selected alpha and beta strings (_strs)'''
+    def __array_finalize__(self, obj):
+        self._strs = getattr(obj, '_strs', None)
+
+def as_SCIvector(ci, ci_strs):
+    ci = numpy.asarray(ci).view(_SCIvector)
+    ci._strs = ci_strs
+    return ci
+
+def _unpack_nelec(nelec):
+    if isinstance(nelec, (int, numpy.number)):
+        nelecb = nelec//2
+        neleca = nelec - nelecb
+        return neleca, nelecb
+    else:
+        return nelec
+
+def _occ(strs, norb):
+    '''occ[i,p] = True if orbital p is occupied in string i'''
+    return (strs.reshape(-1,1) >> numpy.arange(norb)) & 1 == 1
+
+def _nbelow(occ):
+    '''nbelow[i,p] = the number of occupied orbitals below p in string i'''
+    nbelow = numpy.zeros(occ.shape, dtype=int)
+    nbelow[:,1:] = numpy.cumsum(occ[:,:-1], axis=1)
+    return nbelow
+
+def _lookup(strs, target):
+    '''Addresses of the target strings in the sorted string list.  Returns the
+    addresses and the mask of the targets which are found in strs'''
+    addr = numpy.searchsorted(strs, target)
+    addr[addr == len(strs)] = 0
+    mask = strs[addr] == target
+    return addr[mask], mask
+
+def cre_des_linkstr(strs, norb):
+    r'''The operator :math:`E_{pq} = p^+ q` in the selected strings as a
+    sparse matrix.  The row index is (I,p*norb+q) and the column index is J,
+    for the matrix element <I|p^+ q|J>.
+    '''
+    strs = numpy.asarray(strs, dtype=numpy.int64)
+    nstr = len(strs)
+    nn = norb * norb
+    occ = _occ(strs, norb)
+    nbelow = _nbelow(occ)
+    rows = []
+    cols = []
+    signs = []
+    for p in range(norb):
+        for q in range(norb):
+            if p == q:
+                str0 = numpy.where(occ[:,p])[0]
+                rows.append(str0*nn+p*norb+p)
+                cols.append(str0)
+                signs.append(numpy.ones(len(str0)))
+            else:
+                str0 = numpy.where(occ[:,q] & ~occ[:,p])[0]
+                str1 = strs[str0] ^ numpy.int64((1<<p) | (1<<q))
+                str1, mask = _lookup(strs, str1)
+                str0 = str0[mask]
+                # annihilate q then create p
+                nb = nbelow[str0,q] + nbelow[str0,p]
+                if p > q:
+                    nb -= 1
+                rows.append(str1*nn+p*norb+q)
+                cols.append(str0)
+                signs.append(1 - 2*(nb % 2))
+    rows = numpy.hstack(rows)
+    cols = numpy.hstack(cols)
+    signs = numpy.hstack(signs).astype(numpy.double)
+    return scipy.sparse.csr_matrix((signs, (rows, cols)), shape=(nstr*nn,nstr))
+
+def des_des_linkstr(strs, norb):
+    r'''The pairs of the selected strings which are linked by the same-spin
+    2e operator :math:`(i j)^\dagger (k l)`, i < j, k < l.  (i j) annihilates
+    j then i.  The N-2 electron intermediate strings are enumerated from the
+    selected strings, so that all pairs <I|(i j)^\dagger|K><K|(k l)|J> are
+    found.
+
+    Returns:
+        I, J, (ij)*npair+(kl), sign.  (ij) = j*(j-1)/2+i is the index of
+        the annihilation pair.
+    '''
+    strs = numpy.asarray(strs, dtype=numpy.int64)
+    npair = norb * (norb-1) // 2
+    occ = _occ(strs, norb)
+    nbelow = _nbelow(occ)
+    str0s = []
+    str1s = []
+    ijs = []
+    signs = []
+    for j in range(norb):
+        for i in range(j):
+            str0 = numpy.where(occ[:,i] & occ[:,j])[0]
+            str0s.append(str0)
+            str1s.append(strs[str0] ^ numpy.int64((1<<i) | (1<<j)))
+            ijs.append(numpy.repeat(j*(j-1)//2+i, len(str0)))
+            signs.append(1 - 2*((nbelow[str0,i]+nbelow[str0,j]) % 2))
+    str0s = numpy.hstack(str0s).astype(int)
+    str1s = numpy.hstack(str1s).astype(numpy.int64)
+    ijs = numpy.hstack(ijs).astype(int)
+    signs = numpy.hstack(signs).astype(int)
+
+    # Join the entries which have the same intermediate string
+    idx = numpy.argsort(str1s, kind='mergesort')
+    str0s = str0s[idx]
+    str1s = str1s[idx]
+    ijs = ijs[idx]
+    signs = signs[idx]
+    nent = len(str1s)
+    bra = []
+    ket = []
+    pairs = []
+    pair_signs = []
+    for d in range(nent):
+        e0 = numpy.arange(nent-d)
+        mask = str1s[e0] == str1s[e0+d]
+        if not mask.any():
+            break
+        e0 = e0[mask]
+        e1 = e0 + d
+        bra.append(str0s[e0])
+        ket.append(str0s[e1])
+        pairs.append(ijs[e0]*npair+ijs[e1])
+        pair_signs.append(signs[e0]*signs[e1])
+        if d > 0:
+            bra.append(str0s[e1])
+            ket.append(str0s[e0])
+            pairs.append(ijs[e1]*npair+ijs[e0])
+            pair_signs.append(signs[e0]*signs[e1])
+    if len(bra) == 0:
+        return (numpy.zeros(0, dtype=int),) * 3 + (numpy.zeros(0),)
+    return (numpy.hstack(bra), numpy.hstack(ket), numpy.hstack(pairs),
+            numpy.hstack(pair_signs).astype(numpy.double))
+
+def _all_linkstr_index(ci_strs, norb, nelec):
+    neleca, nelecb = _unpack_nelec(nelec)
+    cd_a = cre_des_linkstr(ci_strs[0], norb)
+    dd_a = des_des_linkstr(ci_strs[0], norb)
+    if neleca == nelecb and numpy.array_equal(ci_strs[0], ci_strs[1]):
+        cd_b, dd_b = cd_a, dd_a
+    else:
+        cd_b = cre_des_linkstr(ci_strs[1], norb)
+        dd_b = des_des_linkstr(ci_strs[1], norb)
+    return cd_a, dd_a, cd_b, dd_b
+
+def _same_spin_op(eri, norb):
+    '''The antisymmetrized 2e integrals for the annihilation pairs (i<j) and
+    the 1e operator from the commutator of E_pq E_rs
+    '''
+    # h[r,p,s,q] = eri[p,q,r,s] for (r p)^+ (s q)
+    h = eri.transpose(2,0,3,1)
+    h = h - h.transpose(1,0,2,3)
+    h = h - h.transpose(0,1,3,2)
+    j, i = numpy.tril_indices(norb, -1)
+    wpair = h[i[:,None],j[:,None],i,j]
+    f1e = numpy.einsum('pqqs->ps', eri)
+    return wpair, f1e
+
+def _same_spin_hamiltonian(wpair, f1e, cd, dd):
+    '''The same-spin part of the Hamiltonian as a sparse matrix'''
+    nstr = cd.shape[1]
+    nn = f1e.size
+    h = scipy.sparse.kron(scipy.sparse.identity(nstr), f1e.reshape(1,nn),
+                          format='csr').dot(cd)
+    bra, ket, pairs, signs = dd
+    if len(bra) > 0:
+        h = h + scipy.sparse.csr_matrix((signs*wpair.ravel()[pairs], (bra, ket)),
+                                        shape=(nstr,nstr))
+    return h
+
+def same_spin_hamiltonian(eri, norb, link_index):
+    '''The sparse same-spin Hamiltonians (H_aa, H_bb) in the selected space.
+    They only depend on eri and link_index, so they can be built once and
+    passed to :func:`contract_2e` for the Davidson iterations.
+    '''
+    cd_a, dd_a, cd_b, dd_b = link_index
+    eri = ao2mo.restore(1, eri, norb)
+    wpair, f1e = _same_spin_op(eri, norb)
+    haa = _same_spin_hamiltonian(wpair, f1e, cd_a, dd_a)
+    if dd_b is dd_a:
+        hbb = haa
+    else:
+        hbb = _same_spin_hamiltonian(wpair, f1e, cd_b, dd_b)
+    return haa, hbb
+
+def contract_2e(eri, civec_strs, norb, nelec, link_index=None, hss=None):
+    r'''Contract the 2-electron Hamiltonian with the CI vector in the
+    selected space.  Note eri is the 2e hamiltonian with the 1e part
+    absorbed, see :func:`direct_spin1.contract_2e`.  hss is the
+    (H_aa, H_bb) from :func:`same_spin_hamiltonian`.
+    '''
+    if link_index is None:
+        link_index = _all_linkstr_index(civec_strs._strs, norb, nelec)
+    cd_a, dd_a, cd_b, dd_b = link_index
+    na = cd_a.shape[1]
+    nb = cd_b.shape[1]
+    nn = norb * norb
+    ci0 = numpy.asarray(civec_strs).reshape(na,nb)
+    if hss is None:
+        hss = same_spin_hamiltonian(eri, norb, link_index)
+    eri = ao2mo.restore(1, eri, norb)
+    max_memory = max(400, pyscf.lib.parameters.MEMORY_MAX -
+                     pyscf.lib.current_memory()[0])
+
+    haa, hbb = hss
+    ci1 = haa.dot(ci0)
+    ci1 += hbb.dot(ci0.T).T
+
+    # 2 \sum h2e_{pq,rs} E^a_pq E^b_rs, for a block of beta strings at a time
+    eri = eri.reshape(nn,nn)
+    blksize = max(1, int(max_memory*1e6/8/(na*nn*3)))
+    for p0, p1 in pyscf.lib.prange(0, nb, blksize):
+        t1 = cd_b[p0*nn:p1*nn].dot(ci0.T).T
+        t1 = pyscf.lib.dot(t1.reshape(-1,nn), eri)
+        t1 = t1.reshape(na,p1-p0,nn).transpose(0,2,1).reshape(na*nn,p1-p0)
+        ci1[:,p0:p1] += cd_a.T.dot(t1) * 2
+        t1 = None
+    if isinstance(civec_strs, _SCIvector):
+        ci1 = as_SCIvector(ci1, civec_strs._strs)
+    return ci1
+
+def make_hdiag(h1e, eri, ci_strs, norb, nelec):
+    '''Diagonal Hamiltonian in the selected space'''
+    eri = ao2mo.restore(1, eri, norb)
+    diagj = numpy.einsum('iijj->ij', eri)
+    diagk = numpy.einsum('ijji->ij', eri)
+    occa = _occ(numpy.asarray(ci_strs[0]), norb).astype(numpy.double)
+    occb = _occ(numpy.asarray(ci_strs[1]), norb).astype(numpy.double)
+    h1diag = h1e.diagonal()
+    ea = occa.dot(h1diag) + numpy.einsum('ai,ai->a', occa.dot(diagj-diagk), occa) * .5
+    eb = occb.dot(h1diag) + numpy.einsum('ai,ai->a', occb.dot(diagj-diagk), occb) * .5
+    hdiag = ea.reshape(-1,1) + eb + pyscf.lib.dot(occa, diagj).dot(occb.T)
+    return hdiag.ravel()
+
+def _heat_bath_ints(h1e, eri, norb):
+    '''Upper bounds of |<new|H|old>| for single and same-spin double
+    excitations.  hsingle[a,i] for i->a; hdouble[a,b,i,j] for ij->ab
+    '''
+    eri = ao2mo.restore(1, eri, norb)
+    # An alpha single excitation couples to beta single excitations by (ai|jb)
+    hsingle = numpy.maximum(abs(h1e), abs(eri).max(axis=(2,3)))
+    # hdouble[a,b,i,j] = |(ai|bj) - (aj|bi)|
+    hdouble = eri.transpose(0,2,1,3)
+    hdouble = abs(hdouble - hdouble.transpose(0,1,3,2))
+    return hsingle, hdouble
+
+def _select_strs(strs, cmax, hsingle, hdouble, norb, select_cutoff):
+    '''The strings generated from strs by the heat-bath criterion'''
+    occ = _occ(strs, norb)
+    newstrs = [strs]
+    cmax_max = cmax.max()
+    for i in range(norb):
+        for a in range(norb):
+            if a != i and hsingle[a,i] * cmax_max > select_cutoff:
+                mask = (occ[:,i] & ~occ[:,a] &
+                        (cmax * hsingle[a,i] > select_cutoff))
+                newstrs.append(strs[mask] ^ numpy.int64((1<<i) | (1<<a)))
+
+    hdmax = hdouble.max(axis=(0,1))
+    bs, as_ = numpy.tril_indices(norb, -1)
+    for j in range(norb):
+        for i in range(j):
+            mask = occ[:,i] & occ[:,j] & (cmax * hdmax[i,j] > select_cutoff)
+            if not mask.any():
+                continue
+            strs_ij = strs[mask]
+            occ_ij = occ[mask]
+            cmax_ij = cmax[mask]
+            hij = hdouble[as_,bs,i,j]
+            for k in numpy.where(hij * cmax_ij.max() > select_cutoff)[0]:
+                a, b = as_[k], bs[k]
+                mask = (~occ_ij[:,a] & ~occ_ij[:,b] &
+                        (cmax_ij * hij[k] > select_cutoff))
+                newstrs.append(strs_ij[mask] ^
+                               numpy.int64((1<<i) | (1<<j) | (1<<a) | (1<<b)))
+    return numpy.unique(numpy.hstack(newstrs).astype(numpy.int64))
+
+def enlarge_space(myci, civec_strs, h1e, eri, norb, nelec):
+    '''Enlarge the selected strings by the heat-bath criterion.
+
+    Returns:
+        The new alpha and beta strings
+    '''
+    if isinstance(civec_strs, (tuple, list)):
+        ci_strs = civec_strs[0]._strs
+        cs = numpy.max([abs(numpy.asarray(c)) for c in civec_strs], axis=0)
+    else:
+        ci_strs = civec_strs._strs
+        cs = abs(numpy.asarray(civec_strs))
+    strsa, strsb = ci_strs
+    cs = cs.reshape(len(strsa),len(strsb))
+    neleca, nelecb = _unpack_nelec(nelec)
+    hsingle, hdouble = _heat_bath_ints(h1e, eri, norb)
+
+    cmaxa = cs.max(axis=1)
+    cmaxb = cs.max(axis=0)
+    mask = cmaxa > myci.ci_coeff_cutoff
+    strsa_new = _select_strs(strsa[mask], cmaxa[mask], hsingle, hdouble,
+                             norb, myci.select_cutoff)
+    mask = cmaxb > myci.ci_coeff_cutoff
+    strsb_new = _select_strs(strsb[mask], cmaxb[mask], hsingle, hdouble,
+                             norb, myci.select_cutoff)
+    strsa_new = numpy.union1d(strsa, strsa_new)
+    strsb_new = numpy.union1d(strsb, strsb_new)
+    # Keep the alpha and beta strings identical to preserve the spin symmetry
+    if neleca == nelecb:
+        strsa_new = strsb_new = numpy.union1d(strsa_new, strsb_new)
+    return strsa_new, strsb_new
+
+def transform_ci(civec_strs, ci_strs):
+    '''Project the CI vector onto the new string space ci_strs'''
+    strsa, strsb = civec_strs._strs
+    addra, maska = _lookup(ci_strs[0], strsa)
+    addrb, maskb = _lookup(ci_strs[1], strsb)
+    ci0 = numpy.asarray(civec_strs).reshape(len(strsa),len(strsb))
+    ci1 = numpy.zeros((len(ci_strs[0]),len(ci_strs[1])))
+    ci1[addra[:,None],addrb] = ci0[maska][:,maskb]
+    return as_SCIvector(ci1, ci_strs)
+
+def _hf_strs(nelec):
+    neleca, nelecb = _unpack_nelec(nelec)
+    return (numpy.asarray([(1<<neleca)-1], dtype=numpy.int64),
+            numpy.asarray([(1<<nelecb)-1], dtype=numpy.int64))
+
+
+def kernel_fixed_space(myci, h1e, eri, norb, nelec, ci_strs, ci0=None,
+                       tol=None, lindep=None, max_cycle=None, max_space=None,
+                       nroots=None, davidson_only=None, max_memory=None,
+                       verbose=None, **kwargs):
+    '''Solve the CI eigenvalue problem in the given string space ci_strs'''
+    if nroots is None: nroots = myci.nroots
+    if tol is None: tol = myci.conv_tol
+    if lindep is None: lindep = myci.lindep
+    if max_cycle is None: max_cycle = myci.max_cycle
+    if max_space is None: max_space = myci.max_space
+    if max_memory is None: max_memory = myci.max_memory
+    if verbose is None: verbose = logger.Logger(myci.stdout, myci.verbose)
+
+    na = len(ci_strs[0])
+    nb = len(ci_strs[1])
+    h2e = direct_spin1.absorb_h1e(h1e, eri, norb, nelec, .5)
+    link_index = _all_linkstr_index(ci_strs, norb, nelec)
+    hdiag = myci.make_hdiag(h1e, eri, ci_strs, norb, nelec)
+    nroots = min(hdiag.size, nroots)
+    hss = same_spin_hamiltonian(h2e, norb, link_index)
+
+    def hop(xs):
+        return [myci.contract_2e(h2e, x, norb, nelec, link_index,
+                                 hss=hss).ravel() for x in xs]
+    precond = direct_spin1.make_diag_precond(hdiag, None, None, None,
+                                             myci.level_shift)
+
+    if ci0 is None:
+        ci0 = []
+    elif isinstance(ci0, numpy.ndarray) and ci0.size == na*nb:
+        ci0 = [ci0.ravel()]
+    else:
+        ci0 = [numpy.asarray(x).ravel() for x in ci0]
+    if len(ci0) < nroots:
+        for i in numpy.argsort(hdiag)[:nroots-len(ci0)]:
+            x = numpy.zeros(na*nb)
+            x[i] = 1
+            ci0.append(x)
+
+    e, c = myci.eig(hop, ci0, precond, tol=tol, lindep=lindep,
+                    max_cycle=max_cycle, max_space=max_space, nroots=nroots,
+                    max_memory=max_memory, verbose=verbose, **kwargs)
+    if nroots > 1:
+        return e, [as_SCIvector(x.reshape(na,nb), ci_strs) for x in c]
+    else:
+        return e, as_SCIvector(c.reshape(na,nb), ci_strs)
+
+def kernel_float_space(myci, h1e, eri, norb, nelec, ci0=None,
+                       tol=None, lindep=None, max_cycle=None, max_space=None,
+                       nroots=None, davidson_only=None, max_memory=None,
+                       verbose=None, **kwargs):
+    '''Solve the CI eigenvalue problem and enlarge the string space by the
+    heat-bath criterion until the space (or the energy) is converged.
+    '''
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        if verbose is None: verbose = myci.verbose
+        log = logger.Logger(myci.stdout, verbose)
+    if nroots is None: nroots = myci.nroots
+    if tol is None: tol = myci.conv_tol
+    eri = ao2mo.restore(1, eri, norb)
+
+    if ci0 is None:
+        ci0 = [as_SCIvector(numpy.ones((1,1)), _hf_strs(nelec))]
+    elif isinstance(ci0, _SCIvector):
+        ci0 = [ci0]
+
+    e_last = numpy.zeros(nroots)
+    for icycle in range(myci.select_max_cycle):
+        ci_strs = ci0[0]._strs
+        ci_strs_new = myci.enlarge_space(ci0, h1e, eri, norb, nelec)
+        space_conv = (len(ci_strs_new[0]) == len(ci_strs[0]) and
+                      len(ci_strs_new[1]) == len(ci_strs[1]))
+        ci0 = [transform_ci(c, ci_strs_new) for c in ci0]
+        e, ci0 = kernel_fixed_space(myci, h1e, eri, norb, nelec, ci_strs_new,
+                                    ci0, tol, lindep, max_cycle, max_space,
+                                    nroots, davidson_only, max_memory, log,
+                                    **kwargs)
+        # kernel_fixed_space may return fewer roots than requested when the
+        # selected space is small
+        if numpy.ndim(e) == 0:
+            e = [e]
+            ci0 = [ci0]
+        e = numpy.asarray(e)
+        log.debug('Cycle %d  CI space %s  E = %s', icycle,
+                  (len(ci_strs_new[0]), len(ci_strs_new[1])), e)
+        n = min(len(e), len(e_last))
+        if space_conv or numpy.all(abs(e[:n]-e_last[:n]) < tol):
+            break
+        e_last = e
+    log.info('Selected CI space %d x %d',
+             len(ci_strs_new[0]), len(ci_strs_new[1]))
+
+    if nroots == 1:
+        return e[0], ci0[0]
+    else:
+        return e, ci0
+
+
+def make_rdm1s(civec_strs, norb, nelec, link_index=None):
+    '''Spin searated 1-particle density matrices, (alpha,beta)'''
+    if link_index is None:
+        link_index = _all_linkstr_index(civec_strs._strs, norb, nelec)
+    cd_a, dd_a, cd_b, dd_b = link_index
+    na = cd_a.shape[1]
+    nb = cd_b.shape[1]
+    ci0 = numpy.asarray(civec_strs).reshape(na,nb)
+    rdm1a = cd_a.dot(ci0).reshape(na,norb*norb,nb)
+    rdm1a = numpy.einsum('ixj,ij->x', rdm1a, ci0).reshape(norb,norb)
+    rdm1b = cd_b.dot(ci0.T).reshape(nb,norb*norb,na)
+    rdm1b = numpy.einsum('jxi,ij->x', rdm1b, ci0).reshape(norb,norb)
+    return rdm1a, rdm1b
+
+def make_rdm1(civec_strs, norb, nelec, link_index=None):
+    '''spin-traced 1-particle density matrix'''
+    rdm1a, rdm1b = make_rdm1s(civec_strs, norb, nelec, link_index)
+    return rdm1a + rdm1b
+
+def _same_spin_rdm2(ci0, norb, dd, rdm1):
+    r'''Same-spin <E_pq E_rs> = <p^+ r^+ s q> + \delta_{qr} <p^+ s>.  The
+    first term is computed from the annihilation pairs <(i j)^\dagger (k l)>
+    so that the N-2 intermediate states are not truncated by the selection.
+    ci0 is [spin-string, other-spin-string].
+    '''
+    npair = norb * (norb-1) // 2
+    bra, ket, pairs, signs = dd
+    dpair = numpy.zeros(npair*npair)
+    nent = len(bra)
+    if nent > 0:
+        max_memory = max(400, pyscf.lib.parameters.MEMORY_MAX -
+                         pyscf.lib.current_memory()[0])
+        blksize = max(1, int(max_memory*1e6/8/(ci0.shape[1]*3)))
+        for p0, p1 in pyscf.lib.prange(0, nent, blksize):
+            ov = numpy.einsum('ij,ij->i', ci0[bra[p0:p1]], ci0[ket[p0:p1]])
+            dpair += numpy.bincount(pairs[p0:p1], weights=signs[p0:p1]*ov,
+                                    minlength=npair*npair)
+    dpair = dpair.reshape(npair,npair)
+    # g[p,r,s,q] = <p^+ r^+ s q>, antisymmetric in (p,r) and (s,q)
+    j, i = numpy.tril_indices(norb, -1)
+    g = numpy.zeros((norb,)*4)
+    g[j[:,None],i[:,None],i,j] = dpair
+    g[i[:,None],j[:,None],i,j] = -dpair
+    g[j[:,None],i[:,None],j,i] = -dpair
+    g[i[:,None],j[:,None],j,i] = dpair
+    rdm2 = numpy.asarray(g.transpose(0,3,1,2), order='C')
+    for k in range(norb):
+        rdm2[:,k,k,:] += rdm1
+    return rdm2
+
+def make_rdm12(civec_strs, norb, nelec, link_index=None, reorder=True):
+    r'''Spin traced 1- and 2-particle density matrices,
+
+    NOTE the 2pdm is :math:`\langle p^\dagger q^\dagger s r\rangle` but is
+    stored as [p,r,q,s]
+    '''
+    if link_index is None:
+        link_index = _all_linkstr_index(civec_strs._strs, norb, nelec)
+    cd_a, dd_a, cd_b, dd_b = link_index
+    na = cd_a.shape[1]
+    nb = cd_b.shape[1]
+    nn = norb * norb
+    ci0 = numpy.asarray(civec_strs).reshape(na,nb)
+    rdm1a, rdm1b = make_rdm1s(ci0, norb, nelec, link_index)
+    rdm2 = _same_spin_rdm2(ci0, norb, dd_a, rdm1a)
+    rdm2 += _same_spin_rdm2(ci0.T, norb, dd_b, rdm1b)
+
+    # <E^a_pq E^b_rs> + <E^b_pq E^a_rs>.  The intermediate states of
+    # <E^a_qp c|E^b_rs c> are in the selected space.
+    max_memory = max(400, pyscf.lib.parameters.MEMORY_MAX -
+                     pyscf.lib.current_memory()[0])
+    blksize = max(1, int(max_memory*1e6/8/(na*nn*3)))
+    dm2ab = numpy.zeros((nn,nn))
+    for p0, p1 in pyscf.lib.prange(0, nb, blksize):
+        ta = cd_a.dot(ci0[:,p0:p1]).reshape(na,nn,p1-p0).transpose(0,2,1)
+        tb = cd_b[p0*nn:p1*nn].dot(ci0.T).T.reshape(na,p1-p0,nn)
+        dm2ab += pyscf.lib.dot(ta.reshape(-1,nn).T, tb.reshape(-1,nn))
+        ta = tb = None
+    dm2ab = dm2ab + dm2ab.T
+    rdm2 += dm2ab.reshape((norb,)*4).transpose(1,0,2,3)
+    rdm1 = rdm1a + rdm1b
+    if reorder:
+        rdm1, rdm2 = rdm.reorder_rdm(rdm1, rdm2, inplace=True)
+    return rdm1, rdm2
+
+def spin_square(civec_strs, norb, nelec, link_index=None):
+    r'''Spin square of the CI vector in the selected space.
+
+    S^2 = S_- S_+ + S_z (S_z + 1),  S_- S_+ = N_b - \sum_{pq} E^a_qp E^b_pq
+    '''
+    neleca, nelecb = _unpack_nelec(nelec)
+    if link_index is None:
+        link_index = _all_linkstr_index(civec_strs._strs, norb, nelec)
+    cd_a, dd_a, cd_b, dd_b = link_index
+    na = cd_a.shape[1]
+    nb = cd_b.shape[1]
+    nn = norb * norb
+    ci0 = numpy.asarray(civec_strs).reshape(na,nb)
+    ta = cd_a.dot(ci0).reshape(na,nn,nb)
+    tb = cd_b.dot(ci0.T).reshape(nb,nn,na)
+    # <E^a_qp E^b_pq> = <E^a_pq c|E^b_pq c>
+    ss = nelecb - numpy.einsum('ixj,jxi->', ta, tb)
+    sz = (neleca - nelecb) * .5
+    ss += sz * (sz + 1)
+    s = numpy.sqrt(ss+.25) - .5
+    multip = s*2+1
+    return ss, multip
+
+
+class SCI(direct_spin1.FCISolver):
+    '''Selected CI solver
+
+    Attributes:
+        select_cutoff : float
+            Threshold of the heat-bath criterion |<new|H|old>| * |c_old|.
+            Default is 5e-3.  The solution approaches FCI as select_cutoff
+            goes to 0.
+        ci_coeff_cutoff : float
+            Strings whose largest CI coefficient is smaller than
+            ci_coeff_cutoff do not generate new strings.  Default is 5e-4.
+        select_max_cycle : int
+            Max number of cycles to enlarge the string space.  Default is 50.
+
+    Saved results
+
+        The CI vectors are :class:`_SCIvector`, the 2D CI coefficients with
+        the attribute _strs, the selected alpha and beta strings.
+    '''
+    def __init__(self, mol=None):
+        direct_spin1.FCISolver.__init__(self, mol)
+        self.select_cutoff = 5e-3
+        self.ci_coeff_cutoff = 5e-4
+        self.select_max_cycle = 50
+        self._keys = self._keys.union(['select_cutoff', 'ci_coeff_cutoff',
+                                       'select_max_cycle'])
+
+    def dump_flags(self, verbose=None):
+        direct_spin1.FCISolver.dump_flags(self, verbose)
+        if verbose is None: verbose = self.verbose
+        log = logger.Logger(self.stdout, verbose)
+        log.info('select_cutoff = %g', self.select_cutoff)
+        log.info('ci_coeff_cutoff = %g', self.ci_coeff_cutoff)
+        log.info('select_max_cycle = %d', self.select_max_cycle)
+        return self
+
+    @pyscf.lib.with_doc(contract_2e.__doc__)
+    def contract_2e(self, eri, civec_strs, norb, nelec, link_index=None,
+                    hss=None, **kwargs):
+        return contract_2e(eri, civec_strs, norb, nelec, link_index, hss)
+
+    def contract_2e_multi(self, eri, civecs, norb, nelec, link_index=None,
+                          **kwargs):
+        return [self.contract_2e(eri, c, norb, nelec, link_index, **kwargs)
+                for c in civecs]
+
+    @pyscf.lib.with_doc(make_hdiag.__doc__)
+    def make_hdiag(self, h1e, eri, ci_strs, norb, nelec):
+        return make_hdiag(h1e, eri, ci_strs, norb, nelec)
+
+    @pyscf.lib.with_doc(enlarge_space.__doc__)
+    def enlarge_space(self, civec_strs, h1e, eri, norb, nelec):
+        return enlarge_space(self, civec_strs, h1e, eri, norb, nelec)
+
+    def kernel(self, h1e, eri, norb, nelec, ci0=None,
+               tol=None, lindep=None, max_cycle=None, max_space=None,
+               nroots=None, davidson_only=None, pspace_size=None,
+               orbsym=None, wfnsym=None, **kwargs):
+        if self.verbose >= logger.WARN:
+            self.check_sanity()
+        return kernel_float_space(self, h1e, eri, norb, nelec, ci0,
+                                  tol, lindep, max_cycle, max_space, nroots,
+                                  davidson_only, **kwargs)
+
+    def approx_kernel(self, h1e, eri, norb, nelec, ci0=None, **kwargs):
+        '''Solve the CI problem in the string space of ci0 without enlarging
+        the space.  It is called in the micro iterations of 1-step CASSCF.
+        '''
+        if ci0 is None:
+            return self.kernel(h1e, eri, norb, nelec, **kwargs)
+        if isinstance(ci0, _SCIvector):
+            ci_strs = ci0._strs
+        else:
+            ci_strs = ci0[0]._strs
+        kwargs.setdefault('max_cycle', self.max_cycle)
+        return kernel_fixed_space(self, h1e, eri, norb, nelec, ci_strs, ci0,
+                                  **kwargs)
+
+    @pyscf.lib.with_doc(spin_square.__doc__)
+    def spin_square(self, civec_strs, norb, nelec):
+        if self.nroots == 1:
+            return spin_square(civec_strs, norb, nelec)
+        else:
+            ss = [spin_square(c, norb, nelec) for c in civec_strs]
+            return [x[0] for x in ss], [x[1] for x in ss]
+
+    @pyscf.lib.with_doc(make_rdm1s.__doc__)
+    def make_rdm1s(self, civec_strs, norb, nelec, link_index=None):
+        return make_rdm1s(civec_strs, norb, nelec, link_index)
+
+    @pyscf.lib.with_doc(make_rdm1.__doc__)
+    def make_rdm1(self, civec_strs, norb, nelec, link_index=None):
+        return make_rdm1(civec_strs, norb, nelec, link_index)
+
+    @pyscf.lib.with_doc(make_rdm12.__doc__)
+    def make_rdm12(self, civec_strs, norb, nelec, link_index=None,
+                   reorder=True):
+        return make_rdm12(civec_strs, norb, nelec, link_index, reorder)
+
+    def make_rdm2(self, civec_strs, norb, nelec, link_index=None,
+                  reorder=True):
+        r'''Spin traced 2-particle density matrice
+
+        NOTE the 2pdm is :math:`\langle p^\dagger q^\dagger s r\rangle` but
+        stored as [p,r,q,s]
+        '''
+        return self.make_rdm12(civec_strs, norb, nelec, link_index, reorder)[1]
+
+
+if __name__ == '__main__':
+    from functools import reduce
+    from pyscf import gto
+    from pyscf import scf
+    from pyscf import mcscf
+
+    mol = gto.Mole()
+    mol.verbose = 0
+    mol.atom = [
+        ['H', ( 1.,-1.    , 0.   )],
+        ['H', ( 0.,-1.    ,-1.   )],
+        ['H', ( 1.,-0.5   ,-1.   )],
+        ['H', ( 0.,-0.    ,-1.   )],
+        ['H', ( 1.,-0.5   , 0.   )],
+        ['H', ( 0., 1.    , 1.   )],
+        ['H', ( 1., 2.    , 3.   )],
+        ['H', ( 1., 2.    , 4.   )],
+    ]
+    mol.basis = 'sto-3g'
+    mol.build()
+
+    m = scf.RHF(mol)
+    m.kernel()
+    norb = m.mo_coeff.shape[1]
+    nelec = mol.nelectron
+    h1e = reduce(numpy.dot, (m.mo_coeff.T, m.get_hcore(), m.mo_coeff))
+    eri = ao2mo.kernel(m._eri, m.mo_coeff)
+
+    myci = SCI()
+    myci.select_cutoff = 0
+    e1, c1 = myci.kernel(h1e, eri, norb, nelec)
+    e2 = direct_spin1.kernel(h1e, eri, norb, nelec)[0]
+    print(e1 - e2)
+
+    mc = mcscf.CASSCF(m, 4, 4)
+    mc.fcisolver = SCI(mol)
+    print(mc.kernel()[0])
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+import unittest
+from functools import reduce
+import numpy
+from pyscf import gto
+from pyscf import scf
+from pyscf import ao2mo
+from pyscf import fci
+from pyscf.fci import selected_ci
+
+mol = gto.Mole()
+mol.verbose = 0
+mol.output = None
+mol.atom = [
+    ['H', ( 1.,-1.    , 0.   )],
+    ['H', ( 0.,-1.    ,-1.   )],
+    ['H', ( 0.,-0.5   ,-0.   )],
+    ['H', ( 0.,-0.    ,-1.   )],
+    ['H', ( 1.,-0.5   , 0.   )],
+    ['H', ( 0., 1.    , 1.   )],
+]
+
+mol.basis = {'H': 'sto-3g'}
+mol.build()
+
+m = scf.RHF(mol)
+m.conv_tol = 1e-15
+ehf = m.scf()
+
+norb = m.mo_coeff.shape[1]
+nelec = (mol.nelectron//2, mol.nelectron//2)
+neleci = (mol.nelectron//2, mol.nelectron//2-1)
+h1e = reduce(numpy.dot, (m.mo_coeff.T, m.get_hcore(), m.mo_coeff))
+g2e = ao2mo.incore.general(m._eri, (m.mo_coeff,)*4, compact=False)
+
+def full_strs(norb, nelec):
+    strsa = fci.cistring.gen_strings4orblist(range(norb), nelec[0])
+    strsb = fci.cistring.gen_strings4orblist(range(norb), nelec[1])
+    return (numpy.sort(numpy.asarray(strsa, dtype=numpy.int64)),
+            numpy.sort(numpy.asarray(strsb, dtype=numpy.int64)))
+
+def reorder_fcivec(ci, norb, nelec):
+    '''FCI vector in the order of the sorted strings'''
+    strsa = fci.cistring.gen_strings4orblist(range(norb), nelec[0])
+    strsb = fci.cistring.gen_strings4orblist(range(norb), nelec[1])
+    return ci[numpy.argsort(strsa)][:,numpy.argsort(strsb)]
+
+class KnowValues(unittest.TestCase):
+    def test_contract(self):
+        numpy.random.seed(15)
+        ci_strs = full_strs(norb, neleci)
+        ci0 = numpy.random.random((len(ci_strs[0]),len(ci_strs[1])))
+        h2e = fci.direct_spin1.absorb_h1e(h1e, g2e, norb, neleci, .5)
+        strsa = fci.cistring.gen_strings4orblist(range(norb), neleci[0])
+        strsb = fci.cistring.gen_strings4orblist(range(norb), neleci[1])
+        ci0ref = numpy.empty_like(ci0)
+        ci0ref[numpy.ix_(numpy.argsort(strsa),numpy.argsort(strsb))] = ci0
+        ci1ref = fci.direct_spin1.contract_2e(h2e, ci0ref, norb, neleci)
+        ci1 = selected_ci.contract_2e(h2e, selected_ci.as_SCIvector(ci0, ci_strs),
+                                      norb, neleci)
+        self.assertTrue(numpy.allclose(ci1, reorder_fcivec(ci1ref, norb, neleci)))
+
+    def test_kernel(self):
+        myci = selected_ci.SCI()
+        myci.select_cutoff = 0
+        myci.ci_coeff_cutoff = 0
+        e, c = myci.kernel(h1e, g2e, norb, nelec)
+        self.assertAlmostEqual(e, -8.9347029192929, 8)
+        myci.select_cutoff = 1e-3
+        e1, c1 = myci.kernel(h1e, g2e, norb, nelec)
+        self.assertTrue(e1 > e-1e-9)
+        self.assertAlmostEqual(e1, e, 4)
+
+        myci.select_cutoff = 0
+        myci.nroots = 2
+        e, c = myci.kernel(h1e, g2e, norb, neleci)
+        self.assertAlmostEqual(e[0], -8.7498253981782, 8)
+
+    def test_rdm12(self):
+        myci = selected_ci.SCI()
+        myci.select_cutoff = 0
+        myci.ci_coeff_cutoff = 0
+        e, c = myci.kernel(h1e, g2e, norb, neleci)
+        eref, cref = fci.direct_spin1.kernel(h1e, g2e, norb, neleci)
+        dm1ref, dm2ref = fci.direct_spin1.make_rdm12(cref, norb, neleci)
+        dm1, dm2 = selected_ci.make_rdm12(c, norb, neleci)
+        self.assertTrue(numpy.allclose(dm1, dm1ref))
+        self.assertTrue(numpy.allclose(dm2, dm2ref))
+        dm1a, dm1b = selected_ci.make_rdm1s(c, norb, neleci)
+        self.assertAlmostEqual(numpy.trace(dm1a), neleci[0], 9)
+        self.assertAlmostEqual(numpy.trace(dm1b), neleci[1], 9)
+        ss = selected_ci.spin_square(c, norb, neleci)
+        self.assertAlmostEqual(ss[0], .75, 9)
+
+    def test_rdm12_truncated_space(self):
+        myci = selected_ci.SCI()
+        myci.select_cutoff = 2e-3
+        myci.ci_coeff_cutoff = 2e-3
+        e, c = myci.kernel(h1e, g2e, norb, nelec)
+        full = full_strs(norb, nelec)
+        self.assertTrue(len(c._strs[0]) < len(full[0]))
+        dm1, dm2 = selected_ci.make_rdm12(c, norb, nelec)
+        e1 = (numpy.einsum('pq,pq', h1e, dm1) +
+              numpy.einsum('pqrs,pqrs', g2e.reshape((norb,)*4), dm2) * .5)
+        self.assertAlmostEqual(e1, e, 9)
+
+
+if __name__ == "__main__":
+    print("Full Tests for selected CI")
+    unittest.main()
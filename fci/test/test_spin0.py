@@ -53,6 +53,31 @@ class KnowValues(unittest.TestCase):
         self.assertTrue(numpy.allclose(ci1ref, ci1))
         self.assertAlmostEqual(numpy.linalg.norm(ci1), 15.076640155228787, 8)
 
+    def test_contract_2e_multi(self):
+        ci1ref = [fci.direct_spin0.contract_2e(g2e, c, norb, nelec)
+                  for c in (ci0, ci1)]
+        ci1s = fci.direct_spin0.contract_2e_multi(g2e, (ci0, ci1), norb, nelec)
+        self.assertTrue(numpy.allclose(ci1s[0], ci1ref[0]))
+        self.assertTrue(numpy.allclose(ci1s[1], ci1ref[1]))
+
+    def test_solver_contract_2e_multi(self):
+        cis = fci.solver(mol)
+        self.assertTrue(isinstance(cis, fci.direct_spin0.FCISolver))
+        ncall = []
+        contract_2e_multi = fci.direct_spin0.contract_2e_multi
+        def count_multi(*args):
+            ncall.append(len(args[1]))
+            return contract_2e_multi(*args)
+        fci.direct_spin0.contract_2e_multi = count_multi
+        try:
+            e, c = cis.kernel(h1e, g2e, norb, nelec, nroots=3)
+        finally:
+            fci.direct_spin0.contract_2e_multi = contract_2e_multi
+        self.assertTrue(max(ncall) > 1)
+        eref = fci.direct_spin1.kernel(h1e, g2e, norb, nelec, nroots=3)[0]
+        self.assertAlmostEqual(e[0], eref[0], 8)
+        self.assertAlmostEqual(e[1], eref[1], 8)
+
     def test_kernel(self):
         e, c = fci.direct_spin0.kernel(h1e, g2e, norb, nelec)
         self.assertAlmostEqual(e, -9.1491239851241737, 8)
@@ -57,6 +57,16 @@ class KnowValues(unittest.TestCase):
         ci3 = fci.direct_spin1.contract_2e(g2e, ci2, norb, neleci)
         self.assertAlmostEqual(numpy.linalg.norm(ci3), 127.49780293866368, 8)
 
+    def test_contract_2e_multi(self):
+        ci1ref = [fci.direct_spin1.contract_2e(g2e, c, norb, nelec)
+                  for c in (ci0, ci1)]
+        ci1s = fci.direct_spin1.contract_2e_multi(g2e, (ci0, ci1), norb, nelec)
+        self.assertTrue(numpy.allclose(ci1s[0], ci1ref[0]))
+        self.assertTrue(numpy.allclose(ci1s[1], ci1ref[1]))
+        ci3ref = fci.direct_spin1.contract_2e(g2e, ci3, norb, neleci)
+        ci3s = fci.direct_spin1.contract_2e_multi(g2e, (ci2, ci3), norb, neleci)
+        self.assertTrue(numpy.allclose(ci3s[1], ci3ref))
+
     def test_kernel(self):
         eref, cref = fci.direct_spin0.kernel(h1e, g2e, norb, mol.nelectron)
         e, c = fci.direct_spin1.kernel(h1e, g2e, norb, nelec)
@@ -67,6 +77,15 @@ class KnowValues(unittest.TestCase):
         e, c = fci.direct_spin1.kernel(h1e, g2e, norb, neleci)
         self.assertAlmostEqual(e, -8.7498253981782, 8)
 
+    def test_kernel_lowmem(self):
+        cis = fci.direct_spin1.FCISolver(mol)
+        cis.davidson_lowmem = True
+        e, c = cis.kernel(h1e, g2e, norb, nelec, davidson_only=True)
+        self.assertAlmostEqual(e, -8.9347029192929, 8)
+        cis.nroots = 2
+        e, c = cis.kernel(h1e, g2e, norb, neleci, davidson_only=True)
+        self.assertAlmostEqual(e[0], -8.7498253981782, 8)
+
     def test_hdiag(self):
         hdiagref = fci.direct_spin0.make_hdiag(h1e, g2e, norb, mol.nelectron)
         hdiag = fci.direct_spin1.make_hdiag(h1e, g2e, norb, nelec)
@@ -41,6 +41,26 @@ class KnowValues(unittest.TestCase):
         ci1 = cis.contract_2e(g2e, ci0, norb, nelec)
         self.assertAlmostEqual(numpy.linalg.norm(ci1), 82.311122627448768, 9)
 
+    def test_contract_2e_multi(self):
+        ci1 = cis.contract_2e(g2e, ci0, norb, nelec)
+        ci1s = cis.contract_2e_multi(g2e, (ci0, ci0*2), norb, nelec)
+        self.assertTrue(numpy.allclose(ci1s[0], ci1))
+        self.assertTrue(numpy.allclose(ci1s[1], ci1*2))
+        cis1 = fci.solver(mol, singlet=False)
+        cis1.orbsym = orbsym
+        ncall = []
+        contract_2e_multi = fci.direct_spin1_symm.contract_2e_multi
+        def count_multi(*args):
+            ncall.append(len(args[1]))
+            return contract_2e_multi(*args)
+        fci.direct_spin1_symm.contract_2e_multi = count_multi
+        try:
+            e, c = cis1.kernel(h1e, g2e, norb, nelec, nroots=2)
+        finally:
+            fci.direct_spin1_symm.contract_2e_multi = contract_2e_multi
+        self.assertTrue(max(ncall) > 1)
+        self.assertAlmostEqual(e[0], -84.200905534209554, 8)
+
     def test_kernel(self):
         e, c = fci.direct_spin1_symm.kernel(h1e, g2e, norb, nelec, orbsym=orbsym)
         self.assertAlmostEqual(e, -84.200905534209554, 8)
@@ -26,6 +26,24 @@ NUMERICAL_ZERO = 1e-14
 # h2e is the CAS space 2e integrals in  notation # a' -> p # b' -> q # c' -> r
 # d' -> s
 
+def _contract_f3(h2e, civec, norb, nelec, link_index=None):
+    '''The 4-pdm contracted with the 2e integrals, see _contract4pdm'''
+    if isinstance(nelec, (int, numpy.integer)):
+        neleca = nelecb = nelec//2
+    else:
+        neleca, nelecb = nelec
+    if link_index is None:
+        link_indexa = fci.cistring.gen_linkstr_index(range(norb), neleca)
+        link_indexb = fci.cistring.gen_linkstr_index(range(norb), nelecb)
+    else:
+        link_indexa, link_indexb = link_index
+    eri = h2e.transpose(0,2,1,3)
+    f3ca = _contract4pdm('NEVPTkern_cedf_aedf', eri, civec, norb, nelec,
+                         (link_indexa,link_indexb))
+    f3ac = _contract4pdm('NEVPTkern_aedf_ecdf', eri, civec, norb, nelec,
+                         (link_indexa,link_indexb))
+    return f3ca, f3ac
+
 def make_a16(h1e, h2e, dms, civec, norb, nelec, link_index=None):
     dm3 = dms['3']
     #dm4 = dms['4']
@@ -33,44 +51,68 @@ def make_a16(h1e, h2e, dms, civec, norb, nelec, link_index=None):
         f3ca = dms['f3ca']
         f3ac = dms['f3ac']
     else:
-        if isinstance(nelec, (int, numpy.integer)):
-            neleca = nelecb = nelec//2
-        else:
-            neleca, nelecb = nelec
-        if link_index is None:
-            link_indexa = fci.cistring.gen_linkstr_index(range(norb), neleca)
-            link_indexb = fci.cistring.gen_linkstr_index(range(norb), nelecb)
-        else:
-            link_indexa, link_indexb = link_index
-        eri = h2e.transpose(0,2,1,3)
-        f3ca = _contract4pdm('NEVPTkern_cedf_aedf', eri, civec, norb, nelec,
-                             (link_indexa,link_indexb))
-        f3ac = _contract4pdm('NEVPTkern_aedf_ecdf', eri, civec, norb, nelec,
-                             (link_indexa,link_indexb))
+        f3ca, f3ac = _contract_f3(h2e, civec, norb, nelec, link_index)
+    return _a16_block(h1e, h2e, dm3, f3ca, f3ac, 0, norb)
 
-    a16 = -numpy.einsum('ib,rpqiac->pqrabc', h1e, dm3)
-    a16 += numpy.einsum('ia,rpqbic->pqrabc', h1e, dm3)
-    a16 -= numpy.einsum('ci,rpqbai->pqrabc', h1e, dm3)
+def _a16_block(h1e, h2e, dm3, f3ca, f3ac, p0, p1):
+    '''a16[p0:p1].  Only the slice dm3[:,p0:p1] is needed.  The contractions
+    with dm3 are evaluated by matrix multiplication.
+    '''
+    norb = h1e.shape[0]
+    nn = norb * norb
+    # d3[pqr,i,j,k] = dm3[r,p,q,i,j,k]
+    d3 = numpy.asarray(dm3[:,p0:p1].transpose(1,2,0,3,4,5), order='C')
+    m = d3.size // norb**3
+    d3 = d3.reshape(m,norb,norb,norb)
+
+    #:a16 = -numpy.einsum('ib,rpqiac->pqrabc', h1e, dm3)
+    #:a16 += numpy.einsum('jbij,rpqiac->pqrabc', h2e, dm3)
+    hb = numpy.einsum('jbij->ib', h2e) - h1e
+    tmp = pyscf.lib.dot(d3.transpose(0,2,3,1).reshape(-1,norb), hb)
+    a16 = numpy.asarray(tmp.reshape(m,norb,norb,norb).transpose(0,1,3,2), order='C')
+    #:a16 += numpy.einsum('ia,rpqbic->pqrabc', h1e, dm3)
+    tmp = pyscf.lib.dot(d3.transpose(0,1,3,2).reshape(-1,norb), h1e)
+    a16 += tmp.reshape(m,norb,norb,norb).transpose(0,3,1,2)
+    #:a16 -= numpy.einsum('ci,rpqbai->pqrabc', h1e, dm3)
+    #:a16 += numpy.einsum('jcij,rpqbai->pqrabc', h2e, dm3)
+    hc = numpy.einsum('jcij->ic', h2e) - h1e.T
+    tmp = pyscf.lib.dot(d3.reshape(-1,norb), hc)
+    a16 += tmp.reshape(m,norb,norb,norb).transpose(0,2,1,3)
+    #:a16 -= numpy.einsum('kbia,rpqcki->pqrabc', h2e, dm3)
+    w = h2e.transpose(0,2,1,3).reshape(nn,nn)
+    tmp = pyscf.lib.dot(d3.reshape(-1,nn), w)
+    a16 -= tmp.reshape(m,norb,norb,norb).transpose(0,3,2,1)
+    #:a16 -= numpy.einsum('cjka,rpqbjk->pqrabc', h2e, dm3)
+    w = h2e.transpose(1,2,3,0).reshape(nn,nn)
+    tmp = pyscf.lib.dot(d3.reshape(-1,nn), w)
+    a16 -= tmp.reshape(m,norb,norb,norb).transpose(0,2,1,3)
+    #:a16 -= numpy.einsum('kbaj,rpqjkc->pqrabc', h2e, dm3)
+    w = h2e.transpose(3,0,2,1).reshape(nn,nn)
+    tmp = pyscf.lib.dot(d3.transpose(0,3,1,2).reshape(-1,nn), w)
+    a16 -= tmp.reshape(m,norb,norb,norb).transpose(0,2,3,1)
+    #:a16 += numpy.einsum('cbij,rpqjai->pqrabc', h2e, dm3)
+    w = h2e.transpose(3,2,1,0).reshape(nn,nn)
+    tmp = pyscf.lib.dot(d3.transpose(0,2,1,3).reshape(-1,nn), w)
+    a16 += tmp.reshape(m,norb,norb,norb)
+    #:fdm2 = numpy.einsum('kbij,rpajki->prab'  , h2e, dm3)
+    w = h2e.transpose(3,0,2,1).reshape(-1,norb)
+    fdm2 = pyscf.lib.dot(d3.reshape(-1,norb**3), w)
+    fdm2 = fdm2.reshape(p1-p0,norb,norb,norb).transpose(0,2,1,3)
+    d3 = tmp = w = None
+
+    a16 = a16.reshape(p1-p0,norb,norb,norb,norb,norb)
+    for i in range(norb):
+        a16[:,i,:,:,:,i] += fdm2
 
 # qjkiac = acqjki + delta(ja)qcki + delta(ia)qjkc - delta(qc)ajki - delta(kc)qjai
     #:a16 -= numpy.einsum('kbij,rpqjkiac->pqrabc', h2e, dm4)
-    a16 -= f3ca.transpose(1,4,0,2,5,3) # c'a'acb'b -> a'b'c'abc
-    a16 -= numpy.einsum('kbia,rpqcki->pqrabc', h2e, dm3)
-    a16 -= numpy.einsum('kbaj,rpqjkc->pqrabc', h2e, dm3)
-    a16 += numpy.einsum('cbij,rpqjai->pqrabc', h2e, dm3)
-    fdm2 = numpy.einsum('kbij,rpajki->prab'  , h2e, dm3)
-    for i in range(norb):
-        a16[:,i,:,:,:,i] += fdm2
+    a16 -= f3ca[:,p0:p1].transpose(1,4,0,2,5,3) # c'a'acb'b -> a'b'c'abc
 
     #:a16 += numpy.einsum('ijka,rpqbjcik->pqrabc', h2e, dm4)
-    a16 += f3ac.transpose(1,2,0,4,3,5) # c'a'b'bac -> a'b'c'abc
+    a16 += f3ac[:,p0:p1].transpose(1,2,0,4,3,5) # c'a'b'bac -> a'b'c'abc
 
     #:a16 -= numpy.einsum('kcij,rpqbajki->pqrabc', h2e, dm4)
-    a16 -= f3ca.transpose(1,2,0,4,3,5) # c'a'b'bac -> a'b'c'abc
-
-    a16 += numpy.einsum('jbij,rpqiac->pqrabc', h2e, dm3)
-    a16 -= numpy.einsum('cjka,rpqbjk->pqrabc', h2e, dm3)
-    a16 += numpy.einsum('jcij,rpqbai->pqrabc', h2e, dm3)
+    a16 -= f3ca[:,p0:p1].transpose(1,2,0,4,3,5) # c'a'b'bac -> a'b'c'abc
     return a16
 
 def make_a22(h1e, h2e, dms, civec, norb, nelec, link_index=None):
@@ -81,63 +123,109 @@ def make_a22(h1e, h2e, dms, civec, norb, nelec, link_index=None):
         f3ca = dms['f3ca']
         f3ac = dms['f3ac']
     else:
-        if isinstance(nelec, (int, numpy.integer)):
-            neleca = nelecb = nelec//2
-        else:
-            neleca, nelecb = nelec
-        if link_index is None:
-            link_indexa = fci.cistring.gen_linkstr_index(range(norb), neleca)
-            link_indexb = fci.cistring.gen_linkstr_index(range(norb), nelecb)
-        else:
-            link_indexa, link_indexb = link_index
-        eri = h2e.transpose(0,2,1,3)
-        f3ca = _contract4pdm('NEVPTkern_cedf_aedf', eri, civec, norb, nelec,
-                             (link_indexa,link_indexb))
-        f3ac = _contract4pdm('NEVPTkern_aedf_ecdf', eri, civec, norb, nelec,
-                             (link_indexa,link_indexb))
-
-    a22 = -numpy.einsum('pb,kipjac->ijkabc', h1e, dm3)
-    a22 -= numpy.einsum('pa,kibjpc->ijkabc', h1e, dm3)
-    a22 += numpy.einsum('cp,kibjap->ijkabc', h1e, dm3)
-    a22 += numpy.einsum('cqra,kibjqr->ijkabc', h2e, dm3)
-    a22 -= numpy.einsum('qcpq,kibjap->ijkabc', h2e, dm3)
+        f3ca, f3ac = _contract_f3(h2e, civec, norb, nelec, link_index)
+    return _a22_block(h1e, h2e, dm2, dm3, f3ca, f3ac, 0, norb)
+
+def _a22_block(h1e, h2e, dm2, dm3, f3ca, f3ac, p0, p1):
+    '''a22[p0:p1].  Only the slices dm2[:,p0:p1] and dm3[:,p0:p1] are
+    needed.  The contractions with dm3 are evaluated by matrix
+    multiplication.
+    '''
+    norb = h1e.shape[0]
+    nn = norb * norb
+    nnn = nn * norb
+    # d3[ik,j,s,p,q] = dm3[k,i,s,j,p,q] for i in [p0:p1]
+    d3 = numpy.asarray(dm3[:,p0:p1].transpose(1,0,3,2,4,5), order='C')
+    m = d3.size // norb**4
+    d3 = d3.reshape(m,norb,norb,norb,norb)
+    d2 = numpy.asarray(dm2[:,p0:p1].transpose(1,0,2,3)).reshape(m,norb,norb)
+
+    # a22 is first computed in the order [ik,j,a,b,c]
+    #:a22 = -numpy.einsum('pb,kipjac->ijkabc', h1e, dm3)
+    tmp = pyscf.lib.dot(d3.transpose(0,1,3,4,2).reshape(-1,norb), h1e)
+    a22 = numpy.asarray(tmp.reshape(m,norb,norb,norb,norb).transpose(0,1,2,4,3),
+                        order='C')
+    a22 *= -1
+    #:a22 -= numpy.einsum('pa,kibjpc->ijkabc', h1e, dm3)
+    tmp = pyscf.lib.dot(d3.transpose(0,1,2,4,3).reshape(-1,norb), h1e)
+    a22 -= tmp.reshape(m,norb,norb,norb,norb).transpose(0,1,4,2,3)
+    #:a22 += numpy.einsum('cp,kibjap->ijkabc', h1e, dm3)
+    #:a22 -= numpy.einsum('qcpq,kibjap->ijkabc', h2e, dm3)
+    hc = h1e.T - numpy.einsum('qcpq->pc', h2e)
+    tmp = pyscf.lib.dot(d3.reshape(-1,norb), hc)
+    a22 += tmp.reshape(m,norb,norb,norb,norb).transpose(0,1,3,2,4)
+    #:a22 += numpy.einsum('cqra,kibjqr->ijkabc', h2e, dm3)
+    w = h2e.transpose(1,2,3,0).reshape(nn,nn)
+    tmp = pyscf.lib.dot(d3.reshape(-1,nn), w)
+    a22 += tmp.reshape(m,norb,norb,norb,norb).transpose(0,1,3,2,4)
+    #:a22 += numpy.einsum('pcrb,kiajpr->ijkabc', h2e, dm3)
+    w = h2e.transpose(0,2,3,1).reshape(nn,nn)
+    tmp = pyscf.lib.dot(d3.reshape(-1,nn), w)
+    a22 += tmp.reshape(m,norb,norb,norb,norb)
+    #:a22 -= numpy.einsum('pqab,kiqjpc->ijkabc', h2e, dm3)
+    w = h2e.transpose(1,0,2,3).reshape(nn,nn)
+    tmp = pyscf.lib.dot(d3.transpose(0,1,4,2,3).reshape(-1,nn), w)
+    a22 -= tmp.reshape(m,norb,norb,norb,norb).transpose(0,1,3,4,2)
+    #:a22 += numpy.einsum('cqrb,kiqjar->ijkabc', h2e, dm3)
+    w = h2e.transpose(1,2,3,0).reshape(nn,nn)
+    tmp = pyscf.lib.dot(d3.transpose(0,1,3,2,4).reshape(-1,nn), w)
+    a22 += tmp.reshape(m,norb,norb,norb,norb)
+    #:a22 += 2.0*numpy.einsum('pjrb,kiprac->ijkabc', h2e, dm3)
+    w = h2e.transpose(0,2,1,3).reshape(nn,nn)
+    tmp = pyscf.lib.dot(d3.transpose(0,3,4,2,1).reshape(-1,nn), w)
+    a22 += tmp.reshape(m,norb,norb,norb,norb).transpose(0,3,1,4,2) * 2
+    #:a22 += 2.0*numpy.einsum('jb,kiac->ijkabc', h1e, dm2)
+    a22 += numpy.einsum('jb,xac->xjabc', h1e, d2) * 2
+
+    #:fdm2 = numpy.einsum('pqrb,kiqcpr->ikbc', h2e, dm3)
+    w = h2e.transpose(1,0,2,3).reshape(nnn,norb)
+    fdm2 = pyscf.lib.dot(d3.reshape(-1,nnn), w)
+    fdm2 = fdm2.reshape(m,norb,norb).transpose(0,2,1)
+    #:fdm2b  = numpy.einsum('pa,kipc->ikac', h1e, dm2)
+    #:fdm2b -= numpy.einsum('cp,kiap->ikac', h1e, dm2)
+    #:fdm2b += numpy.einsum('qcpq,kiap->ikac', h2e, dm2)
+    #:fdm2b -= numpy.einsum('cqra,kiqr->ikac', h2e, dm2)
+    #:fdm2b += numpy.einsum('pqra,kiqcpr->ikac', h2e, dm3)
+    #:fdm2b -= numpy.einsum('rcpq,kiaqrp->ikac', h2e, dm3)
+    fdm2b = pyscf.lib.dot(d2.transpose(0,2,1).reshape(-1,norb), h1e)
+    fdm2b = fdm2b.reshape(m,norb,norb).transpose(0,2,1)
+    fdm2b -= pyscf.lib.dot(d2.reshape(-1,norb), hc).reshape(m,norb,norb)
+    w = h2e.transpose(1,2,3,0).reshape(nn,nn)
+    fdm2b -= pyscf.lib.dot(d2.reshape(m,nn), w).reshape(m,norb,norb)
+    fdm2b += fdm2
+    w = h2e.transpose(3,0,2,1).reshape(nnn,norb)
+    tmp = pyscf.lib.dot(d3.transpose(0,2,1,3,4).reshape(-1,nnn), w)
+    fdm2b -= tmp.reshape(m,norb,norb)
+    d2 = d3 = tmp = w = None
+
+    for i in range(norb):
+        a22[:,i,i,:,:] -= fdm2
+        a22[:,i,:,i,:] += fdm2b * 2
+    a22 = a22.reshape(p1-p0,norb,norb,norb,norb,norb).transpose(0,2,1,3,4,5)
+    a22 = numpy.asarray(a22, order='C')
 
 # qjprac = acqjpr + delta(ja)qcpr + delta(ra)qjpc - delta(qc)ajpr - delta(pc)qjar
     #a22 -= numpy.einsum('pqrb,kiqjprac->ijkabc', h2e, dm4)
-    a22 -= f3ac.transpose(1,5,0,2,4,3) # c'a'acbb'
-    fdm2 = numpy.einsum('pqrb,kiqcpr->ikbc', h2e, dm3)
-    for i in range(norb):
-        a22[:,i,:,i,:,:] -= fdm2
-    a22 -= numpy.einsum('pqab,kiqjpc->ijkabc', h2e, dm3)
-    a22 += numpy.einsum('pcrb,kiajpr->ijkabc', h2e, dm3)
-    a22 += numpy.einsum('cqrb,kiqjar->ijkabc', h2e, dm3)
+    a22 -= f3ac[:,p0:p1].transpose(1,5,0,2,4,3) # c'a'acbb'
 
     #a22 -= numpy.einsum('pqra,kibjqcpr->ijkabc', h2e, dm4)
-    a22 -= f3ac.transpose(1,3,0,4,2,5) # c'a'bb'ac -> a'b'c'abc
+    a22 -= f3ac[:,p0:p1].transpose(1,3,0,4,2,5) # c'a'bb'ac -> a'b'c'abc
 
     #a22 += numpy.einsum('rcpq,kibjaqrp->ijkabc', h2e, dm4)
-    a22 += f3ca.transpose(1,3,0,4,2,5) # c'a'bb'ac -> a'b'c'abc
-
-    a22 += 2.0*numpy.einsum('jb,kiac->ijkabc', h1e, dm2)
-    a22 += 2.0*numpy.einsum('pjrb,kiprac->ijkabc', h2e, dm3)
-    fdm2  = numpy.einsum('pa,kipc->ikac', h1e, dm2)
-    fdm2 -= numpy.einsum('cp,kiap->ikac', h1e, dm2)
-    fdm2 -= numpy.einsum('cqra,kiqr->ikac', h2e, dm2)
-    fdm2 += numpy.einsum('qcpq,kiap->ikac', h2e, dm2)
-    fdm2 += numpy.einsum('pqra,kiqcpr->ikac', h2e, dm3)
-    fdm2 -= numpy.einsum('rcpq,kiaqrp->ikac', h2e, dm3)
-    for i in range(norb):
-        a22[:,i,:,:,i,:] += fdm2 * 2
-
+    a22 += f3ca[:,p0:p1].transpose(1,3,0,4,2,5) # c'a'bb'ac -> a'b'c'abc
     return a22
 
 
 def make_a17(h1e,h2e,dm2,dm3):
     h1e = h1e - numpy.einsum('mjjn->mn',h2e)
 
-    a17 = -numpy.einsum('pi,cabi->abcp',h1e,dm2)\
-          -numpy.einsum('kpij,cabjki->abcp',h2e,dm3)
-    return a17
+    norb = h1e.shape[0]
+    #:a17 = -numpy.einsum('pi,cabi->abcp',h1e,dm2)\
+    #:      -numpy.einsum('kpij,cabjki->abcp',h2e,dm3)
+    a17 = -pyscf.lib.dot(dm2.reshape(-1,norb), h1e.T)
+    a17 -= pyscf.lib.dot(dm3.reshape(norb**3,-1),
+                         h2e.transpose(3,0,2,1).reshape(-1,norb))
+    return a17.reshape((norb,)*4).transpose(1,2,0,3)
 
 def make_a19(h1e,h2e,dm1,dm2):
     h1e = h1e - numpy.einsum('mjjn->mn',h2e)
@@ -147,11 +235,14 @@ def make_a19(h1e,h2e,dm1,dm2):
     return a19
 
 def make_a23(h1e,h2e,dm1,dm2,dm3):
-    a23 = -numpy.einsum('ip,caib->abcp',h1e,dm2)\
-          -numpy.einsum('pijk,cajbik->abcp',h2e,dm3)\
-          +2.0*numpy.einsum('bp,ca->abcp',h1e,dm1)\
-          +2.0*numpy.einsum('pibk,caik->abcp',h2e,dm2)
-
+    norb = h1e.shape[0]
+    #:a23 = -numpy.einsum('pijk,cajbik->abcp',h2e,dm3)
+    a23 = -pyscf.lib.dot(dm3.transpose(0,1,3,2,4,5).reshape(norb**3,-1),
+                         h2e.transpose(2,1,3,0).reshape(-1,norb))
+    a23 = a23.reshape((norb,)*4).transpose(1,2,0,3)
+    a23 -= numpy.einsum('ip,caib->abcp',h1e,dm2)
+    a23 += 2.0*numpy.einsum('bp,ca->abcp',h1e,dm1)
+    a23 += 2.0*numpy.einsum('pibk,caik->abcp',h2e,dm2)
     return a23
 
 def make_a25(h1e,h2e,dm1,dm2):
@@ -293,20 +384,40 @@ def Sr(mc,ci,dms, eris=None, verbose=None):
         h1e_v = eris['h1eff'][nocc:,ncore:nocc] - numpy.einsum('mbbn->mn',h2e_v)
 
 
+    ncas = mc.ncas
     if hasattr(mc.fcisolver, 'nevpt_intermediate'):
         a16 = mc.fcisolver.nevpt_intermediate('A16',mc.ncas,mc.nelecas,ci)
+        get_a16 = lambda p0, p1: a16[p0:p1]
     else:
-        a16 = make_a16(h1e,h2e, dms, ci, mc.ncas, mc.nelecas)
+        if 'f3ca' in dms and 'f3ac' in dms:
+            f3ca, f3ac = dms['f3ca'], dms['f3ac']
+        else:
+            f3ca, f3ac = _contract_f3(h2e, ci, ncas, mc.nelecas)
+        get_a16 = lambda p0, p1: _a16_block(h1e, h2e, dm3, f3ca, f3ac, p0, p1)
     a17 = make_a17(h1e,h2e,dm2,dm3)
     a19 = make_a19(h1e,h2e,dm1,dm2)
 
-    ener = numpy.einsum('ipqr,pqrabc,iabc->i',h2e_v,a16,h2e_v)\
-        +  numpy.einsum('ipqr,pqra,ia->i',h2e_v,a17,h1e_v)*2.0\
-        +  numpy.einsum('ip,pa,ia->i',h1e_v,a19,h1e_v)
-
-    norm = numpy.einsum('ipqr,rpqbac,iabc->i',h2e_v,dm3,h2e_v)\
-        +  numpy.einsum('ipqr,rpqa,ia->i',h2e_v,dm2,h1e_v)*2.0\
-        +  numpy.einsum('ip,pa,ia->i',h1e_v,dm1,h1e_v)
+    #:ener = numpy.einsum('ipqr,pqrabc,iabc->i',h2e_v,a16,h2e_v)
+    #:norm = numpy.einsum('ipqr,rpqbac,iabc->i',h2e_v,dm3,h2e_v)
+    nvir = h2e_v.shape[0]
+    h2e_v = numpy.asarray(h2e_v).reshape(nvir,-1)
+    ener = numpy.zeros(nvir)
+    norm = numpy.zeros(nvir)
+    blksize = _blksize_for_dm3(mc, ncas)
+    for p0, p1 in pyscf.lib.prange(0, ncas, blksize):
+        h2e_blk = h2e_v[:,p0*ncas**2:p1*ncas**2]
+        a16 = get_a16(p0, p1).reshape(-1,ncas**3)
+        ener += numpy.einsum('ix,ix->i', pyscf.lib.dot(h2e_blk, a16), h2e_v)
+        a16 = None
+        d3 = dm3[:,p0:p1].transpose(1,2,0,4,3,5).reshape(-1,ncas**3)
+        norm += numpy.einsum('ix,ix->i', pyscf.lib.dot(h2e_blk, d3), h2e_v)
+        d3 = None
+
+    ener += numpy.einsum('ix,xa,ia->i',h2e_v,a17.reshape(-1,ncas),h1e_v)*2.0\
+         +  numpy.einsum('ip,pa,ia->i',h1e_v,a19,h1e_v)
+
+    norm += numpy.einsum('ix,xa,ia->i',h2e_v,dm2.transpose(1,2,0,3).reshape(-1,ncas),h1e_v)*2.0\
+         +  numpy.einsum('ip,pa,ia->i',h1e_v,dm1,h1e_v)
 
     return _norm_to_energy(norm, ener, mc.mo_energy[mc.ncore+mc.ncas:])
 
@@ -334,27 +445,52 @@ def Si(mc, ci, dms, eris=None, verbose=None):
         h2e_v = eris['ppaa'][ncore:nocc,:ncore].transpose(0,2,1,3)
         h1e_v = eris['h1eff'][ncore:nocc,:ncore]
 
+    ncas = mc.ncas
     if hasattr(mc.fcisolver, 'nevpt_intermediate'):
         #mc.fcisolver.make_a22(mc.ncas, state)
         a22 = mc.fcisolver.nevpt_intermediate('A22',mc.ncas,mc.nelecas,ci)
+        get_a22 = lambda p0, p1: a22[p0:p1]
     else:
-        a22 = make_a22(h1e,h2e, dms, ci, mc.ncas, mc.nelecas)
+        if 'f3ca' in dms and 'f3ac' in dms:
+            f3ca, f3ac = dms['f3ca'], dms['f3ac']
+        else:
+            f3ca, f3ac = _contract_f3(h2e, ci, ncas, mc.nelecas)
+        get_a22 = lambda p0, p1: _a22_block(h1e, h2e, dm2, dm3, f3ca, f3ac, p0, p1)
     a23 = make_a23(h1e,h2e,dm1,dm2,dm3)
     a25 = make_a25(h1e,h2e,dm1,dm2)
     delta = numpy.eye(mc.ncas)
-    dm3_h = numpy.einsum('abef,cd->abcdef',dm2,delta)*2\
-            - dm3.transpose(0,1,3,2,4,5)
     dm2_h = numpy.einsum('ab,cd->abcd',dm1,delta)*2\
             - dm2.transpose(0,1,3,2)
     dm1_h = 2*delta- dm1.transpose(1,0)
 
-    ener = numpy.einsum('qpir,pqrabc,baic->i',h2e_v,a22,h2e_v)\
-        +  numpy.einsum('qpir,pqra,ai->i',h2e_v,a23,h1e_v)*2.0\
-        +  numpy.einsum('pi,pa,ai->i',h1e_v,a25,h1e_v)
-
-    norm = numpy.einsum('qpir,rpqbac,baic->i',h2e_v,dm3_h,h2e_v)\
-        +  numpy.einsum('qpir,rpqa,ai->i',h2e_v,dm2_h,h1e_v)*2.0\
-        +  numpy.einsum('pi,pa,ai->i',h1e_v,dm1_h,h1e_v)
+    #:dm3_h = numpy.einsum('abef,cd->abcdef',dm2,delta)*2\
+    #:        - dm3.transpose(0,1,3,2,4,5)
+    #:ener = numpy.einsum('qpir,pqrabc,baic->i',h2e_v,a22,h2e_v)
+    #:norm = numpy.einsum('qpir,rpqbac,baic->i',h2e_v,dm3_h,h2e_v)
+    ncore = h2e_v.shape[2]
+    h2e_v = numpy.asarray(h2e_v.transpose(2,1,0,3)).reshape(ncore,-1)
+    ener = numpy.zeros(ncore)
+    norm = numpy.zeros(ncore)
+    blksize = _blksize_for_dm3(mc, ncas)
+    for p0, p1 in pyscf.lib.prange(0, ncas, blksize):
+        h2e_blk = h2e_v[:,p0*ncas**2:p1*ncas**2]
+        a22 = get_a22(p0, p1).reshape(-1,ncas**3)
+        ener += numpy.einsum('ix,ix->i', pyscf.lib.dot(h2e_blk, a22), h2e_v)
+        a22 = None
+        # dm3_h[r,p,q,b,a,c] in the order [p,q,r,a,b,c]
+        d3 = -dm3[:,p0:p1].transpose(1,3,0,4,2,5)
+        d2 = dm2[:,p0:p1].transpose(1,0,2,3)
+        for i in range(ncas):
+            d3[:,i,:,:,i] += d2 * 2
+        d3 = d3.reshape(-1,ncas**3)
+        norm += numpy.einsum('ix,ix->i', pyscf.lib.dot(h2e_blk, d3), h2e_v)
+        d2 = d3 = None
+
+    ener += numpy.einsum('ix,xa,ia->i',h2e_v,a23.reshape(-1,ncas),h1e_v.T)*2.0\
+         +  numpy.einsum('pi,pa,ai->i',h1e_v,a25,h1e_v)
+
+    norm += numpy.einsum('ix,xa,ia->i',h2e_v,dm2_h.transpose(1,2,0,3).reshape(-1,ncas),h1e_v.T)*2.0\
+         +  numpy.einsum('pi,pa,ai->i',h1e_v,dm1_h,h1e_v)
 
     return _norm_to_energy(norm, ener, -mc.mo_energy[:mc.ncore])
 
@@ -791,6 +927,14 @@ def _contract4pdm(kern, eri, civec, norb, nelec, link_index=None):
             fdm3[j,:,i,j] -= fdm2[i,:]
     return fdm3
 
+def _blksize_for_dm3(mc, ncas):
+    '''The number of slices dm3[:,p] which can be held in memory.  The a16
+    or a22 block and the transposed dm3 block are of size blksize*ncas**5.'''
+    max_memory = getattr(mc, 'max_memory', pyscf.lib.parameters.MEMORY_MAX)
+    mem_now = pyscf.lib.current_memory()[0]
+    blksize = (max_memory - mem_now) * 1e6/8 / (ncas**5 * 4)
+    return int(max(1, min(ncas, blksize)))
+
 def _extract_orbs(mc, mo_coeff):
     ncore = mc.ncore
     ncas = mc.ncas
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 import unittest
+import copy
 from functools import reduce
 import numpy
 from pyscf import gto
@@ -61,6 +62,16 @@ class KnowValues(unittest.TestCase):
         self.assertAlmostEqual(e, -0.0021281408063186956, 7)
         self.assertAlmostEqual(norm, 0.0037402334190064367, 7)
 
+    def test_Sr_Si_blocked(self):
+        mc1 = copy.copy(mc)
+        mc1.max_memory = 1  # one slice of dm3 at a time
+        norm, e = nevpt2.Sr(mc1, mc.ci, dms, eris)
+        self.assertAlmostEqual(e, -0.020245617857870119, 7)
+        self.assertAlmostEqual(norm, 0.039479583324952064, 7)
+        norm, e = nevpt2.Si(mc1, mc.ci, dms, eris)
+        self.assertAlmostEqual(e, -0.0021281408063186956, 7)
+        self.assertAlmostEqual(norm, 0.0037402334190064367, 7)
+
     def test_Sijrs(self):
         norm, e = nevpt2.Sijrs(mc, eris)
         self.assertAlmostEqual(e, -0.0071504286486605891, 7)
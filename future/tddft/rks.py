@@ -49,6 +49,8 @@ def _contract_xc_kernel(td, xc_code, dmvo, singlet=True, max_memory=2000):
     dmvo = numpy.asarray(dmvo)
     dmvo = (dmvo + dmvo.transpose(0,2,1)) * .5
     v1ao = numpy.zeros((ndm,nao,nao))
+    # The densities and potentials of all dmvo are stacked in each block
+    max_memory = max_memory / (ndm+1)
     if xctype == 'LDA':
         ao_deriv = 0
         for ao, mask, weight, coords \
@@ -62,11 +64,10 @@ def _contract_xc_kernel(td, xc_code, dmvo, singlet=True, max_memory=2000):
             else:
                 frho = u_u - u_d
 
-            for i, dm in enumerate(dmvo):
-                rho1 = ni.eval_rho(mol, ao, dm, mask, xctype)
-                aow = numpy.einsum('pi,p->pi', ao, weight*frho*rho1)
-                v1ao[i] += numint._dot_ao_ao(mol, aow, ao, nao, weight.size, mask)
-                rho1 = aow = None
+            rho1 = numint._eval_rho_stack(mol, ao, dmvo, mask, xctype)
+            aow = numpy.einsum('pi,np->pni', ao, weight*frho*rho1)
+            v1ao += numint._dot_ao_aos(mol, ao, aow, nao, weight.size, mask)
+            rho1 = aow = None
 
         for i in range(ndm):
             v1ao[i] = (v1ao[i] + v1ao[i].T) * .5
@@ -95,24 +96,24 @@ def _contract_xc_kernel(td, xc_code, dmvo, singlet=True, max_memory=2000):
                 frhogamma = u_uu - u_dd
 
             ngrid = weight.size
-            wv = numpy.empty((4,ngrid))
-            for i, dm in enumerate(dmvo):
-                # rho1[0 ] = |b><j| z_{bj}
-                # rho1[1:] = \nabla(|b><j|) z_{bj}
-                rho1 = ni.eval_rho(mol, ao, dm, mask, 'GGA')
-                # sigma1 = \nabla(\rho_\alpha+\rho_\beta) dot \nabla(|b><j|) z_{bj}
-                # *2 for alpha + beta
-                sigma1 = numpy.einsum('xi,xi->i', rho[1:], rho1[1:]) * 2
-
-                wv[0 ]  = frho * rho1[0]
-                wv[0 ] += frhogamma * sigma1
-                wv[1:]  = (fgg * sigma1 + frhogamma * rho1[0]) * rho[1:]
-                wv[1:] *= 2  # because \nabla\rho = \nabla(\rho_\alpha+\rho_\beta)
-                wv[1:] += fgamma * rho1[1:]
-                wv[1:] *= 2  # because +h.c for (\nabla\mu) \nu, which are symmetrized at the end
-                wv *= weight
-                aow = numpy.einsum('nip,ni->ip', ao, wv)
-                v1ao[i] += numint._dot_ao_ao(mol, ao[0], aow, nao, ngrid, mask)
+            # rho1[:,0 ] = |b><j| z_{bj}
+            # rho1[:,1:] = \nabla(|b><j|) z_{bj}
+            rho1 = numint._eval_rho_stack(mol, ao, dmvo, mask, 'GGA')
+            # sigma1 = \nabla(\rho_\alpha+\rho_\beta) dot \nabla(|b><j|) z_{bj}
+            # *2 for alpha + beta
+            sigma1 = numpy.einsum('xp,nxp->np', rho[1:], rho1[:,1:]) * 2
+
+            wv = numpy.empty((4,ndm,ngrid))
+            wv[0 ]  = frho * rho1[:,0]
+            wv[0 ] += frhogamma * sigma1
+            wv[1:]  = (fgg * sigma1 + frhogamma * rho1[:,0]) * rho[1:,None]
+            wv[1:] *= 2  # because \nabla\rho = \nabla(\rho_\alpha+\rho_\beta)
+            wv[1:] += fgamma * rho1[:,1:].transpose(1,0,2)
+            wv[1:] *= 2  # because +h.c for (\nabla\mu) \nu, which are symmetrized at the end
+            wv *= weight
+            aow = numpy.einsum('xpi,xnp->pni', ao, wv)
+            v1ao += numint._dot_ao_aos(mol, ao[0], aow, nao, ngrid, mask)
+            rho1 = sigma1 = wv = aow = None
 
         for i in range(ndm):
             v1ao[i] = (v1ao[i] + v1ao[i].T) * .5
@@ -680,6 +680,9 @@ def copy(mol):
     newmol._basis  = copy.deepcopy(mol._basis)
     newmol.ecp     = copy.deepcopy(mol.ecp)
     newmol._ecp    = copy.deepcopy(mol._ecp)
+    # The cached q_cond are valid for the copy.  A separate dict keeps the
+    # copy from overwriting the cache of mol when its geometry is changed.
+    newmol._qcond  = dict(mol._qcond)
     return newmol
 
 def pack(mol):
@@ -711,7 +714,7 @@ def unpack(moldic):
 def dumps(mol):
     '''Serialize Mole object to a JSON formatted str.
     '''
-    exclude_keys = set(('output', 'stdout', '_keys'))
+    exclude_keys = set(('output', 'stdout', '_keys', '_qcond'))
     nparray_keys = set(('_atm', '_bas', '_env', '_ecpbas'))
 
     moldic = dict(mol.__dict__)
@@ -1499,6 +1502,8 @@ class Mole(pyscf.lib.StreamObject):
         self._basis = None
         self._ecp = None
         self._built = False
+        # Schwarz conditions of the integrals, see scf._vhf.set_qcond
+        self._qcond = {}
         self._keys = set(self.__dict__.keys())
         self.__dict__.update(kwargs)
 
@@ -1701,6 +1706,7 @@ Note when symmetry attributes is assigned, the molecule needs to be put in the p
         logger.debug3(self, 'arg.env = %s', str(self._env))
         logger.debug3(self, 'ecpbas  = %s', str(self._ecpbas))
 
+        self._qcond = {}
         self._built = True
         return self
     kernel = build
@@ -2245,6 +2251,23 @@ Note when symmetry attributes is assigned, the molecule needs to be put in the p
                                  shls_slice, comp=comp, hermi=hermi,
                                  aosym=aosym, out=out)
 
+    def intor_iter(self, intor, comp=1, aosym='s1', shls_slice=None,
+                   max_memory=None):
+        '''Generate the 1e or 3-center integrals block by block.  See also
+        :func:`moleintor.getints_iter`
+
+        Examples:
+
+        >>> mol.build(atom='H 0 0 0; H 0 0 1.1', basis='cc-pvdz')
+        >>> for sh0, sh1, v in mol.intor_iter('cint1e_ipnuc_sph', comp=3, max_memory=1e-3):
+        ...     print(sh0, sh1, v.shape)
+        '''
+        if max_memory is None:
+            max_memory = self.max_memory
+        return moleintor.getints_iter(intor, self._atm, self._bas, self._env,
+                                      shls_slice, comp, aosym,
+                                      max_memory=max_memory)
+
     def intor_symmetric(self, intor, comp=1):
         '''One-electron integral generator. The integrals are assumed to be hermitian
 
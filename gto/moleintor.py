@@ -359,6 +359,109 @@ def getints2e(intor_name, atm, bas, env, shls_slice=None, comp=1,
         cintopt = None
         return out
 
+def getints_iter(intor_name, atm, bas, env, shls_slice=None, comp=1,
+                 aosym='s1', ao_loc=None, cintopt=None, max_memory=2000):
+    r'''Generate the 1e, 2c2e or 3-center integrals block by block.  The shells
+    of the last index (j of the 2-center integrals, k of the 3-center
+    integrals) are divided into blocks.  While the caller processes one block,
+    the next block is computed in a background thread.
+
+    Kwargs:
+        shls_slice, comp, aosym, ao_loc, cintopt : see :func:`getints`
+        max_memory : float or int
+            The memory (in MB) of the two buffers which hold the integral blocks
+
+    Yields:
+        sh0, sh1, ints : the integrals of the shells [sh0:sh1] of the last
+        index.  The shape of ints is the same as the output of :func:`getints`
+        with shls_slice (..., sh0, sh1).  ints is a view of the internal
+        buffer which is overwritten in the next iteration.  Copy it if it
+        needs to be kept.
+
+    Examples:
+
+    >>> mol.build(atom='H 0 0 0; H 0 0 1.1', basis='cc-pvdz')
+    >>> for sh0, sh1, v in getints_iter('cint1e_ipnuc_sph', mol._atm, mol._bas, mol._env, comp=3):
+    ...     print(sh0, sh1, v.shape)
+    '''
+    atm = numpy.asarray(atm, dtype=numpy.int32, order='C')
+    bas = numpy.asarray(bas, dtype=numpy.int32, order='C')
+    env = numpy.asarray(env, dtype=numpy.double, order='C')
+    nbas = bas.shape[0]
+    if ao_loc is None:
+        ao_loc = make_loc(bas, intor_name)
+
+    if (intor_name.startswith('cint1e') or
+        intor_name.startswith('cint2c2e')):
+        if shls_slice is None:
+            shls_slice = (0, nbas, 0, nbas)
+        i0, i1, j0, j1 = shls_slice[:4]
+        nrow = ao_loc[i1] - ao_loc[i0]
+        def fn(sh0, sh1, buf):
+            # hermi is not applicable to the blocks of the j index
+            return getints2c(intor_name, atm, bas, env, (i0,i1,sh0,sh1), comp,
+                             0, ao_loc, cintopt, buf)
+    elif intor_name.startswith('cint3c'):
+        if shls_slice is None:
+            shls_slice = (0, nbas, 0, nbas, 0, nbas)
+        i0, i1, j0, j1 = shls_slice[:4]
+        if aosym in ('s1',):
+            nrow = (ao_loc[i1] - ao_loc[i0]) * (ao_loc[j1] - ao_loc[j0])
+        else:
+            # the lower triangular part of the ij block of the same i and j shells
+            assert(tuple(shls_slice[0:2]) == tuple(shls_slice[2:4]))
+            nrow = ao_loc[i1]*(ao_loc[i1]+1)//2 - ao_loc[i0]*(ao_loc[i0]+1)//2
+        if cintopt is None:
+            cintopt = make_cintopt(atm, bas, env, intor_name)
+        def fn(sh0, sh1, buf):
+            return getints3c(intor_name, atm, bas, env,
+                             shls_slice[:4]+(sh0,sh1), comp, aosym, ao_loc,
+                             cintopt, buf)
+    else:
+        raise NotImplementedError('getints_iter for %s' % intor_name)
+    sh0, sh1 = shls_slice[-2:]
+    if sh0 == sh1:
+        return
+
+    if '_cart' in intor_name or '_sph' in intor_name:
+        dtype = numpy.double
+    else:
+        dtype = numpy.complex
+    # two buffers, one for the caller and one for the background thread
+    blksize = max_memory*1e6/2/numpy.dtype(dtype).itemsize / max(1, comp*nrow)
+    blksize = max(int(blksize), (ao_loc[sh0+1:sh1+1]-ao_loc[sh0:sh1]).max())
+    blocks = _shell_blocks(ao_loc, sh0, sh1, blksize)
+    buflen = max([ao_loc[b1]-ao_loc[b0] for b0, b1 in blocks]) * comp * nrow
+    bufs = [numpy.empty(buflen, dtype), numpy.empty(buflen, dtype)]
+
+    handler = pyscf.lib.background_thread(fn, blocks[0][0], blocks[0][1], bufs[0])
+    try:
+        for k, (b0, b1) in enumerate(blocks):
+            thread, handler = handler, None
+            ints = thread.join()
+            if k+1 < len(blocks):
+                handler = pyscf.lib.background_thread(fn, blocks[k+1][0],
+                                                      blocks[k+1][1], bufs[(k+1)%2])
+            yield b0, b1, ints
+    finally:
+        # The caller may stop the iteration early.  Wait for the thread which
+        # is still writing to the buffer.
+        if handler is not None:
+            handler.join()
+
+def _shell_blocks(ao_loc, sh0, sh1, blksize):
+    '''Divide the shells [sh0:sh1] into segments.  Each segment has no more
+    than blksize functions unless a single shell is larger than blksize.
+    '''
+    blocks = []
+    b0 = sh0
+    for i in range(sh0, sh1):
+        if i > b0 and ao_loc[i+1] - ao_loc[b0] > blksize:
+            blocks.append((b0, i))
+            b0 = i
+    blocks.append((b0, sh1))
+    return blocks
+
 def getints_by_shell(intor_name, shls, atm, bas, env, comp=1):
     r'''For given 2, 3 or 4 shells, interface for libcint to get 1e, 2e,
     2-center-2e or 3-center-2e integrals
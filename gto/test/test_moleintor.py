@@ -205,6 +205,32 @@ class KnowValues(unittest.TestCase):
         self.assertAlmostEqual(finger(eri1), 642.70512922279079, 11)
 
 
+    def test_getints_iter(self):
+        ref0 = ref = mol.intor('cint1e_ipnuc_sph', comp=3)
+        ao_loc0 = ao_loc = mol.ao_loc_nr()
+        blocks = []
+        for sh0, sh1, v in mol.intor_iter('cint1e_ipnuc_sph', comp=3, max_memory=.1):
+            self.assertTrue(numpy.allclose(v, ref[:,:,ao_loc[sh0]:ao_loc[sh1]]))
+            blocks.append((sh0, sh1))
+        self.assertTrue(len(blocks) > 1)
+        self.assertEqual(blocks[-1][1], mol.nbas)
+
+        mol1 = gto.M(atom='H 0 1 .5; H 1 .8 1.1; H .2 1.8 0', basis='cc-pvdz')
+        ref = mol1.intor('cint3c1e_sph', aosym='s2ij')
+        ao_loc = mol1.ao_loc_nr()
+        for sh0, sh1, v in mol1.intor_iter('cint3c1e_sph', aosym='s2ij',
+                                           max_memory=.01):
+            self.assertTrue(numpy.allclose(v, ref[:,ao_loc[sh0]:ao_loc[sh1]]))
+        self.assertRaises(AssertionError, next,
+                          mol1.intor_iter('cint3c1e_sph', aosym='s2ij',
+                                          shls_slice=(0,2,0,3,0,3)))
+
+        # stop early, the background thread is joined when the generator is closed
+        gen = mol.intor_iter('cint1e_ipnuc_sph', comp=3, max_memory=.1)
+        sh0, sh1, v = next(gen)
+        gen.close()
+        self.assertTrue(numpy.allclose(v, ref0[:,:,:ao_loc0[sh1]]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -171,6 +171,48 @@ class DIIS(object):
                     self._diisfile[ekey][p0:p1] = x[p0:p1] - self._xprev[p0:p1]
             self._head += 1
 
+    def dump(self, h5grp):
+        '''Save the DIIS subspace in the HDF5 group h5grp.  The saved
+        subspace can be loaded by :func:`restore` to continue the
+        extrapolation in another run.
+        '''
+        for key in ('head', 'space', 'bookkeep', 'H', 'xprev',
+                    'err_vec_touched'):
+            if key in h5grp:
+                del(h5grp[key])
+        h5grp['head'] = self._head
+        h5grp['space'] = self.space
+        h5grp['bookkeep'] = numpy.asarray(self._bookkeep, dtype=int)
+        h5grp['err_vec_touched'] = self._err_vec_touched
+        if self._H is not None:
+            h5grp['H'] = self._H
+        if self._xprev is not None:
+            _h5_copy(h5grp, 'xprev', self._xprev)
+        for idx in self._bookkeep:
+            _h5_copy(h5grp, 'x%d'%idx, self.get_vec(idx))
+            _h5_copy(h5grp, 'e%d'%idx, self.get_err_vec(idx))
+        return self
+
+    def restore(self, h5grp):
+        '''Load the DIIS subspace saved by :func:`dump`'''
+        self._head = int(numpy.asarray(h5grp['head']))
+        self.space = int(numpy.asarray(h5grp['space']))
+        self._bookkeep = [int(i) for i in numpy.asarray(h5grp['bookkeep'])]
+        self._err_vec_touched = bool(numpy.asarray(h5grp['err_vec_touched']))
+        if 'H' in h5grp:
+            self._H = numpy.asarray(h5grp['H'])
+        if 'xprev' in h5grp:
+            self._xprev = numpy.asarray(h5grp['xprev'])
+        self._buffer = {}
+        for idx in self._bookkeep:
+            for key in ('x%d'%idx, 'e%d'%idx):
+                val = h5grp[key]
+                if val.size < INCORE_SIZE:
+                    self._store(key, numpy.asarray(val))
+                else:
+                    _h5_copy(self._diisfile, key, val)
+        return self
+
     def get_err_vec(self, idx):
         if self._buffer:
             return self._buffer['e%d'%idx]
@@ -243,6 +285,17 @@ class DIIS(object):
 #class EDIIS
 #class GDIIS
 
+def _h5_copy(h5grp, key, value):
+    '''Copy the 1D array (or HDF5 dataset) value to h5grp[key] block by block'''
+    if key in h5grp and h5grp[key].shape != value.shape:
+        del(h5grp[key])
+    if key not in h5grp:
+        h5grp.create_dataset(key, value.shape, value.dtype,
+                             chunks=(min(value.size,BLOCK_SIZE),))
+    dat = h5grp[key]
+    for p0, p1 in prange(0, value.size, BLOCK_SIZE):
+        dat[p0:p1] = value[p0:p1]
+
 def prange(start, end, step):
     for i in range(start, end, step):
         yield i, min(i+step, end)
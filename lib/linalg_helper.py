@@ -413,6 +413,163 @@ def davidson1(aop, x0, precond, tol=1e-14, max_cycle=50, max_space=12,
 
     return e, x0
 
+def davidson1_lowmem(aop, x0, precond, tol=1e-14, max_cycle=50, max_space=12,
+                     lindep=1e-14, max_memory=2000, dot=numpy.dot,
+                     callback=None, nroots=1, verbose=logger.WARN):
+    '''Davidson diagonalization with less memory than :func:`davidson1`.
+
+    The trial vectors are stored in single precision and a*x of the trial
+    vectors are not stored, which reduces the memory of the subspace by 4
+    times.  The trial vectors are rounded to single precision before aop is
+    called.  The subspace Hamiltonian and the overlap matrix are evaluated
+    with the rounded vectors, so the rounding does not change the Ritz
+    values.  In each iteration, aop is called one more time to compute a*x
+    of the current eigenvectors.  The arguments are the same to
+    :func:`davidson1` (lessio is not needed).
+    '''
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(sys.stdout, verbose)
+
+    def qr(xs):
+        qs = [xs[0]/numpy_helper.norm(xs[0])]
+        for i in range(1, len(xs)):
+            xi = xs[i].copy()
+            for j in range(len(qs)):
+                xi -= qs[j] * numpy.dot(qs[j].conj(), xi)
+            norm = numpy_helper.norm(xi)
+            if norm > 1e-7:
+                qs.append(xi/norm)
+        return qs
+    def single(x):
+        if numpy.iscomplexobj(x):
+            return numpy.asarray(x, dtype=numpy.complex64)
+        else:
+            return numpy.asarray(x, dtype=numpy.float32)
+
+    toloose = numpy.sqrt(tol) * 1e-2
+
+    if isinstance(x0, numpy.ndarray) and x0.ndim == 1:
+        x0 = [x0]
+    max_cycle = min(max_cycle, x0[0].size)
+    max_space = max_space + nroots * 2
+    # max_space single precision vectors for xs, nroots*4 for holding xt,
+    # axt, x0 and ax0
+    _incore = max_memory*1e6/x0[0].nbytes > max_space*.5+nroots*4
+    heff = seff = None
+    fresh_start = True
+
+    for icyc in range(max_cycle):
+        if fresh_start:
+            if _incore:
+                xs = []
+            else:
+                xs = _Xlist()
+            space = 0
+            xt, x0 = qr(x0), None
+            e = numpy.zeros(nroots)
+            fresh_start = False
+        elif len(xt) > 1:
+            xt = qr(xt)
+            xt = xt[:40]  # 40 trial vectors at most
+
+        for k, xi in enumerate(xt):
+            xs.append(single(xi))
+            xt[k] = numpy.asarray(xs[space+k], dtype=xi.dtype)
+        axt = aop(xt)
+        rnow = len(xt)
+        head, space = space, space+rnow
+
+        if heff is None:  # Lazy initilize heff to determine the dtype
+            heff = numpy.empty((max_space+nroots,max_space+nroots), dtype=axt[0].dtype)
+            seff = numpy.empty((max_space+nroots,max_space+nroots), dtype=axt[0].dtype)
+
+        for i in range(space):
+            if i < head:
+                xsi = numpy.asarray(xs[i], dtype=axt[0].dtype)
+                klist = range(rnow)
+            else:
+                xsi = xt[i-head]
+                klist = range(i-head, rnow)
+            for k in klist:
+                heff[i,head+k] = dot(xsi.conj(), axt[k])
+                heff[head+k,i] = heff[i,head+k].conj()
+                seff[i,head+k] = dot(xsi.conj(), xt[k])
+                seff[head+k,i] = seff[i,head+k].conj()
+        xsi = axt = None
+
+        w, v = safe_eigh(heff[:space,:space], seff[:space,:space], lindep)[:2]
+        if space < nroots or e.size != nroots:
+            de = w[:nroots]
+        else:
+            de = w[:nroots] - e
+        e = w[:nroots]
+
+        x0 = []
+        for k in range(len(e)):
+            x0.append(numpy.asarray(xs[space-1], dtype=xt[0].dtype) * v[space-1,k])
+        for i in reversed(range(space-1)):
+            xsi = numpy.asarray(xs[i], dtype=xt[0].dtype)
+            for k in range(len(e)):
+                x0[k] += v[i,k] * xsi
+        xsi = None
+
+        ide = numpy.argmax(abs(de))
+        if abs(de[ide]) < tol:
+            log.debug('converge %d %d  e= %s  max|de|= %4.3g',
+                      icyc, space, e, de[ide])
+            break
+
+        ax0 = aop(x0)
+        dx_norm = []
+        xt = []
+        for k, ek in enumerate(e):
+            dxtmp = ax0[k] - ek * x0[k]
+            xt.append(dxtmp)
+            dx_norm.append(numpy_helper.norm(dxtmp))
+        ax0 = None
+
+        if max(dx_norm) < toloose:
+            log.debug('converge %d %d  |r|= %4.3g  e= %s  max|de|= %4.3g',
+                      icyc, space, max(dx_norm), e, de[ide])
+            break
+
+        # remove subspace linear dependency
+        for k, ek in enumerate(e):
+            if dx_norm[k] > toloose:
+                xt[k] = precond(xt[k], e[0], x0[k])
+                xt[k] *= 1/numpy_helper.norm(xt[k])
+            else:
+                xt[k] = None
+        xt = [xi for xi in xt if xi is not None]
+        for i in range(space):
+            xsi = numpy.asarray(xs[i], dtype=x0[0].dtype)
+            for xi in xt:
+                xi -= xsi * (numpy.dot(xsi.conj(), xi) / numpy.dot(xsi.conj(), xsi))
+        xsi = None
+        norm_min = 1
+        for i,xi in enumerate(xt):
+            norm = numpy_helper.norm(xi)
+            if norm > toloose:
+                xt[i] *= 1/norm
+                norm_min = min(norm_min, norm)
+            else:
+                xt[i] = None
+        xt = [xi for xi in xt if xi is not None]
+        if len(xt) == 0:
+            log.debug('Linear dependency in trial subspace')
+            break
+        log.debug('davidson %d %d  |r|= %4.3g  e= %s  max|de|= %4.3g  lindep= %4.3g',
+                  icyc, space, max(dx_norm), e, de[ide], norm_min)
+
+        fresh_start = fresh_start or space+nroots > max_space
+
+        if callable(callback):
+            callback(locals())
+
+    return e, x0
+
 def eigh(a, *args, **kwargs):
     if isinstance(a, numpy.ndarray) and a.ndim == 2:
         e, v = scipy.linalg.eigh(a)
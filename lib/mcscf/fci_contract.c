@@ -401,6 +401,152 @@ void FCIcontract_2e_spin1(double *eri, double *ci0, double *ci1,
         free(clinkb);
 }
 
+/*
+ * ctr_rhf2e_kern for nvec CI vectors.  The t1 intermediates of all vectors
+ * are stored in t1buf[nvec,bcount,nnorb] and multiplied with eri in one
+ * dgemm call (one dgemm per irrep if dimirrep is given, see
+ * ctr_rhf2esym_kern).  ci1buf is [nvec,na,ncol_ci1buf]
+ */
+static void ctr_rhf2e_multi_kern(double *eri, double *ci0, double *ci1,
+                                 double *ci1buf, double *t1buf, int nvec,
+                                 int bcount_for_spread_a, int ncol_ci1buf,
+                                 int bcount, int stra_id, int strb_id,
+                                 int norb, int na, int nb, int nlinka, int nlinkb,
+                                 _LinkTrilT *clink_indexa, _LinkTrilT *clink_indexb,
+                                 int *dimirrep, int totirrep)
+{
+        const char TRANS_N = 'N';
+        const double D0 = 0;
+        const double D1 = 1;
+        const int nnorb = norb * (norb+1)/2;
+        const int ncol = bcount * nvec;
+        const size_t nab = (size_t)na * nb;
+        const size_t t1size = (size_t)nnorb * bcount;
+        double *t1 = t1buf;
+        double *vt1 = t1buf + t1size * nvec;
+        double csum = 0;
+        int iv, ir, p0;
+
+        for (iv = 0; iv < nvec; iv++) {
+                csum += prog0_b_t1(ci0+nab*iv, t1+t1size*iv, bcount, stra_id,
+                                   strb_id, norb, nb, nlinkb, clink_indexb)
+                      + prog_a_t1(ci0+nab*iv, t1+t1size*iv, bcount, stra_id,
+                                  strb_id, norb, nb, nlinka, clink_indexa);
+        }
+
+        if (csum > CSUMTHR) {
+                if (dimirrep == NULL) {
+                        dgemm_(&TRANS_N, &TRANS_N, &nnorb, &ncol, &nnorb,
+                               &D1, eri, &nnorb, t1, &nnorb,
+                               &D0, vt1, &nnorb);
+                } else {
+                        for (ir = 0, p0 = 0; ir < totirrep; ir++) {
+                                dgemm_(&TRANS_N, &TRANS_N,
+                                       dimirrep+ir, &ncol, dimirrep+ir,
+                                       &D1, eri+p0*nnorb+p0, &nnorb, t1+p0, &nnorb,
+                                       &D0, vt1+p0, &nnorb);
+                                p0 += dimirrep[ir];
+                        }
+                }
+                for (iv = 0; iv < nvec; iv++) {
+                        spread_b_t1(ci1+nab*iv, vt1+t1size*iv, bcount,
+                                    stra_id, strb_id, norb, nb, nlinkb, clink_indexb);
+                        spread_a_t1(ci1buf+(size_t)na*ncol_ci1buf*iv, vt1+t1size*iv,
+                                    bcount_for_spread_a, stra_id, 0, norb,
+                                    ncol_ci1buf, nlinka, clink_indexa);
+                }
+        }
+}
+
+/*
+ * Driver of the multi-vector contraction.  ci0 and ci1 are [nvec,na,nb].
+ * The link tables are traversed once for all vectors.  The block of beta
+ * strings is shrunk for large nvec to limit the size of ci1buf, while the
+ * dgemm in each block is still up to 4 times wider than that of a single
+ * vector.  For spin0, only half of the contraction is computed as in
+ * FCIcontract_2e_spin0.
+ */
+static void contract_2e_multi_drv(double *eri, double *ci0, double *ci1,
+                                  int nvec, int norb, int na, int nb,
+                                  int nlinka, int nlinkb,
+                                  _LinkTrilT *clinka, _LinkTrilT *clinkb,
+                                  int *dimirrep, int totirrep, int spin0)
+{
+        int blksize = MIN(STRB_BLKSIZE, MAX(STRB_BLKSIZE*4/nvec, 16));
+
+        memset(ci1, 0, sizeof(double)*na*nb*nvec);
+
+#pragma omp parallel default(none) \
+        shared(eri, ci0, ci1, nvec, norb, na, nb, nlinka, nlinkb, blksize, \
+               clinka, clinkb, dimirrep, totirrep, spin0)
+{
+        int strk, ib, blen, iv;
+        const size_t nab = (size_t)na * nb;
+        double *t1buf = malloc(sizeof(double) * blksize*norb*(norb+1)*nvec);
+        double *ci1buf = malloc(sizeof(double) * na*blksize*nvec);
+        for (ib = 0; ib < nb; ib += blksize) {
+                blen = MIN(blksize, nb-ib);
+                memset(ci1buf, 0, sizeof(double) * na*blen*nvec);
+#pragma omp for schedule(guided, 1)
+/* For spin0, strk starts from ib because [0:ib,0:ib] have been evaluated */
+                for (strk = spin0 ? ib : 0; strk < na; strk++) {
+                        if (spin0) {
+                                ctr_rhf2e_multi_kern(eri, ci0, ci1, ci1buf, t1buf, nvec,
+                                                     MIN(blksize, strk-ib), blen,
+                                                     MIN(blksize, strk+1-ib),
+                                                     strk, ib, norb, na, nb,
+                                                     nlinka, nlinkb, clinka, clinkb,
+                                                     dimirrep, totirrep);
+                        } else {
+                                ctr_rhf2e_multi_kern(eri, ci0, ci1, ci1buf, t1buf, nvec,
+                                                     blen, blen, blen, strk, ib,
+                                                     norb, na, nb, nlinka, nlinkb,
+                                                     clinka, clinkb,
+                                                     dimirrep, totirrep);
+                        }
+                }
+#pragma omp critical
+                for (iv = 0; iv < nvec; iv++) {
+                        axpy2d(ci1+nab*iv+ib, ci1buf+(size_t)na*blen*iv,
+                               na, nb, blen);
+                }
+        }
+        free(ci1buf);
+        free(t1buf);
+}
+}
+
+/*
+ * FCIcontract_2e_spin1 for nvec CI vectors.  ci0 and ci1 are [nvec,na,nb].
+ */
+void FCIcontract_2e_spin1_multi(double *eri, double *ci0, double *ci1, int nvec,
+                                int norb, int na, int nb, int nlinka, int nlinkb,
+                                int *link_indexa, int *link_indexb)
+{
+        _LinkTrilT *clinka = malloc(sizeof(_LinkTrilT) * nlinka * na);
+        _LinkTrilT *clinkb = malloc(sizeof(_LinkTrilT) * nlinkb * nb);
+        FCIcompress_link_tril(clinka, link_indexa, na, nlinka);
+        FCIcompress_link_tril(clinkb, link_indexb, nb, nlinkb);
+        contract_2e_multi_drv(eri, ci0, ci1, nvec, norb, na, nb, nlinka, nlinkb,
+                              clinka, clinkb, NULL, 0, 0);
+        free(clinka);
+        free(clinkb);
+}
+
+/*
+ * FCIcontract_2e_spin0 for nvec CI vectors.  Half of the contraction is
+ * computed.  The right contracted ci vectors are (ci1[i]+ci1[i].T)
+ */
+void FCIcontract_2e_spin0_multi(double *eri, double *ci0, double *ci1, int nvec,
+                                int norb, int na, int nlink, int *link_index)
+{
+        _LinkTrilT *clink = malloc(sizeof(_LinkTrilT) * nlink * na);
+        FCIcompress_link_tril(clink, link_index, na, nlink);
+        contract_2e_multi_drv(eri, ci0, ci1, nvec, norb, na, na, nlink, nlink,
+                              clink, clink, NULL, 0, 1);
+        free(clink);
+}
+
 /*
  * eri_ab is mixed integrals (alpha,alpha|beta,beta), |beta,beta) in small strides
  */
@@ -833,3 +979,33 @@ void FCIcontract_2e_spin0_symm(double *eri, double *ci0, double *ci1,
         free(clink);
 }
 
+/*
+ * FCIcontract_2e_spin1_symm and FCIcontract_2e_spin0_symm for nvec CI
+ * vectors.  eri and link_index are reordered wrt the irreps of the pairs.
+ */
+void FCIcontract_2e_spin1_symm_multi(double *eri, double *ci0, double *ci1,
+                                     int nvec, int norb, int na, int nb,
+                                     int nlinka, int nlinkb,
+                                     int *link_indexa, int *link_indexb,
+                                     int *dimirrep, int totirrep)
+{
+        _LinkTrilT *clinka = malloc(sizeof(_LinkTrilT) * nlinka * na);
+        _LinkTrilT *clinkb = malloc(sizeof(_LinkTrilT) * nlinkb * nb);
+        FCIcompress_link_tril(clinka, link_indexa, na, nlinka);
+        FCIcompress_link_tril(clinkb, link_indexb, nb, nlinkb);
+        contract_2e_multi_drv(eri, ci0, ci1, nvec, norb, na, nb, nlinka, nlinkb,
+                              clinka, clinkb, dimirrep, totirrep, 0);
+        free(clinka);
+        free(clinkb);
+}
+
+void FCIcontract_2e_spin0_symm_multi(double *eri, double *ci0, double *ci1,
+                                     int nvec, int norb, int na, int nlink,
+                                     int *link_index, int *dimirrep, int totirrep)
+{
+        _LinkTrilT *clink = malloc(sizeof(_LinkTrilT) * nlink * na);
+        FCIcompress_link_tril(clink, link_index, na, nlink);
+        contract_2e_multi_drv(eri, ci0, ci1, nvec, norb, na, na, nlink, nlink,
+                              clink, clink, dimirrep, totirrep, 1);
+        free(clink);
+}
@@ -399,14 +399,23 @@ class ProcessWithReturnValue(Process):
     get = join
 
 class ThreadWithReturnValue(Thread):
+    '''Thread which returns the value of target in join().  The exception
+    raised by target is re-raised in join() of the calling thread.
+    '''
     def __init__(self, group=None, target=None, name=None, args=(),
                  kwargs=None):
         self._q = Queue()
+        self._e = None
         def qwrap(*args, **kwargs):
-            self._q.put(target(*args, **kwargs))
+            try:
+                self._q.put(target(*args, **kwargs))
+            except BaseException as e:
+                self._e = e
         Thread.__init__(self, group, qwrap, name, args, kwargs)
     def join(self):
         Thread.join(self)
+        if self._e is not None:
+            raise self._e
         return self._q.get()
     get = join
 
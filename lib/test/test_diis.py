@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+
+import unittest
+import tempfile
+import numpy
+import h5py
+from pyscf import lib
+
+class KnowValues(unittest.TestCase):
+    def test_dump_restore(self):
+        numpy.random.seed(2)
+        xs = numpy.random.random((7,10))
+        es = numpy.random.random((7,10))
+        adiis = lib.diis.DIIS()
+        adiis.space = 3
+        for x, e in zip(xs[:5], es[:5]):
+            adiis.update(x, e)
+
+        ftmp = tempfile.NamedTemporaryFile()
+        with h5py.File(ftmp.name, 'w') as f:
+            adiis.dump(f.create_group('diis'))
+            adiis1 = lib.diis.DIIS()
+            adiis1.restore(f['diis'])
+        self.assertEqual(adiis1.space, 3)
+        self.assertEqual(adiis1.get_num_vec(), 3)
+        for x, e in zip(xs[5:], es[5:]):
+            self.assertTrue(numpy.allclose(adiis1.update(x, e),
+                                           adiis.update(x, e)))
+
+if __name__ == "__main__":
+    print("Full Tests for diis")
+    unittest.main()
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+
+import unittest
+from pyscf import lib
+
+def fail(x):
+    raise ValueError(x)
+
+class KnowValues(unittest.TestCase):
+    def test_background_thread(self):
+        thread = lib.background_thread(lambda x: x*2, 3)
+        self.assertEqual(thread.join(), 6)
+        thread = lib.background_thread(fail, 'error in thread')
+        self.assertRaises(ValueError, thread.join)
+
+if __name__ == "__main__":
+    print("Full Tests for misc")
+    unittest.main()
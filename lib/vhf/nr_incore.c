@@ -795,3 +795,98 @@ void CVHFnrs1_incore_drv(double *eri, double *dmj, double *vj,
         }
 }
 
+
+/*
+ * Contract the incore eri with a set of density matrices.  Each block
+ * eri[ij,:] is loaded once and applied to all density matrices, so that the
+ * eri array is swept only once regardless of the number of density matrices.
+ */
+void CVHFnrs8_incore_nset_drv(double *eri, double **dmj, double **vj,
+                              double **dmk, double **vk, int n_dm,
+                              int n, void (*const fvj)(), void (*const fvk)())
+{
+        size_t npair = n*(n+1)/2;
+        size_t nn = n * n;
+        int idm;
+
+        for (idm = 0; idm < n_dm; idm++) {
+                memset(vj[idm], 0, sizeof(double)*nn);
+                memset(vk[idm], 0, sizeof(double)*nn);
+        }
+
+#pragma omp parallel shared(eri, dmj, dmk, vj, vk, n, n_dm, npair, nn)
+        {
+                int i, j, idm;
+                size_t ij, off;
+                double *vj_priv = malloc(sizeof(double)*nn*n_dm);
+                double *vk_priv = malloc(sizeof(double)*nn*n_dm);
+                memset(vj_priv, 0, sizeof(double)*nn*n_dm);
+                memset(vk_priv, 0, sizeof(double)*nn*n_dm);
+#pragma omp for nowait schedule(dynamic, 4)
+                for (ij = 0; ij < npair; ij++) {
+                        i = (int)(sqrt(2*ij+.25) - .5 + 1e-7);
+                        j = ij - i*(i+1)/2;
+                        off = ij*(ij+1)/2;
+                        for (idm = 0; idm < n_dm; idm++) {
+                                (*fvj)(eri+off, dmj[idm], vj_priv+idm*nn, n, i, j);
+                                (*fvk)(eri+off, dmk[idm], vk_priv+idm*nn, n, i, j);
+                        }
+                }
+#pragma omp critical
+                {
+                        for (idm = 0; idm < n_dm; idm++) {
+                                for (ij = 0; ij < nn; ij++) {
+                                        vj[idm][ij] += vj_priv[idm*nn+ij];
+                                        vk[idm][ij] += vk_priv[idm*nn+ij];
+                                }
+                        }
+                }
+                free(vj_priv);
+                free(vk_priv);
+        }
+}
+
+void CVHFnrs4_incore_nset_drv(double *eri, double **dmj, double **vj,
+                              double **dmk, double **vk, int n_dm,
+                              int n, void (*const fvj)(), void (*const fvk)())
+{
+        size_t npair = n*(n+1)/2;
+        size_t nn = n * n;
+        int idm;
+
+        for (idm = 0; idm < n_dm; idm++) {
+                memset(vj[idm], 0, sizeof(double)*nn);
+                memset(vk[idm], 0, sizeof(double)*nn);
+        }
+
+#pragma omp parallel shared(eri, dmj, dmk, vj, vk, n, n_dm, npair, nn)
+        {
+                int i, j, idm;
+                size_t ij, off;
+                double *vj_priv = malloc(sizeof(double)*nn*n_dm);
+                double *vk_priv = malloc(sizeof(double)*nn*n_dm);
+                memset(vj_priv, 0, sizeof(double)*nn*n_dm);
+                memset(vk_priv, 0, sizeof(double)*nn*n_dm);
+#pragma omp for nowait schedule(dynamic, 4)
+                for (ij = 0; ij < npair; ij++) {
+                        i = (int)(sqrt(2*ij+.25) - .5 + 1e-7);
+                        j = ij - i*(i+1)/2;
+                        off = ij * npair;
+                        for (idm = 0; idm < n_dm; idm++) {
+                                (*fvj)(eri+off, dmj[idm], vj_priv+idm*nn, n, i, j);
+                                (*fvk)(eri+off, dmk[idm], vk_priv+idm*nn, n, i, j);
+                        }
+                }
+#pragma omp critical
+                {
+                        for (idm = 0; idm < n_dm; idm++) {
+                                for (ij = 0; ij < nn; ij++) {
+                                        vj[idm][ij] += vj_priv[idm*nn+ij];
+                                        vk[idm][ij] += vk_priv[idm*nn+ij];
+                                }
+                        }
+                }
+                free(vj_priv);
+                free(vk_priv);
+        }
+}
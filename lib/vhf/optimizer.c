@@ -33,11 +33,11 @@ void CVHFdel_optimizer(CVHFOpt **opt)
                 return;
         }
 
-        if (!opt0->q_cond) {
+        if (opt0->q_cond) {
                 free(opt0->q_cond);
                 opt0->q_cond = NULL;
         }
-        if (!opt0->dm_cond) {
+        if (opt0->dm_cond) {
                 free(opt0->dm_cond);
                 opt0->dm_cond = NULL;
         }
@@ -122,11 +122,22 @@ double CVHFget_direct_scf_cutoff(CVHFOpt *opt)
 }
 
 
+/*
+ * Copy the precomputed (e.g. cached) Schwarz conditions to opt
+ */
+void CVHFset_q_cond(CVHFOpt *opt, double *q_cond, int len)
+{
+        if (opt->q_cond) {
+                free(opt->q_cond);
+        }
+        opt->q_cond = (double *)malloc(sizeof(double) * len);
+        memcpy(opt->q_cond, q_cond, sizeof(double) * len);
+}
+
 void CVHFsetnr_direct_scf(CVHFOpt *opt, int *atm, int natm,
                           int *bas, int nbas, double *env)
 {
-        /* This memory is released in void CVHFdel_optimizer, Don't know
-         * why valgrind raises memory leak here */
+        /* This memory is released in void CVHFdel_optimizer */
         if (opt->q_cond) {
                 free(opt->q_cond);
         }
@@ -34,6 +34,7 @@ int CVHFr_vknoscreen(int *shls, CVHFOpt *opt,
                      double **dms_cond, int n_dm, double *dm_atleast,
                      int *atm, int *bas, double *env);
 
+void CVHFset_q_cond(CVHFOpt *opt, double *q_cond, int len);
 void CVHFsetnr_direct_scf(CVHFOpt *opt, int *atm, int natm,
                           int *bas, int nbas, double *env);
 void CVHFsetnr_direct_scf_dm(CVHFOpt *opt, double *dm, int nset,
@@ -111,7 +111,7 @@ def density_fit(casscf, auxbasis=None, with_df=None):
                 vj, vk = self.with_df.get_jk(dm, hermi=hermi)
                 return vj-vk*.5
             else:
-                return casscf_class.get_jk(self, mol, dm, hermi)
+                return casscf_class.get_veff(self, mol, dm, hermi)
 
 # We don't modify self._scf because it changes self.h1eff function.
 # We only need approximate jk for self.update_jk_in_ah
@@ -130,16 +130,19 @@ def density_fit(casscf, auxbasis=None, with_df=None):
                 mo1 = numpy.dot(mo, u)
                 mo1_cas = mo1[:,ncore:nocc]
 
-                paaa = numpy.zeros((nmo*ncas,ncas*ncas))
+                paaa = numpy.ndarray((nmo*ncas,ncas*ncas), buffer=out)
+                paaa[:] = 0
                 moij = numpy.asarray(numpy.hstack((mo1, mo1_cas)), order='F')
                 ijshape = (0, nmo, nmo, nmo+ncas)
                 for eri1 in self.with_df.loop():
+                    naux = eri1.shape[0]
                     bufpa = _ao2mo.nr_e2(eri1, moij, ijshape, 's2', 's1')
-                    bufaa = numpy.asarray(buf1[ncore:nocc,:], order='C')
+                    bufaa = bufpa.reshape(naux,nmo,ncas)[:,ncore:nocc]
+                    bufaa = numpy.asarray(bufaa.reshape(naux,ncas*ncas))
                     pyscf.lib.dot(bufpa.T, bufaa, 1, paaa, 1)
                 return paaa.reshape(nmo,ncas,ncas,ncas)
             else:
-                return casscf_class._exact_paaa(self, mol, u, out)
+                return casscf_class._exact_paaa(self, mo, u, out)
 
     return CASSCF()
 
@@ -271,16 +274,23 @@ class _ERIS(object):
         k_cp = numpy.zeros((ncore,nmo))
 
         mo = numpy.asarray(mo, order='F')
-        _tmpfile1 = tempfile.NamedTemporaryFile()
-        fxpp = h5py.File(_tmpfile1.name)
         bufpa = numpy.empty((naoaux,nmo,ncas))
-        bufs1 = numpy.empty((with_df.blockdim,nmo,nmo))
+# The (L|pq) of a block of auxiliary basis and the cderi block (double
+# buffered in DF.loop) are held in memory.  The largest array is bufpa.
+        mem_now = pyscf.lib.current_memory()[0]
+        blksize = (max_memory-mem_now)*1e6/8/(nmo**2+nao*(nao+1))
+        blksize = int(min(with_df.blockdim, max(4, blksize)))
+        log.debug1('blksize for (L|pq) = %d', blksize)
+
+        _tmpfile1 = tempfile.NamedTemporaryFile()
+        fxpp = h5py.File(_tmpfile1.name, 'w')
+        bufs1 = numpy.empty((blksize,nmo,nmo))
         fmmm = _ao2mo.libao2mo.AO2MOmmm_nr_s2_iltj
         fdrv = _ao2mo.libao2mo.AO2MOnr_e2_drv
         ftrans = _ao2mo.libao2mo.AO2MOtranse2_nr_s2
         fxpp_keys = []
         b0 = 0
-        for k, eri1 in enumerate(with_df.loop()):
+        for k, eri1 in enumerate(with_df.loop(blksize)):
             naux = eri1.shape[0]
             bufpp = bufs1[:naux]
             fdrv(ftrans, fmmm,
@@ -76,13 +76,14 @@ def gen_g_hop(casscf, mo, u, casdm1, casdm2, eris):
         dm_core = dm_core + dm_core.T
         dm_cas = reduce(numpy.dot, (mo_cas, casdm1, mo1[:,ncore:nocc].T))
         dm_cas = dm_cas + dm_cas.T
-        vj, vk = casscf._scf.get_jk(casscf.mol, (dm_core,dm_cas)) # first order response only
+        # first order response only
+        v1 = casscf.get_veff(casscf.mol, numpy.asarray((dm_core,dm_cas)))
         vhfc = numpy.dot(eris.vhf_c, dt)
         vhfc = (vhfc + vhfc.T + eris.vhf_c
-                + reduce(numpy.dot, (mo.T, vj[0]-vk[0]*.5, mo)))
+                + reduce(numpy.dot, (mo.T, v1[0], mo)))
         vhfa = numpy.dot(vhf_a, dt)
         vhfa = (vhfa + vhfa.T + vhf_a
-                + reduce(numpy.dot, (mo.T, vj[1]-vk[1]*.5, mo)))
+                + reduce(numpy.dot, (mo.T, v1[1], mo)))
         g[:,:ncore] += vhfc[:,:ncore]+vhfa[:,:ncore]
         g[:,:ncore] *= 2
         g[:,ncore:nocc] = numpy.dot(g[:,ncore:nocc]+vhfc[:,ncore:nocc], casdm1)
@@ -99,10 +100,11 @@ def gen_g_hop(casscf, mo, u, casdm1, casdm2, eris):
         dm_core1 = reduce(numpy.dot, (mo1[:,:ncore], mo1[:,:ncore].T)) * 2
         dm_cas0  = reduce(numpy.dot, (mo[:,ncore:nocc], casdm1, mo[:,ncore:nocc].T))
         dm_cas1  = reduce(numpy.dot, (mo1[:,ncore:nocc], casdm1, mo1[:,ncore:nocc].T))
-        vj, vk = casscf._scf.get_jk(casscf.mol, (dm_core1-dm_core0, dm_cas1-dm_cas0))
-        vhfc1 =(reduce(numpy.dot, (mo1.T, vj[0]-vk[0]*.5, mo1[:,:nocc]))
+        v1 = casscf.get_veff(casscf.mol,
+                             numpy.asarray((dm_core1-dm_core0, dm_cas1-dm_cas0)))
+        vhfc1 =(reduce(numpy.dot, (mo1.T, v1[0], mo1[:,:nocc]))
               + reduce(numpy.dot, (u.T, eris.vhf_c, u[:,:nocc])))
-        vhfa1 =(reduce(numpy.dot, (mo1.T, vj[1]-vk[1]*.5, mo1[:,:nocc]))
+        vhfa1 =(reduce(numpy.dot, (mo1.T, v1[1], mo1[:,:nocc]))
               + reduce(numpy.dot, (u.T, vhf_a, u[:,:nocc])))
         g[:,:ncore] += vhfc1[:,:ncore] + vhfa1[:,:ncore]
         g[:,:ncore] *= 2
@@ -861,12 +863,11 @@ class CASSCF(casci.CASCI):
             mo1 = numpy.dot(mo, u)
             mo1_cas = mo1[:,ncore:nocc]
             dm_core  = numpy.dot(mo1[:,:ncore], mo1[:,:ncore].T) * 2
-            vj, vk = self._scf.get_jk(self.mol, dm_core)
             h1 =(reduce(numpy.dot, (ua.T, h1e_mo, ua)) +
-                 reduce(numpy.dot, (mo1_cas.T, vj-vk*.5, mo1_cas)))
+                 reduce(numpy.dot, (mo1_cas.T, self.get_veff(self.mol, dm_core),
+                                    mo1_cas)))
             eris._paaa = self._exact_paaa(mo, u)
             h2 = eris._paaa[ncore:nocc]
-            vj = vk = None
         else:
             p1aa = numpy.empty((nmo,ncas,ncas**2))
             paa1 = numpy.empty((nmo,ncas**2,ncas))
@@ -261,6 +261,9 @@ class _ERIS(object):
         mem_incore, mem_outcore, mem_basic = _mem_usage(ncore, ncas, nmo)
         mem_now = pyscf.lib.current_memory()[0]
 
+        log = logger.Logger(casscf.stdout, casscf.verbose)
+        t0 = (time.clock(), time.time())
+
         eri = casscf._scf._eri
         if (method == 'incore' and eri is not None and
             (mem_incore+mem_now < casscf.max_memory*.9) or
@@ -270,10 +273,10 @@ class _ERIS(object):
                 eri = _vhf.int2e_sph(mol._atm, mol._bas, mol._env)
             self.j_pc, self.k_pc, self.ppaa, self.papa = \
                     trans_e1_incore(eri, mo, casscf.ncore, casscf.ncas)
+            log.timer('mc_ao2mo incore', *t0)
         else:
             import gc
             gc.collect()
-            log = logger.Logger(casscf.stdout, casscf.verbose)
             self._tmpfile = tempfile.NamedTemporaryFile()
             max_memory = max(3000, casscf.max_memory*.9-mem_now)
             if max_memory < mem_basic:
@@ -134,6 +134,14 @@ class KnowValues(unittest.TestCase):
         self.assertTrue(numpy.allclose(eri0[:,:,ncore:nocc,ncore:nocc], eris.ppaa))
         self.assertTrue(numpy.allclose(eri0[:,ncore:nocc,:,ncore:nocc], eris.papa))
 
+    def test_dfcasscf_on_normal_scf(self):
+        mf = scf.density_fit(scf.RHF(mol))
+        mf.kernel()
+        eref = mcscf.DFCASSCF(mf, 4, 4).kernel()[0]
+        mc = mcscf.DFCASSCF(m, 4, 4)
+        mc.with_dep4 = True
+        self.assertAlmostEqual(mc.kernel()[0], eref, 7)
+
     def test_assign_cderi(self):
         nao = molsym.nao_nr()
         w, u = scipy.linalg.eigh(mol.intor('cint2e_sph', aosym='s4'))
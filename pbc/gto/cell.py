@@ -154,7 +154,7 @@ def unpack(celldic):
 def dumps(cell):
     '''Serialize Cell object to a JSON formatted str.
     '''
-    exclude_keys = set(('output', 'stdout', '_keys'))
+    exclude_keys = set(('output', 'stdout', '_keys', '_qcond'))
 
     celldic = dict(cell.__dict__)
     for k in exclude_keys:
@@ -52,11 +52,7 @@ class VHFOpt(object):
         self._this.contents.fprescreen = _fpointer(prescreen)
 
         if prescreen != 'CVHFnoscreen':
-            fsetqcond = getattr(libcvhf, qcondname)
-            fsetqcond(self._this,
-                      c_atm.ctypes.data_as(ctypes.c_void_p), natm,
-                      c_bas.ctypes.data_as(ctypes.c_void_p), nbas,
-                      c_env.ctypes.data_as(ctypes.c_void_p))
+            set_qcond(self, mol, qcondname)
 
     @property
     def direct_scf_tol(self):
@@ -84,6 +80,44 @@ class VHFOpt(object):
                    c_bas.ctypes.data_as(ctypes.c_void_p), nbas,
                    c_env.ctypes.data_as(ctypes.c_void_p))
 
+# The size of q_cond in units of nbas**2
+_QCOND_NBLKS = {'CVHFrkbssll_direct_scf': 2}
+
+def set_qcond(opt, mol, qcondname, lib=libcvhf):
+    '''Initialize the Schwarz conditions (q_cond) of the optimizer opt.  The
+    q_cond of each qcondname is computed once and cached in mol._qcond, then
+    shared by all optimizers of the molecule.  The cache is invalidated when
+    mol._atm, mol._bas or mol._env changes.
+    '''
+    c_atm = numpy.asarray(mol._atm, dtype=numpy.int32, order='C')
+    c_bas = numpy.asarray(mol._bas, dtype=numpy.int32, order='C')
+    c_env = numpy.asarray(mol._env, dtype=numpy.double, order='C')
+    cache = getattr(mol, '_qcond', None)
+    if cache is not None and qcondname in cache:
+        atm, bas, env, q_cond = cache[qcondname]
+        if (numpy.array_equal(atm, c_atm) and numpy.array_equal(bas, c_bas) and
+            numpy.array_equal(env, c_env)):
+            libcvhf.CVHFset_q_cond(opt._this, q_cond.ctypes.data_as(ctypes.c_void_p),
+                                   ctypes.c_int(q_cond.size))
+            return q_cond
+
+    natm = ctypes.c_int(c_atm.shape[0])
+    nbas = ctypes.c_int(c_bas.shape[0])
+    fsetqcond = getattr(lib, qcondname)
+    fsetqcond(opt._this,
+              c_atm.ctypes.data_as(ctypes.c_void_p), natm,
+              c_bas.ctypes.data_as(ctypes.c_void_p), nbas,
+              c_env.ctypes.data_as(ctypes.c_void_p))
+    size = nbas.value**2 * _QCOND_NBLKS.get(qcondname, 1)
+    q_cond = numpy.ctypeslib.as_array(ctypes.cast(opt._this.contents.q_cond,
+                                      ctypes.POINTER(ctypes.c_double)),
+                                      shape=(size,)).copy()
+    if cache is not None:
+        # c_env can be mol._env itself.  Keep a copy to detect the changes
+        # made in place.
+        cache[qcondname] = (c_atm.copy(), c_bas.copy(), c_env.copy(), q_cond)
+    return q_cond
+
 class _CVHFOpt(ctypes.Structure):
     _fields_ = [('nbas', ctypes.c_int),
                 ('_padding', ctypes.c_int),
@@ -100,15 +134,22 @@ class _CVHFOpt(ctypes.Structure):
 # hermi = 2 : anti-hermitian
 ################################################
 def incore(eri, dm, hermi=0):
+    '''J, K matrices of the incore eri.  dm can be a density matrix or a
+    set of density matrices.  The eri array is swept only once for all
+    density matrices.
+    '''
     assert(not numpy.iscomplexobj(eri))
     eri = numpy.ascontiguousarray(eri)
-    dm = numpy.ascontiguousarray(dm)
-    nao = dm.shape[0]
-    vj = numpy.empty((nao,nao))
-    vk = numpy.empty((nao,nao))
+    dm = numpy.asarray(dm, order='C')
+    dm_shape = dm.shape
+    nao = dm_shape[-1]
+    dms = dm.reshape(-1,nao,nao)
+    n_dm = dms.shape[0]
+    vj = numpy.empty((n_dm,nao,nao))
+    vk = numpy.empty((n_dm,nao,nao))
     npair = nao*(nao+1)//2
     if eri.ndim == 2 and npair*npair == eri.size: # 4-fold symmetry eri
-        fdrv = getattr(libcvhf, 'CVHFnrs4_incore_drv')
+        fdrv = getattr(libcvhf, 'CVHFnrs4_incore_nset_drv')
         # 'ijkl,kl->ij'
         fvj = _fpointer('CVHFics4_kl_s2ij')
         # 'ijkl,il->jk'
@@ -119,32 +160,42 @@ def incore(eri, dm, hermi=0):
         ## 'ijkl,jk->il'
         #fvk = _fpointer('CVHFics4_jk_s1il')
 
-        tridm = dm
+        tridms = dms
     elif eri.ndim == 1 and npair*(npair+1)//2 == eri.size: # 8-fold symmetry eri
-        fdrv = getattr(libcvhf, 'CVHFnrs8_incore_drv')
+        fdrv = getattr(libcvhf, 'CVHFnrs8_incore_nset_drv')
         fvj = _fpointer('CVHFics8_tridm_vj')
         if hermi == 1:
             fvk = _fpointer('CVHFics8_jk_s2il')
         else:
             fvk = _fpointer('CVHFics8_jk_s1il')
-        tridm = pyscf.lib.pack_tril(pyscf.lib.transpose_sum(dm))
         i = numpy.arange(nao)
-        tridm[i*(i+1)//2+i] *= .5
+        tridms = []
+        for dmi in dms:
+            tridm = pyscf.lib.pack_tril(pyscf.lib.transpose_sum(dmi))
+            tridm[i*(i+1)//2+i] *= .5
+            tridms.append(tridm)
     else:
         raise RuntimeError('Array shape not consistent: DM %s, eri %s'
-                           % (dm.shape, eri.shape))
+                           % (dm_shape, eri.shape))
+    tridmsptr = (ctypes.c_void_p*n_dm)()
+    dmsptr = (ctypes.c_void_p*n_dm)()
+    vjptr = (ctypes.c_void_p*n_dm)()
+    vkptr = (ctypes.c_void_p*n_dm)()
+    for i in range(n_dm):
+        tridmsptr[i] = tridms[i].ctypes.data_as(ctypes.c_void_p)
+        dmsptr[i] = dms[i].ctypes.data_as(ctypes.c_void_p)
+        vjptr[i] = vj[i].ctypes.data_as(ctypes.c_void_p)
+        vkptr[i] = vk[i].ctypes.data_as(ctypes.c_void_p)
     fdrv(eri.ctypes.data_as(ctypes.c_void_p),
-         tridm.ctypes.data_as(ctypes.c_void_p),
-         vj.ctypes.data_as(ctypes.c_void_p),
-         dm.ctypes.data_as(ctypes.c_void_p),
-         vk.ctypes.data_as(ctypes.c_void_p),
+         tridmsptr, vjptr, dmsptr, vkptr, ctypes.c_int(n_dm),
          ctypes.c_int(nao), fvj, fvk)
-    if hermi != 0:
-        vj = pyscf.lib.hermi_triu(vj, hermi)
-        vk = pyscf.lib.hermi_triu(vk, hermi)
-    else:
-        vj = pyscf.lib.hermi_triu(vj, 1)
-    return vj, vk
+    for i in range(n_dm):
+        if hermi != 0:
+            vj[i] = pyscf.lib.hermi_triu(vj[i], hermi)
+            vk[i] = pyscf.lib.hermi_triu(vk[i], hermi)
+        else:
+            vj[i] = pyscf.lib.hermi_triu(vj[i], 1)
+    return vj.reshape(dm_shape), vk.reshape(dm_shape)
 
 # use cint2e_sph as cintor, CVHFnrs8_ij_s2kl, CVHFnrs8_jk_s2il as fjk to call
 # direct_mapdm
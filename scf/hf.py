@@ -133,7 +133,14 @@ Keyword argument "init_dm" is replaced by "dm0"''')
         mo_energy, mo_coeff = mf.eig(fock, s1e)
         mo_occ = mf.get_occ(mo_energy, mo_coeff)
         dm = mf.make_rdm1(mo_coeff, mo_occ)
-        vhf = mf.get_veff(mol, dm, dm_last, vhf)
+        if _full_rebuild(mf, cycle):
+            # The incremental Fock build accumulates the screening error of
+            # each step.  Rebuild the HF potential from the full density
+            # matrix periodically to reset the error.
+            logger.debug(mf, 'cycle= %d  rebuild HF potential', cycle+1)
+            vhf = mf.get_veff(mol, dm)
+        else:
+            vhf = mf.get_veff(mol, dm, dm_last, vhf)
         e_tot = mf.energy_tot(dm, h1e, vhf)
 
         norm_gorb = numpy.linalg.norm(mf.get_grad(mo_coeff, mo_occ, h1e+vhf))
@@ -162,6 +169,13 @@ Keyword argument "init_dm" is replaced by "dm0"''')
     logger.timer(mf, 'scf_cycle', *cput0)
     return scf_conv, e_tot, mo_energy, mo_coeff, mo_occ
 
+def _full_rebuild(mf, cycle):
+    '''Whether to compute the HF potential of the given cycle from the full
+    density matrix instead of the density matrix increment.'''
+    rebuild_nsteps = getattr(mf, 'rebuild_nsteps', 0)
+    return (getattr(mf, 'direct_scf', False) and rebuild_nsteps > 0 and
+            (cycle+1) % rebuild_nsteps == 0)
+
 
 def energy_elec(mf, dm=None, h1e=None, vhf=None):
     r'''Electronic part of Hartree-Fock energy, for given core hamiltonian and
@@ -454,7 +468,9 @@ def dot_eri_dm(eri, dm, hermi=0):
         eri : ndarray
             8-fold or 4-fold ERIs
         dm : ndarray or list of ndarrays
-            A density matrix or a list of density matrices
+            A density matrix or a list of density matrices.  The J and K
+            matrices of all density matrices are computed in one pass over
+            the ERIs.
 
     Kwargs:
         hermi : int
@@ -480,12 +496,7 @@ def dot_eri_dm(eri, dm, hermi=0):
     >>> print(j.shape)
     (3, 2, 2)
     '''
-    if isinstance(dm, numpy.ndarray) and dm.ndim == 2:
-        vj, vk = _vhf.incore(eri, dm, hermi=hermi)
-    else:
-        vjk = [_vhf.incore(eri, dmi, hermi=hermi) for dmi in dm]
-        vj = numpy.array([v[0] for v in vjk])
-        vk = numpy.array([v[1] for v in vjk])
+    vj, vk = _vhf.incore(eri, numpy.asarray(dm), hermi=hermi)
     return vj, vk
 
 
@@ -933,6 +944,12 @@ class SCF(lib.StreamObject):
             Direct SCF is used by default.
         direct_scf_tol : float
             Direct SCF cutoff threshold.  Default is 1e-13.
+        rebuild_nsteps : int
+            In direct SCF, the HF potential is built incrementally from the
+            change of the density matrix.  Every rebuild_nsteps cycles, the
+            HF potential is rebuilt from the full density matrix to remove
+            the accumulated screening error.  0 or negative number to switch
+            off the full rebuild.  Default is 5.
         callback : function(envs_dict) => None
             callback function takes one dict as the argument which is
             generated by the builtin function :func:`locals`, so that the
@@ -989,6 +1006,7 @@ class SCF(lib.StreamObject):
         self.level_shift = 0
         self.direct_scf = True
         self.direct_scf_tol = 1e-13
+        self.rebuild_nsteps = 5
 ##################################################
 # don't modify the following attributes, they are not input options
         self.mo_energy = None
@@ -1027,6 +1045,7 @@ class SCF(lib.StreamObject):
         logger.info(self, 'direct_scf = %s', self.direct_scf)
         if self.direct_scf:
             logger.info(self, 'direct_scf_tol = %g', self.direct_scf_tol)
+            logger.info(self, 'rebuild_nsteps = %d', self.rebuild_nsteps)
         if self.chkfile:
             logger.info(self, 'chkfile to save SCF result = %s', self.chkfile)
         logger.info(self, 'max_memory %d MB (current use %d MB)',
@@ -23,6 +23,21 @@ from pyscf.scf import addons
 def expmat(a):
     return scipy.linalg.expm(a)
 
+def _gen_df_jk_ov(mf, orbos, hyb=None):
+    '''For density fitting SCF, generate the function to compute the J, K
+    matrices of orbital rotations.  The half-transformed DF tensor of the
+    occupied orbitals is reused in all calls of h_op.  Returns None if mf is
+    not density fitting SCF or K matrix is not needed.
+    '''
+    from pyscf import df
+    with_df = getattr(mf, 'with_df', None)
+    if (isinstance(with_df, df.DF) and not isinstance(with_df, df.DF4C) and
+        (hyb is None or abs(hyb) > 1e-10)):
+        from pyscf.df import df_jk
+        return df_jk.gen_jk_ov(with_df, orbos)
+    else:
+        return None
+
 def gen_g_hop_rhf(mf, mo_coeff, mo_occ, fock_ao=None):
     mol = mf.mol
     occidx = numpy.where(mo_occ==2)[0]
@@ -51,6 +66,7 @@ def gen_g_hop_rhf(mf, mo_coeff, mo_occ, fock_ao=None):
         dm0 = None #mf.make_rdm1(mo_coeff, mo_occ)
     else:
         hyb = None
+    jk_ov = _gen_df_jk_ov(mf, (mo_coeff[:,occidx],), hyb)
 
     def h_op(x):
         x = x.reshape(nvir,nocc)
@@ -59,15 +75,22 @@ def gen_g_hop_rhf(mf, mo_coeff, mo_occ, fock_ao=None):
 
         d1 = reduce(numpy.dot, (mo_coeff[:,viridx], x, mo_coeff[:,occidx].T))
         dm1 = d1 + d1.T
+        if jk_ov is not None:
+            vj, vk = jk_ov((numpy.dot(mo_coeff[:,viridx], x),))
+            vj, vk = vj[0], vk[0]
         if hyb is None:
-            v1 = mf.get_veff(mol, dm1)
+            if jk_ov is None:
+                v1 = mf.get_veff(mol, dm1)
+            else:
+                v1 = vj - vk * .5
         else:
             v1 = mf._numint.nr_rks_fxc(mol, mf.grids, mf.xc, dm0, dm1,
                                        0, 1, rho0, vxc, fxc)
             if abs(hyb) < 1e-10:
                 v1 += mf.get_j(mol, dm1)
             else:
-                vj, vk = mf.get_jk(mol, dm1)
+                if jk_ov is None:
+                    vj, vk = mf.get_jk(mol, dm1)
                 v1 += vj - vk * hyb * .5
         x2 += reduce(numpy.dot, (mo_coeff[:,viridx].T, v1,
                                  mo_coeff[:,occidx])) * 4
@@ -141,6 +164,8 @@ def gen_g_hop_uhf(mf, mo_coeff, mo_occ, fock_ao=None):
         dm0 = None
     else:
         hyb = None
+    jk_ov = _gen_df_jk_ov(mf, (mo_coeff[0][:,occidxa],
+                               mo_coeff[1][:,occidxb]), hyb)
 
     def h_op(x):
         x1a = x[:nvira*nocca].reshape(nvira,nocca)
@@ -155,8 +180,14 @@ def gen_g_hop_uhf(mf, mo_coeff, mo_occ, fock_ao=None):
         d1b = reduce(numpy.dot, (mo_coeff[1][:,viridxb], x1b,
                                  mo_coeff[1][:,occidxb].T))
         dm1 = numpy.array((d1a+d1a.T,d1b+d1b.T))
+        if jk_ov is not None:
+            vj, vk = jk_ov((numpy.dot(mo_coeff[0][:,viridxa], x1a),
+                            numpy.dot(mo_coeff[1][:,viridxb], x1b)))
         if hyb is None:
-            v1 = mf.get_veff(mol, dm1)
+            if jk_ov is None:
+                v1 = mf.get_veff(mol, dm1)
+            else:
+                v1 = vj[0] + vj[1] - vk
         else:
             v1 = mf._numint.nr_uks_fxc(mol, mf.grids, mf.xc, dm0, dm1,
                                        0, 1, rho0, vxc, fxc)
@@ -164,7 +195,8 @@ def gen_g_hop_uhf(mf, mo_coeff, mo_occ, fock_ao=None):
                 vj = mf.get_j(mol, dm1)
                 v1 += vj[0] + vj[1]
             else:
-                vj, vk = mf.get_jk(mol, dm1)
+                if jk_ov is None:
+                    vj, vk = mf.get_jk(mol, dm1)
                 v1 += vj[0]+vj[1] - vk * hyb * .5
         x2a += reduce(numpy.dot, (mo_coeff[0][:,viridxa].T, v1[0],
                                   mo_coeff[0][:,occidxa]))
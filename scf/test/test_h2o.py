@@ -93,6 +93,15 @@ class KnowValues(unittest.TestCase):
         uhf.max_memory = 0
         self.assertAlmostEqual(uhf.scf(), -75.98394849812, 9)
 
+    def test_nr_rhf_rebuild_nsteps(self):
+        rhf = scf.RHF(mol)
+        rhf.conv_tol = 1e-11
+        rhf.max_memory = 0
+        rhf.rebuild_nsteps = 2
+        self.assertAlmostEqual(rhf.scf(), -75.98394849812, 9)
+        rhf.rebuild_nsteps = 0
+        self.assertAlmostEqual(rhf.scf(), -75.98394849812, 9)
+
     def test_nr_rhf_no_direct(self):
         rhf = scf.RHF(mol)
         rhf.conv_tol = 1e-11
@@ -71,6 +71,42 @@ class KnowValues(unittest.TestCase):
         nr.conv_tol_grad = 1e-5
         self.assertAlmostEqual(nr.kernel(), -75.58051984397145, 9)
 
+    def test_nr_rhf_df(self):
+        mol = gto.M(
+            verbose = 5,
+            output = '/dev/null',
+            atom = [
+            ["O" , (0. , 0.     , 0.)],
+            [1   , (0. , -0.757 , 0.587)],
+            [1   , (0. , 0.757  , 0.587)] ],
+            basis = '6-31g')
+        e_ref = scf.density_fit(scf.RHF(mol)).kernel()
+        mf = scf.density_fit(scf.RHF(mol))
+        mf.max_cycle = 1
+        mf.kernel()
+        nr = scf.newton(mf)
+        nr.conv_tol_grad = 1e-5
+        self.assertAlmostEqual(nr.kernel(), e_ref, 9)
+
+    def test_nr_uhf_df(self):
+        mol = gto.M(
+            verbose = 5,
+            output = '/dev/null',
+            atom = [
+            ["O" , (0. , 0.     , 0.)],
+            [1   , (0. , -0.757 , 0.587)],
+            [1   , (0. , 0.757  , 0.587)] ],
+            basis = '6-31g',
+            charge = 1,
+            spin = 1,
+        )
+        e_ref = scf.density_fit(scf.UHF(mol)).kernel()
+        mf = scf.density_fit(scf.UHF(mol))
+        mf.max_cycle = 1
+        mf.kernel()
+        nr = scf.newton(mf)
+        nr.conv_tol_grad = 1e-5
+        self.assertAlmostEqual(nr.kernel(), e_ref, 9)
 
     def test_nr_rhf_symm(self):
         mol = gto.M(
@@ -197,6 +197,20 @@ class KnowValues(unittest.TestCase):
         self.assertAlmostEqual(numpy.linalg.norm(j1), 77.035779188661465, 9)
         self.assertAlmostEqual(numpy.linalg.norm(k1), 46.253491700647963, 9)
 
+    def test_dot_eri_dm_nset(self):
+        numpy.random.seed(1)
+        nao = mol.nao_nr()
+        dms = numpy.random.random((3,nao,nao))
+        vj, vk = scf.hf.dot_eri_dm(mf._eri, dms, hermi=0)
+        self.assertEqual(vj.shape, (3,nao,nao))
+        for i in range(3):
+            j1, k1 = scf.hf.dot_eri_dm(mf._eri, dms[i], hermi=0)
+            self.assertTrue(numpy.allclose(vj[i], j1))
+            self.assertTrue(numpy.allclose(vk[i], k1))
+        j1, k1 = scf.hf.get_jk(mol, dms, hermi=0)
+        self.assertTrue(numpy.allclose(vj, j1))
+        self.assertTrue(numpy.allclose(vk, k1))
+
     def test_ghost_atm_meta_lowdin(self):
         mol = gto.Mole()
         mol.atom = [["O" , (0. , 0.     , 0.)],
@@ -141,6 +141,33 @@ class KnowValues(unittest.TestCase):
         self.assertTrue(numpy.allclose(vk0,vk1))
 
 
+    def test_qcond_cache(self):
+        mol1 = mol.copy()
+        mol1.build(False, False)
+        self.assertEqual(mol1._qcond, {})
+        opt = _vhf.VHFOpt(mol1, 'cint2e_sph', 'CVHFnrs8_prescreen',
+                          'CVHFsetnr_direct_scf', 'CVHFsetnr_direct_scf_dm')
+        q_cond = mol1._qcond['CVHFsetnr_direct_scf'][3]
+        self.assertTrue(_vhf.set_qcond(opt, mol1, 'CVHFsetnr_direct_scf') is q_cond)
+
+        opt1 = _vhf.VHFOpt(mol1, 'cint2e_sph', 'CVHFnrs8_prescreen',
+                           'CVHFsetnr_direct_scf', 'CVHFsetnr_direct_scf_dm')
+        dm = mf.make_rdm1()
+        vj0, vk0 = scf.hf.get_jk(mol1, dm)
+        vj1, vk1 = scf.hf.get_jk(mol1, dm, vhfopt=opt1)
+        self.assertTrue(numpy.allclose(vj0, vj1))
+        self.assertTrue(numpy.allclose(vk0, vk1))
+
+        mol2 = mol1.copy()
+        self.assertTrue(mol2._qcond is not mol1._qcond)
+        self.assertTrue(_vhf.set_qcond(opt, mol2, 'CVHFsetnr_direct_scf') is q_cond)
+        mol2._env[mol2._atm[1,gto.PTR_COORD]] += .1
+        self.assertTrue(_vhf.set_qcond(opt, mol2, 'CVHFsetnr_direct_scf') is not q_cond)
+        self.assertTrue(_vhf.set_qcond(opt, mol1, 'CVHFsetnr_direct_scf') is q_cond)
+
+        mol1._env[mol1._atm[1,gto.PTR_COORD]] += .1
+        self.assertTrue(_vhf.set_qcond(opt, mol1, 'CVHFsetnr_direct_scf') is not q_cond)
+
 if __name__ == "__main__":
     print("Full Tests for _vhf")
     unittest.main()